@@ -1,8 +1,9 @@
 from flask import Flask, Response
 
+from database.connection import close_session_scope, open_session_scope
 from .errors import NotFoundError, MethodNotAllowedError
 from .base_resource import error_to_response
-from .resources import actors_api, movies_api
+from .resources import actors_api, genres_api, movies_api, search_api, stats_api, system_api
 
 
 def not_found_error(_) -> Response:
@@ -21,13 +22,30 @@ def not_allowed_error(_) -> Response:
     return error_to_response(error)
 
 
+def open_request_session():
+    """
+    All repositories share one database session during a request.
+    """
+    open_session_scope()
+
+
+def close_request_session(_):
+    close_session_scope()
+
+
 def create_app() -> Flask:
     """
     Main application configuration
     """
     app = Flask(__name__)
     app.register_blueprint(actors_api)
+    app.register_blueprint(genres_api)
     app.register_blueprint(movies_api)
+    app.register_blueprint(search_api)
+    app.register_blueprint(stats_api)
+    app.register_blueprint(system_api)
+    app.before_request(open_request_session)
+    app.teardown_request(close_request_session)
     app.register_error_handler(404, not_found_error)
     app.register_error_handler(405, not_allowed_error)
     return app
@@ -0,0 +1,10 @@
+from api import create_app
+from .app import AsgiApplication
+from .resources import resources
+
+
+def create_asgi_app() -> AsgiApplication:
+    """
+    ASGI application configuration (see manage.py run --async)
+    """
+    return AsgiApplication(resources=resources, wsgi_app=create_app())
@@ -0,0 +1,165 @@
+import asyncio
+import io
+import sys
+import typing
+
+from flask import Flask
+import werkzeug
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule
+
+from api.asgi.base_resource import AsyncBaseResource
+from database.aio_connection import dispose_async_engine
+
+_CHUNKS_END = object()
+
+
+class AsgiApplication:
+    """
+    ASGI application serving the resources with asynchronous implementations
+    on the event loop. Requests to all other resources are passed
+    to the Flask application which is run in the threads of the executor.
+    """
+    def __init__(self, resources: typing.Iterable[typing.Type[AsyncBaseResource]], wsgi_app: Flask):
+        self.url_map = Map([
+            Rule(resource.rule, endpoint=resource(), methods=resource.methods)
+            for resource in resources
+        ])
+        self.wsgi_app = wsgi_app
+
+    async def __call__(self, scope: dict, receive: typing.Callable, send: typing.Callable):
+        if scope["type"] == "lifespan":
+            await self._handle_lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._handle_http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _handle_lifespan(self, receive: typing.Callable, send: typing.Callable):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await dispose_async_engine()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _handle_http(self, scope: dict, receive: typing.Callable, send: typing.Callable):
+        environ = _make_environ(scope, await _read_body(receive))
+
+        try:
+            resource, url_variables = self.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            # Not found, not allowed methods and redirects are handled by the Flask application
+            await self._call_wsgi_app(environ, send)
+            return
+
+        try:
+            response = await resource.dispatch(werkzeug.Request(environ), url_variables)
+        except HTTPException as e:
+            # E.g. malformed JSON body
+            response = e.get_response(environ)
+
+        body, status, headers = response.get_wsgi_response(environ)
+        await _send_start(send, status, headers)
+        await _send_body(send, body, in_executor=response.is_streamed)
+
+    async def _call_wsgi_app(self, environ: dict, send: typing.Callable):
+        loop = asyncio.get_running_loop()
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = status
+            started["headers"] = headers
+
+        body = await loop.run_in_executor(None, self.wsgi_app, environ, start_response)
+        try:
+            await _send_start(send, started["status"], started["headers"])
+        except BaseException:
+            if hasattr(body, "close"):
+                await loop.run_in_executor(None, body.close)
+            raise
+
+        await _send_body(send, body, in_executor=True)
+
+
+async def _read_body(receive: typing.Callable) -> bytes:
+    body = bytearray()
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return bytes(body)
+
+
+async def _send_start(send: typing.Callable, status: str, headers: typing.List[typing.Tuple[str, str]]):
+    await send({
+        "type": "http.response.start",
+        "status": int(status.split(" ", 1)[0]),
+        "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+    })
+
+
+async def _send_body(send: typing.Callable, body: typing.Iterable[bytes], in_executor: bool):
+    """
+    Sending the chunks of the body. The chunks of streamed responses
+    are produced by the executor, e.g. while the rows are read from the database,
+    so neither the database nor the encoding blocks the event loop.
+    """
+    if not in_executor:
+        for chunk in body:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    loop = asyncio.get_running_loop()
+    try:
+        chunks = iter(body)
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, _CHUNKS_END)
+            if chunk is _CHUNKS_END:
+                break
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        if hasattr(body, "close"):
+            await loop.run_in_executor(None, body.close)
+
+
+def _make_environ(scope: dict, body: bytes) -> dict:
+    """
+    Making WSGI environment of the ASGI request
+    for werkzeug and the Flask application.
+    """
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+    return environ
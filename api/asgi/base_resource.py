@@ -0,0 +1,62 @@
+import typing
+
+import werkzeug
+
+from api.base_resource import (
+    BaseResource,
+    CacheValidators,
+    Request,
+    error_to_response,
+    is_not_modified,
+    set_cache_validators,
+    validation_error_to_response,
+)
+from api.errors import BaseAPIError, BadRequestError
+
+
+class AsyncBaseResource(BaseResource):
+    """
+    Base class for the resources of the ASGI application.
+    The attributes and the contract are the same as of BaseResource
+    but execute and get_cache_validators are coroutines.
+
+        class GetUserResource(AsyncBaseResource):
+            rule = "/users/<int:user_id>"
+            methods = ("GET",)
+            response_schema = UserSchema()
+
+            async def execute(self, req: Request):
+                return await async_users_service.get_user(req.url_variables["user_id"])
+    """
+    async def execute(self, req: Request):
+        raise NotImplementedError()
+
+    async def get_cache_validators(self, req: Request) -> typing.Optional[CacheValidators]:
+        return None
+
+    async def dispatch(
+        self,
+        http_request: werkzeug.Request,
+        url_variables: typing.Dict[str, typing.Any],
+    ) -> werkzeug.Response:
+        try:
+            req = self._load_request(http_request, url_variables)
+        except BadRequestError as e:
+            return validation_error_to_response(e)
+
+        validators = None
+        if http_request.method in ("GET", "HEAD"):
+            try:
+                validators = await self.get_cache_validators(req)
+            except BaseAPIError as e:
+                return error_to_response(e)
+
+            if validators and is_not_modified(http_request, validators):
+                return set_cache_validators(werkzeug.Response(status=304), validators)
+
+        try:
+            result = await self.execute(req)
+        except BaseAPIError as e:
+            return error_to_response(e)
+
+        return self._make_response(result, validators)
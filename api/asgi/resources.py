@@ -0,0 +1,99 @@
+"""
+Resources served by the ASGI application itself.
+They are the read-only resources of api.resources
+using the asynchronous services, all other requests
+are passed to the Flask application.
+"""
+import typing
+
+from api.asgi.base_resource import AsyncBaseResource
+from api.base_resource import CacheValidators, Request, get_data_etag
+from api.encoders import SchemaEncoder, TypeDispatchEncoder
+from api.errors import NotFoundError
+from api.resources.actors import get_actors_aggregated_arguments
+from api.resources.movies import get_movie_etag, get_movies_batch_etag, get_movies_batch_ids, get_movies_page_arguments
+from api.schemas import (
+    ActorAggregatedPaginatedSchema,
+    ActorAggregatedPaginationSchema,
+    MovieSchema,
+    MoviesBatchSchema,
+    MoviesPageSchema,
+    MoviesQuerySchema,
+)
+from entities import ActorsAggregatedPaginated, Movie, MoviesBatch, MoviesPage
+import services
+
+
+class GetMovieResource(AsyncBaseResource):
+    methods = ("GET",)
+    rule = "/movies/<int:movie_id>"
+    response_schema = MovieSchema()
+    response_encoder = SchemaEncoder(response_schema)
+
+    async def get_cache_validators(self, req: Request) -> typing.Optional[CacheValidators]:
+        movie_id = req.url_variables["movie_id"]
+        version = (await services.async_movies_service.get_movies_versions([movie_id])).get(movie_id)
+        if version is None:
+            return None
+
+        return CacheValidators(etag=get_movie_etag(version), last_modified=version.updated_at)
+
+    async def execute(self, req: Request) -> Movie:
+        movie = await services.async_movies_service.get_movie(req.url_variables["movie_id"])
+        if not movie:
+            raise NotFoundError("Movie not found")
+
+        return movie
+
+
+class GetMoviesResource(AsyncBaseResource):
+    methods = ("GET",)
+    rule = "/movies"
+    request_query_parameters_schema = MoviesQuerySchema()
+    response_encoder = TypeDispatchEncoder({
+        MoviesBatch: SchemaEncoder(MoviesBatchSchema()),
+        MoviesPage: SchemaEncoder(MoviesPageSchema()),
+    })
+
+    async def get_cache_validators(self, req: Request) -> CacheValidators:
+        movie_ids = get_movies_batch_ids(req.query_parameters)
+        if movie_ids is None:
+            return CacheValidators(etag=get_data_etag(await services.async_movies_service.get_data_version()))
+
+        versions = await services.async_movies_service.get_movies_versions(movie_ids)
+        return CacheValidators(etag=get_movies_batch_etag(movie_ids, versions))
+
+    async def execute(self, req: Request) -> typing.Union[MoviesBatch, MoviesPage]:
+        params = req.query_parameters
+        if params["ids"] is not None:
+            return await services.async_movies_service.get_movies(params["ids"])
+
+        return await services.async_movies_service.get_movies_page(**get_movies_page_arguments(params))
+
+
+class GetActorsAggregatedResource(AsyncBaseResource):
+    """
+    Pages are streamed as by the Flask application,
+    the rows are read and encoded by the executor (see AsyncActorsService).
+    """
+    methods = ("GET",)
+    rule = "/actors/aggregated"
+    request_query_parameters_schema = ActorAggregatedPaginationSchema()
+    response_schema = ActorAggregatedPaginatedSchema()
+    response_encoder = SchemaEncoder(response_schema)
+    response_streamed = True
+
+    async def get_cache_validators(self, req: Request) -> CacheValidators:
+        return CacheValidators(etag=get_data_etag(await services.async_actors_service.get_data_version()))
+
+    async def execute(self, req: Request) -> ActorsAggregatedPaginated:
+        return await services.async_actors_service.get_actors_aggregated(
+            **get_actors_aggregated_arguments(req.query_parameters)
+        )
+
+
+resources = [
+    GetMovieResource,
+    GetMoviesResource,
+    GetActorsAggregatedResource,
+]
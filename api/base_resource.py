@@ -1,10 +1,12 @@
 import dataclasses
+import datetime
 import typing
 
 from flask import request, Response
 from flask.scaffold import Scaffold
 from flask.views import View
 from marshmallow import ValidationError
+import werkzeug
 
 from api.errors import BaseAPIError, BadRequestError
 from api.schemas import BaseAPIErrorSchema, ValidationErrorSchema
@@ -28,6 +30,26 @@ class Request:
     json: typing.Any
 
 
+@dataclasses.dataclass(frozen=True)
+class CacheValidators:
+    """
+    Values identifying the state of the requested data
+    for conditional requests (If-None-Match, If-Modified-Since).
+    """
+    # Unquoted strong ETag value
+    etag: typing.Optional[str] = None
+    # Time of the last change in UTC
+    last_modified: typing.Optional[datetime.datetime] = None
+
+
+def get_data_etag(data_version: int) -> str:
+    """
+    ETag of the responses which may change on any change of the data,
+    e.g. pages of lists.
+    """
+    return f"data.{data_version}"
+
+
 class BaseResource(View):
     """
     Base class for views. Example of usage:
@@ -58,6 +80,13 @@ class BaseResource(View):
     request_query_parameters_schema = None
     request_json_schema = None
     response_schema = None
+    # Optional fast replacement of response_schema.dumps, see api.encoders.SchemaEncoder
+    response_encoder = None
+    # If it's set the response is encoded and sent by parts with response_encoder,
+    # so iterators in the result of execute are consumed while the response is sent.
+    # Errors raised by them can't change the status of the response any more.
+    response_streamed = False
+    response_mimetype = None
     response_status = 200
 
     def __init__(self):
@@ -74,36 +103,72 @@ class BaseResource(View):
         """
         raise NotImplementedError()
 
+    def get_cache_validators(self, req: Request) -> typing.Optional[CacheValidators]:
+        """
+        Getting the validators of the data returned by GET requests.
+        If they match the request conditions 304 Not Modified is returned
+        and the resource is not executed, so it must be much cheaper than execution.
+        The validators must change whenever the response changes.
+        May be overridden in a subclass, None disables conditional requests.
+        """
+        return None
+
     def dispatch_request(self, **kwargs) -> Response:
         # Request query parameters and JSON body are retrieved if they are required.
         # If they do not correspond the request schemas a Bad Request error is raised
         # with the validation details.
         try:
-            req = Request(
-                url_variables=kwargs,
-                query_parameters=self._get_query_parameters(),
-                json=self._get_request_json(),
-            )
+            req = self._load_request(request, kwargs)
         except BadRequestError as e:
             return validation_error_to_response(e)
 
+        # Validators are got before the execution so they are never newer than the response.
+        validators = None
+        if request.method in ("GET", "HEAD"):
+            try:
+                validators = self.get_cache_validators(req)
+            except BaseAPIError as e:
+                return error_to_response(e)
+
+            if validators and is_not_modified(request, validators):
+                return set_cache_validators(Response(status=304), validators)
+
         # Actual business logic execution.
         # If any API errors are raised in the subclassed view
         # they are caught and turned into HTTP errors.
         try:
-            response = self.execute(req)
+            result = self.execute(req)
         except BaseAPIError as e:
             return error_to_response(e)
 
-        if self.response_schema:
-            response = self.response_schema.dumps(response)
+        return self._make_response(result, validators)
 
-        return Response(
-            response=response,
+    def _load_request(self, http_request: werkzeug.Request, url_variables: typing.Dict[str, typing.Any]) -> Request:
+        return Request(
+            url_variables=url_variables,
+            query_parameters=self._get_query_parameters(http_request),
+            json=self._get_request_json(http_request),
+        )
+
+    def _make_response(self, result, validators: typing.Optional[CacheValidators]) -> Response:
+        if self.response_streamed:
+            result = self.response_encoder.iter_encode(result)
+        elif self.response_encoder:
+            result = self.response_encoder.encode(result)
+        elif self.response_schema:
+            result = self.response_schema.dumps(result)
+
+        response = Response(
+            response=result,
             status=self.response_status,
+            mimetype=self.response_mimetype,
         )
+        if validators:
+            set_cache_validators(response, validators)
+
+        return response
 
-    def _get_query_parameters(self):
+    def _get_query_parameters(self, http_request: werkzeug.Request):
         """
         Request query parameters are retrieved
         if the corresponding schema is defined.
@@ -112,7 +177,7 @@ class BaseResource(View):
         if self.request_query_parameters_schema:
 
             try:
-                data = self.request_query_parameters_schema.load(request.args)
+                data = self.request_query_parameters_schema.load(http_request.args)
             except ValidationError as e:
                 raise BadRequestError(
                     message="This request has invalid query parameters structure",
@@ -121,7 +186,7 @@ class BaseResource(View):
 
             return data
 
-    def _get_request_json(self):
+    def _get_request_json(self, http_request: werkzeug.Request):
         """
         JSON body is retrieved
         if the corresponding schema is defined.
@@ -129,11 +194,11 @@ class BaseResource(View):
         """
         if self.request_json_schema:
 
-            if request.json is None:
+            if http_request.json is None:
                 raise BadRequestError("JSON body is required for this request")
 
             try:
-                data = self.request_json_schema.load(request.json)
+                data = self.request_json_schema.load(http_request.json)
             except ValidationError as e:
                 raise BadRequestError(
                     message="This request has invalid JSON body structure",
@@ -153,6 +218,33 @@ def register_resource(app: Scaffold):
     return decorator
 
 
+def is_not_modified(http_request: werkzeug.Request, validators: CacheValidators) -> bool:
+    """
+    Checking the conditions of the request.
+    If-Modified-Since is ignored when If-None-Match is given.
+    """
+    if http_request.if_none_match:
+        return validators.etag is not None and http_request.if_none_match.contains_weak(validators.etag)
+
+    if http_request.if_modified_since and validators.last_modified:
+        # HTTP dates have no fractions of seconds
+        last_modified = validators.last_modified.replace(microsecond=0, tzinfo=datetime.timezone.utc)
+        return last_modified <= http_request.if_modified_since
+
+    return False
+
+
+def set_cache_validators(response: Response, validators: CacheValidators) -> Response:
+    """
+    Setting ETag and Last-Modified headers of the response.
+    """
+    if validators.etag is not None:
+        response.set_etag(validators.etag)
+    if validators.last_modified is not None:
+        response.last_modified = validators.last_modified.replace(tzinfo=datetime.timezone.utc)
+    return response
+
+
 def error_to_response(error: BaseAPIError) -> Response:
     """
     Making a HTTP error response of an error.
@@ -0,0 +1,223 @@
+import itertools
+import json
+import typing
+
+from marshmallow import Schema, fields
+
+# The number of list items encoded at once by SchemaEncoder.iter_encode
+_STREAM_BATCH_SIZE = 100
+
+
+def _integer(value) -> typing.Optional[int]:
+    return None if value is None else int(value)
+
+
+def _string(value) -> typing.Optional[str]:
+    return None if value is None else str(value)
+
+
+class SchemaEncoder:
+    """
+    Fast replacement of Schema.dumps for the responses made of entities.
+    A function converting an object to the dictionary is generated
+    for the schema and every nested schema once, so on encoding
+    no marshmallow code is called for the common fields.
+    The result is identical to Schema.dumps one.
+
+    Objects are read by their attributes, so the encoded objects
+    must have all fields of the schema, as the entities do.
+    Fields of unknown types are serialized by marshmallow.
+    Schemas with pre_dump and post_dump hooks are not supported.
+
+        class GetUserResource(BaseResource):
+            response_schema = UserSchema()
+            response_encoder = SchemaEncoder(response_schema)
+    """
+    def __init__(self, schema: Schema):
+        self.schema = schema
+        self._many = schema.many
+        # Names of the converters and fields in the namespace of the generated code
+        self._names = itertools.count()
+
+        namespace = {"_integer": _integer, "_string": _string}
+        fields_ = self._compile_fields(schema, namespace)
+        self._convert = self._make_function(fields_, namespace)
+
+        # Converters of single fields for encoding by parts:
+        # (key, attribute, field converter, item converter of nested lists)
+        self._fields = [
+            (key, attribute, self._make_function([(key, attribute, value, None)], namespace), namespace.get(items))
+            for key, attribute, value, items in fields_
+        ]
+
+    def encode(self, obj: typing.Any) -> str:
+        if self._many:
+            return json.dumps([self._convert(item) for item in obj])
+        return json.dumps(self._convert(obj))
+
+    def iter_encode(self, obj: typing.Any) -> typing.Iterator[str]:
+        """
+        Encoding the object by parts, e.g. for a streamed response.
+        Nested lists given as any other iterables (e.g. generators)
+        are consumed and encoded in batches, so they are never kept in memory.
+        Fields are read in the order of the schema right before encoding,
+        so a field may be set while the previous ones are iterated.
+        Joined parts are identical to the result of encode.
+        """
+        if self._many:
+            yield from _iter_encode_items(obj, self._convert)
+            return
+
+        if not self._fields:
+            yield "{}"
+            return
+
+        separator = "{"
+        for key, attribute, convert, convert_item in self._fields:
+            yield f"{separator}{json.dumps(key)}: "
+            separator = ", "
+
+            value = getattr(obj, attribute)
+            if convert_item is not None and value is not None and not isinstance(value, (list, tuple)):
+                yield from _iter_encode_items(value, convert_item)
+            else:
+                yield json.dumps(convert(obj)[key])
+
+        yield "}"
+
+    def _make_function(
+        self,
+        fields_: typing.List[typing.Tuple[str, str, str, typing.Optional[str]]],
+        namespace: dict,
+    ) -> typing.Callable[[typing.Any], dict]:
+        """
+        Generating the function converting an object
+        to the dictionary of the given fields.
+        """
+        items = ", ".join(f"{key!r}: {value}" for key, _, value, _ in fields_)
+        source = f"def convert(obj):\n    return {{{items}}}\n"
+        exec(source, namespace)
+        return namespace.pop("convert")
+
+    def _compile_fields(
+        self,
+        schema: Schema,
+        namespace: dict,
+    ) -> typing.List[typing.Tuple[str, str, str, typing.Optional[str]]]:
+        """
+        Making the expressions converting the fields of the schema
+        in the order of Schema.dump. Return (key, attribute, expression,
+        name of the item converter in the namespace if the field is a nested list).
+        Converters of nested schemas are added to the namespace.
+        """
+        if any(hooks for tag, hooks in schema._hooks.items() if "dump" in str(tag)):
+            raise ValueError(f"{type(schema).__name__} has dump hooks which are not supported")
+
+        fields_ = []
+        for name, field in schema.dump_fields.items():
+            attribute = field.attribute or name
+            if not attribute.isidentifier():
+                raise ValueError(f"Attribute {attribute} of {type(schema).__name__} is not supported")
+
+            key = field.data_key if field.data_key is not None else name
+            field_name = f"_field{next(self._names)}"
+            value = self._compile_field(field, f"obj.{attribute}", field_name, namespace)
+            if value is None:
+                namespace[field_name] = field
+                value = f"{field_name}.serialize({attribute!r}, obj)"
+
+            is_list = type(field) is fields.Nested and (field.many or field.schema.many)
+            fields_.append((key, attribute, value, field_name if is_list else None))
+
+        return fields_
+
+    def _compile_field(
+        self,
+        field: fields.Field,
+        value: str,
+        name: str,
+        namespace: dict,
+    ) -> typing.Optional[str]:
+        """
+        Making an expression converting the value of the field.
+        Return None if the field type is not supported.
+        """
+        field_type = type(field)
+        # Values of the right type are not converted
+        if field_type is fields.Integer and not field.as_string:
+            return f"({value} if {value}.__class__ is int else _integer({value}))"
+
+        if field_type is fields.String:
+            return f"({value} if {value}.__class__ is str else _string({value}))"
+
+        if field_type is fields.Nested:
+            namespace[name] = self._make_function(self._compile_fields(field.schema, namespace), namespace)
+            if field.many or field.schema.many:
+                return f"(None if {value} is None else [{name}(item) for item in {value}])"
+            return f"(None if {value} is None else {name}({value}))"
+
+        if field_type is fields.List:
+            item = self._compile_field(field.inner, "item", f"_field{next(self._names)}", namespace)
+            if item is not None:
+                return f"(None if {value} is None else [{item} for item in {value}])"
+
+        return None
+
+
+def _iter_encode_items(items: typing.Iterable, convert: typing.Callable[[typing.Any], dict]) -> typing.Iterator[str]:
+    """
+    Encoding a list by parts of _STREAM_BATCH_SIZE items.
+    """
+    yield "["
+    separator = ""
+    batch = []
+    for item in items:
+        batch.append(convert(item))
+        if len(batch) == _STREAM_BATCH_SIZE:
+            yield separator + json.dumps(batch)[1:-1]
+            separator = ", "
+            batch = []
+
+    if batch:
+        yield separator + json.dumps(batch)[1:-1]
+    yield "]"
+
+
+class TypeDispatchEncoder:
+    """
+    Encoder of the resources returning objects of different types,
+    every type is encoded by its own encoder.
+
+        class GetUsersResource(BaseResource):
+            response_encoder = TypeDispatchEncoder({
+                User: SchemaEncoder(UserSchema()),
+                UsersPage: SchemaEncoder(UsersPageSchema()),
+            })
+    """
+    def __init__(self, encoders: typing.Dict[type, typing.Any]):
+        self.encoders = encoders
+
+    def encode(self, obj: typing.Any) -> str:
+        return self._get_encoder(obj).encode(obj)
+
+    def iter_encode(self, obj: typing.Any) -> typing.Iterator[str]:
+        return self._get_encoder(obj).iter_encode(obj)
+
+    def _get_encoder(self, obj: typing.Any):
+        try:
+            return self.encoders[type(obj)]
+        except KeyError:
+            raise TypeError(f"No encoder for {type(obj).__name__}") from None
+
+
+class NDJSONEncoder:
+    """
+    Encoder of an iterable of JSON values to newline delimited JSON.
+    Values must be ready for json.dumps, e.g. dictionaries.
+    """
+    def encode(self, values: typing.Iterable) -> str:
+        return "".join(self.iter_encode(values))
+
+    def iter_encode(self, values: typing.Iterable) -> typing.Iterator[str]:
+        for value in values:
+            yield json.dumps(value) + "\n"
@@ -27,3 +27,8 @@ class NotFoundError(BaseAPIError):
 class MethodNotAllowedError(BaseAPIError):
     status = 405
     message = "This method is not allowed to use with this URL"
+
+
+class ServiceUnavailableError(BaseAPIError):
+    status = 503
+    message = "The service is not available"
@@ -1,2 +1,6 @@
 from .actors import actors_api
+from .genres import genres_api
 from .movies import movies_api
+from .search import search_api
+from .stats import stats_api
+from .system import system_api
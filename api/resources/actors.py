@@ -1,26 +1,164 @@
+import typing
+
 from flask import Blueprint
 
-from api.base_resource import BaseResource, Request, register_resource
-from api.schemas import ActorAggregatedPaginatedSchema, PaginationSchema
+from api.base_resource import BaseResource, CacheValidators, Request, get_data_etag, register_resource
+from api.encoders import SchemaEncoder
+from api.errors import NotFoundError
+from api.schemas import (
+    ActorAggregatedPaginatedSchema,
+    ActorAggregatedPaginationSchema,
+    ActorSchema,
+    ActorsPageParametersSchema,
+    ActorsPageSchema,
+    ActorsPathSchema,
+    ActorsResolutionSchema,
+    CoStarSchema,
+    CoStarsParametersSchema,
+    NamesSchema,
+)
+from entities import TOTAL_EXACT, TOTAL_NONE, Actor, ActorsPage, ActorsPath, ActorsResolution, CoStar
 import services
 
 actors_api = Blueprint("actors", __name__)
 
 
+def get_actors_aggregated_arguments(params: dict) -> dict:
+    """
+    Arguments of ActorsService.get_actors_aggregated for GET /actors/aggregated parameters.
+    The total number is counted by default only for the pages requested by offset.
+    """
+    total_mode = params["total"]
+    if total_mode is None:
+        total_mode = TOTAL_EXACT if params["cursor"] is None else TOTAL_NONE
+
+    return {
+        "offset": params["offset"],
+        "limit": params["limit"],
+        "cursor": params["cursor"],
+        "total_mode": total_mode,
+    }
+
+
+@register_resource(actors_api)
+class GetActorsResource(BaseResource):
+    """
+    Getting the list of actors in the order of their names.
+    The next page is requested by the cursor
+    returned in "next_cursor" field of the previous page.
+    """
+    methods = ("GET",)
+    rule = "/actors"
+    request_query_parameters_schema = ActorsPageParametersSchema()
+    response_schema = ActorsPageSchema()
+
+    def get_cache_validators(self, req: Request) -> CacheValidators:
+        return CacheValidators(etag=get_data_etag(services.actors_service.get_data_version()))
+
+    def execute(self, req: Request) -> ActorsPage:
+        params = req.query_parameters
+        cursor = tuple(params["cursor"]) if params["cursor"] is not None else None
+        return services.actors_service.get_actors_page(limit=params["limit"], cursor=cursor)
+
+
+@register_resource(actors_api)
+class GetActorResource(BaseResource):
+    """
+    Getting a single actor by its id.
+    """
+    methods = ("GET",)
+    rule = "/actors/<int:actor_id>"
+    response_schema = ActorSchema()
+
+    def execute(self, req: Request) -> Actor:
+        actor = services.actors_service.get_actor(req.url_variables["actor_id"])
+        if not actor:
+            raise NotFoundError("Actor not found")
+
+        return actor
+
+
+@register_resource(actors_api)
+class ResolveActorsResource(BaseResource):
+    """
+    Getting the ids of the actors by their names at once,
+    e.g. POST /actors/resolve {"names": ["Name 1", "Name 2"]}.
+    All actors having the same name are returned,
+    the names which are not found are listed in the response.
+    """
+    methods = ("POST",)
+    rule = "/actors/resolve"
+    request_json_schema = NamesSchema()
+    response_schema = ActorsResolutionSchema()
+
+    def execute(self, req: Request) -> ActorsResolution:
+        return services.actors_service.resolve_actors(req.json["names"])
+
+
 @register_resource(actors_api)
 class GetActorsAggregatedResource(BaseResource):
     """
     Getting the list of actors aggregated by the years of release
     with the number of their movies in the order of actors' names.
+    Pages may be requested either by offset or by the cursor
+    returned in "next_cursor" field of the previous page.
+    The total number of items is counted by default
+    only for the pages requested by offset.
     """
     methods = ("GET",)
     rule = "/actors/aggregated"
-    request_query_parameters_schema = PaginationSchema()
+    request_query_parameters_schema = ActorAggregatedPaginationSchema()
     response_schema = ActorAggregatedPaginatedSchema()
+    response_encoder = SchemaEncoder(response_schema)
+    # Pages are streamed from the database, so their size doesn't affect memory usage
+    response_streamed = True
+
+    def get_cache_validators(self, req: Request) -> CacheValidators:
+        # Every change of the data changes its version
+        return CacheValidators(etag=get_data_etag(services.actors_service.get_data_version()))
 
     def execute(self, req: Request):
-        params = req.query_parameters
         return services.actors_service.get_actors_aggregated(
-            offset=params["offset"],
-            limit=params["limit"],
+            **get_actors_aggregated_arguments(req.query_parameters),
+            stream=True,
         )
+
+
+@register_resource(actors_api)
+class GetCoStarsResource(BaseResource):
+    """
+    Getting the actors who played with the actor
+    ordered by the number of their common movies.
+    The in-memory actors graph is used, so the changes
+    are visible in GRAPH_CHECK_INTERVAL seconds.
+    """
+    methods = ("GET",)
+    rule = "/actors/<int:actor_id>/co-stars"
+    request_query_parameters_schema = CoStarsParametersSchema()
+    response_schema = CoStarSchema(many=True)
+
+    def execute(self, req: Request) -> typing.List[CoStar]:
+        actor_id = req.url_variables["actor_id"]
+        if not services.graph_service.has_actor(actor_id):
+            raise NotFoundError("Actor not found")
+
+        return services.graph_service.get_co_stars(actor_id=actor_id, limit=req.query_parameters["limit"])
+
+
+@register_resource(actors_api)
+class GetActorsPathResource(BaseResource):
+    """
+    Getting the shortest chain of actors playing together
+    which connects two actors (degrees of separation),
+    e.g. GET /actors/1/path/2.
+    """
+    methods = ("GET",)
+    rule = "/actors/<int:actor_id>/path/<int:other_actor_id>"
+    response_schema = ActorsPathSchema()
+
+    def execute(self, req: Request) -> ActorsPath:
+        path = services.graph_service.get_path(req.url_variables["actor_id"], req.url_variables["other_actor_id"])
+        if path is None:
+            raise NotFoundError("Path not found")
+
+        return path
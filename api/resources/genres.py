@@ -0,0 +1,57 @@
+import typing
+
+from flask import Blueprint
+
+from api.base_resource import BaseResource, Request, register_resource
+from api.errors import NotFoundError
+from api.schemas import GenreSchema, GenresResolutionSchema, NamesSchema
+from entities import Genre, GenresResolution
+import services
+
+genres_api = Blueprint("genres", __name__)
+
+
+@register_resource(genres_api)
+class GetGenresResource(BaseResource):
+    """
+    Getting all genres in the order of their names.
+    """
+    methods = ("GET",)
+    rule = "/genres"
+    response_schema = GenreSchema(many=True)
+
+    def execute(self, req: Request) -> typing.List[Genre]:
+        return services.genres_service.get_genres()
+
+
+@register_resource(genres_api)
+class GetGenreResource(BaseResource):
+    """
+    Getting a single genre by its id.
+    """
+    methods = ("GET",)
+    rule = "/genres/<int:genre_id>"
+    response_schema = GenreSchema()
+
+    def execute(self, req: Request) -> Genre:
+        genre = services.genres_service.get_genre(req.url_variables["genre_id"])
+        if not genre:
+            raise NotFoundError("Genre not found")
+
+        return genre
+
+
+@register_resource(genres_api)
+class ResolveGenresResource(BaseResource):
+    """
+    Getting the ids of the genres by their names at once,
+    e.g. POST /genres/resolve {"names": ["Drama", "Comedy"]}.
+    The names which are not found are listed in the response.
+    """
+    methods = ("POST",)
+    rule = "/genres/resolve"
+    request_json_schema = NamesSchema()
+    response_schema = GenresResolutionSchema()
+
+    def execute(self, req: Request) -> GenresResolution:
+        return services.genres_service.resolve_genres(req.json["names"])
@@ -1,13 +1,66 @@
+import hashlib
+import typing
+
 from flask import Blueprint
 
-from api.base_resource import BaseResource, Request, register_resource
-from api.errors import BadRequestError, NotFoundError
-from api.schemas import CreateMovieSchema, EditMovieSchema, MovieSchema
-from entities import Movie, ObjectDoesNotExistError
+from api.base_resource import BaseResource, CacheValidators, Request, get_data_etag, register_resource
+from api.encoders import NDJSONEncoder, SchemaEncoder, TypeDispatchEncoder
+from api.errors import BadRequestError, NotFoundError, ServiceUnavailableError
+from api.schemas import (
+    CreateMovieSchema,
+    EditMovieSchema,
+    MovieOperationResultsSchema,
+    MovieOperationsSchema,
+    MovieSchema,
+    MoviesBatchSchema,
+    MoviesPageSchema,
+    MoviesQuerySchema,
+)
+from entities import CacheUnavailableError, Movie, MoviesBatch, MoviesPage, MovieVersion, ObjectDoesNotExistError
 import services
 
 movies_api = Blueprint("movies", __name__)
 
+# The changed movies aren't removed from the cache, they are removed
+# by the check of the data version once the cache is available
+CACHE_UNAVAILABLE_MESSAGE = "The changes are saved, but the cache is not available"
+
+
+def get_movie_etag(version: MovieVersion) -> str:
+    return f"{version.id}.{version.version}.{version.updated_at:%Y%m%d%H%M%S%f}"
+
+
+def get_movies_batch_etag(movie_ids: typing.List[int], versions: typing.Dict[int, MovieVersion]) -> str:
+    """
+    ETag of a batch is made of ETags of the requested movies,
+    the missing ones included.
+    """
+    etags = [get_movie_etag(versions[movie_id]) if movie_id in versions else "" for movie_id in movie_ids]
+    return hashlib.sha1(",".join(etags).encode()).hexdigest()
+
+
+def get_movies_batch_ids(params: dict) -> typing.Optional[typing.List[int]]:
+    """
+    Ids of the movies requested by GET /movies without duplicates,
+    None if a page of the list is requested.
+    """
+    if params["ids"] is None:
+        return None
+
+    return list(dict.fromkeys(params["ids"]))
+
+
+def get_movies_page_arguments(params: dict) -> dict:
+    """
+    Arguments of MoviesService.get_movies_page for GET /movies parameters.
+    """
+    return {
+        "movies_filter": params["filter"],
+        "sort": params["sort"],
+        "limit": params["limit"],
+        "cursor": params["cursor"],
+    }
+
 
 @register_resource(movies_api)
 class GetMovieResource(BaseResource):
@@ -17,6 +70,15 @@ class GetMovieResource(BaseResource):
     methods = ("GET",)
     rule = "/movies/<int:movie_id>"
     response_schema = MovieSchema()
+    response_encoder = SchemaEncoder(response_schema)
+
+    def get_cache_validators(self, req: Request) -> typing.Optional[CacheValidators]:
+        movie_id = req.url_variables["movie_id"]
+        version = services.movies_service.get_movies_versions([movie_id]).get(movie_id)
+        if version is None:
+            return None
+
+        return CacheValidators(etag=get_movie_etag(version), last_modified=version.updated_at)
 
     def execute(self, req: Request) -> Movie:
         movie = services.movies_service.get_movie(req.url_variables["movie_id"])
@@ -26,6 +88,63 @@ class GetMovieResource(BaseResource):
         return movie
 
 
+@register_resource(movies_api)
+class GetMoviesResource(BaseResource):
+    """
+    Getting several movies by their ids at once,
+    e.g. GET /movies?ids=1,2,3.
+    Ids of the movies which are not found are listed in the response.
+
+    Without ids a page of the movies list is returned,
+    filtered by years, genres and actors and sorted by id, year or title,
+    see MoviesQuerySchema.
+    """
+    methods = ("GET",)
+    rule = "/movies"
+    request_query_parameters_schema = MoviesQuerySchema()
+    response_encoder = TypeDispatchEncoder({
+        MoviesBatch: SchemaEncoder(MoviesBatchSchema()),
+        MoviesPage: SchemaEncoder(MoviesPageSchema()),
+    })
+
+    def get_cache_validators(self, req: Request) -> CacheValidators:
+        """
+        Last-Modified is not used since deleting a movie
+        doesn't make the batch newer.
+        A page of the list may change on any change of the data.
+        """
+        movie_ids = get_movies_batch_ids(req.query_parameters)
+        if movie_ids is None:
+            return CacheValidators(etag=get_data_etag(services.movies_service.get_data_version()))
+
+        versions = services.movies_service.get_movies_versions(movie_ids)
+        return CacheValidators(etag=get_movies_batch_etag(movie_ids, versions))
+
+    def execute(self, req: Request) -> typing.Union[MoviesBatch, MoviesPage]:
+        params = req.query_parameters
+        if params["ids"] is not None:
+            return services.movies_service.get_movies(params["ids"])
+
+        return services.movies_service.get_movies_page(**get_movies_page_arguments(params))
+
+
+@register_resource(movies_api)
+class ExportMoviesResource(BaseResource):
+    """
+    Exporting all movies with their actors and genres as NDJSON,
+    one movie per line in the format accepted by manage.py reload.
+    The movies are read in batches while the response is sent.
+    """
+    methods = ("GET",)
+    rule = "/movies/export"
+    response_encoder = NDJSONEncoder()
+    response_streamed = True
+    response_mimetype = "application/x-ndjson"
+
+    def execute(self, req: Request) -> typing.Iterator[dict]:
+        return services.movies_service.export_movies()
+
+
 @register_resource(movies_api)
 class CreateMovieResource(BaseResource):
     """
@@ -35,6 +154,7 @@ class CreateMovieResource(BaseResource):
     rule = "/movies"
     request_json_schema = CreateMovieSchema()
     response_schema = MovieSchema()
+    response_encoder = SchemaEncoder(response_schema)
     response_status = 201
 
     def execute(self, req: Request) -> Movie:
@@ -54,6 +174,7 @@ class EditMovieResource(BaseResource):
     rule = "/movies/<int:movie_id>"
     request_json_schema = EditMovieSchema()
     response_schema = MovieSchema()
+    response_encoder = SchemaEncoder(response_schema)
 
     def execute(self, req: Request) -> Movie:
         movie: Movie = req.json
@@ -62,6 +183,8 @@ class EditMovieResource(BaseResource):
             return services.movies_service.edit_movie(movie)
         except ObjectDoesNotExistError as e:
             raise BadRequestError(str(e))
+        except CacheUnavailableError:
+            raise ServiceUnavailableError(CACHE_UNAVAILABLE_MESSAGE)
 
 
 @register_resource(movies_api)
@@ -74,4 +197,28 @@ class DeleteMovieResource(BaseResource):
     response_status = 204
 
     def execute(self, req: Request):
-        services.movies_service.delete_movie(req.url_variables["movie_id"])
+        try:
+            services.movies_service.delete_movie(req.url_variables["movie_id"])
+        except CacheUnavailableError:
+            raise ServiceUnavailableError(CACHE_UNAVAILABLE_MESSAGE)
+
+
+@register_resource(movies_api)
+class MoviesBatchResource(BaseResource):
+    """
+    Creating, updating and removing many movies
+    in a single transaction. The outcome of every operation
+    is returned in the same order as the operations.
+    """
+    methods = ("POST",)
+    rule = "/movies/batch"
+    request_json_schema = MovieOperationsSchema()
+    response_schema = MovieOperationResultsSchema()
+
+    def execute(self, req: Request) -> dict:
+        try:
+            results = services.movies_service.apply_operations(req.json["operations"])
+        except CacheUnavailableError:
+            raise ServiceUnavailableError(CACHE_UNAVAILABLE_MESSAGE)
+
+        return {"results": results}
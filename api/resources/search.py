@@ -0,0 +1,28 @@
+from flask import Blueprint
+
+from api.base_resource import BaseResource, Request, register_resource
+from api.schemas import SearchParametersSchema, SearchResultsSchema
+from entities import SearchResults
+import services
+
+search_api = Blueprint("search", __name__)
+
+
+@register_resource(search_api)
+class SearchResource(BaseResource):
+    """
+    Searching for movies by title and actors by name,
+    e.g. GET /search?q=star%20wa. Every word of the query
+    matches the words starting with it. Movies and actors
+    are paginated separately by the same offset and limit
+    and ordered by relevance among all matches, only the first
+    SEARCH_MAX_RESULTS of them can be requested.
+    """
+    methods = ("GET",)
+    rule = "/search"
+    request_query_parameters_schema = SearchParametersSchema()
+    response_schema = SearchResultsSchema()
+
+    def execute(self, req: Request) -> SearchResults:
+        params = req.query_parameters
+        return services.search_service.search(query=params["q"], offset=params["offset"], limit=params["limit"])
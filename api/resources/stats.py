@@ -0,0 +1,82 @@
+import typing
+
+from flask import Blueprint
+
+from api.base_resource import BaseResource, Request, error_to_response, register_resource
+from api.errors import NotFoundError, ServiceUnavailableError
+from api.schemas import (
+    ActorStatsSchema,
+    GenresYearsParametersSchema,
+    GenreYearCountSchema,
+    TopActorsParametersSchema,
+)
+from entities import ActorStats, GenreYearCount
+import services
+
+stats_api = Blueprint("stats", __name__)
+
+
+class BaseStatsResource(BaseResource):
+    """
+    Statistics counted by the in-memory analytics,
+    they are available only if NumPy is installed.
+    """
+    def dispatch_request(self, **kwargs):
+        if not services.analytics_service.is_available():
+            return error_to_response(ServiceUnavailableError("Statistics require NumPy to be installed"))
+
+        return super().dispatch_request(**kwargs)
+
+
+@register_resource(stats_api)
+class GetGenresYearsResource(BaseStatsResource):
+    """
+    Getting the numbers of movies of the genres by years,
+    e.g. GET /stats/genres/years?genre_ids=1,2&year_from=1990.
+    """
+    methods = ("GET",)
+    rule = "/stats/genres/years"
+    request_query_parameters_schema = GenresYearsParametersSchema()
+    response_schema = GenreYearCountSchema(many=True)
+
+    def execute(self, req: Request) -> typing.List[GenreYearCount]:
+        params = req.query_parameters
+        return services.analytics_service.get_genres_years(
+            genre_ids=params["genre_ids"],
+            year_from=params["year_from"],
+            year_to=params["year_to"],
+        )
+
+
+@register_resource(stats_api)
+class GetTopActorsResource(BaseStatsResource):
+    """
+    Getting the actors with the most movies (order=movies)
+    or the longest careers (order=span).
+    """
+    methods = ("GET",)
+    rule = "/stats/actors/top"
+    request_query_parameters_schema = TopActorsParametersSchema()
+    response_schema = ActorStatsSchema(many=True)
+
+    def execute(self, req: Request) -> typing.List[ActorStats]:
+        params = req.query_parameters
+        return services.analytics_service.get_top_actors(order=params["order"], limit=params["limit"])
+
+
+@register_resource(stats_api)
+class GetActorStatsResource(BaseStatsResource):
+    """
+    Getting the number of movies, the career span
+    and the number of co-stars of an actor.
+    """
+    methods = ("GET",)
+    rule = "/stats/actors/<int:actor_id>"
+    response_schema = ActorStatsSchema()
+
+    def execute(self, req: Request) -> ActorStats:
+        stats = services.analytics_service.get_actor_stats(req.url_variables["actor_id"])
+        if stats is None:
+            raise NotFoundError("Actor not found")
+
+        return stats
@@ -0,0 +1,38 @@
+import typing
+
+from flask import Blueprint
+
+from api.base_resource import BaseResource, Request, register_resource
+from api.schemas import CacheStatsSchema, PoolMetricsSchema
+from entities import CacheStats, PoolMetrics
+import services
+
+system_api = Blueprint("system", __name__)
+
+
+@register_resource(system_api)
+class GetPoolMetricsResource(BaseResource):
+    """
+    Getting the state of the database connection pool
+    of the process which serves the request.
+    """
+    methods = ("GET",)
+    rule = "/system/pool"
+    response_schema = PoolMetricsSchema()
+
+    def execute(self, req: Request) -> PoolMetrics:
+        return services.system_service.get_pool_metrics()
+
+
+@register_resource(system_api)
+class GetCacheStatsResource(BaseResource):
+    """
+    Getting the counters of the caches
+    of the process which serves the request.
+    """
+    methods = ("GET",)
+    rule = "/system/cache"
+    response_schema = CacheStatsSchema(many=True)
+
+    def execute(self, req: Request) -> typing.List[CacheStats]:
+        return services.system_service.get_cache_stats()
@@ -1,4 +1,31 @@
-from .actors import ActorSchema, ActorAggregatedPaginatedSchema
-from .common import BaseAPIErrorSchema, PaginationSchema, ValidationErrorSchema
-from .genres import GenreSchema
-from .movies import MovieSchema, CreateMovieSchema, EditMovieSchema
+from .actors import (
+    ActorSchema,
+    ActorAggregatedPaginatedSchema,
+    ActorAggregatedPaginationSchema,
+    ActorsPageParametersSchema,
+    ActorsPageSchema,
+    ActorsPathSchema,
+    ActorsResolutionSchema,
+    CoStarSchema,
+    CoStarsParametersSchema,
+)
+from .common import BaseAPIErrorSchema, Cursor, IntegerList, NamesSchema, PaginationSchema, ValidationErrorSchema
+from .genres import GenreSchema, GenresResolutionSchema
+from .movies import (
+    MovieSchema,
+    CreateMovieSchema,
+    EditMovieSchema,
+    MoviesBatchSchema,
+    MoviesPageSchema,
+    MoviesQuerySchema,
+    MovieOperationsSchema,
+    MovieOperationResultsSchema,
+)
+from .search import SearchMovieSchema, SearchParametersSchema, SearchResultsSchema
+from .stats import (
+    ActorStatsSchema,
+    GenresYearsParametersSchema,
+    GenreYearCountSchema,
+    TopActorsParametersSchema,
+)
+from .system import CacheStatsSchema, PoolMetricsSchema
@@ -1,4 +1,8 @@
-from marshmallow import Schema, fields
+from marshmallow import Schema, ValidationError, fields, validate, validates, validates_schema
+
+import settings
+
+from .common import Cursor, PaginationSchema
 
 
 class ActorSchema(Schema):
@@ -6,6 +10,50 @@ class ActorSchema(Schema):
     name = fields.String()
 
 
+class ActorsPageSchema(Schema):
+    actors = fields.Nested(ActorSchema, many=True)
+    next_cursor = Cursor()
+
+
+class ActorsPageParametersSchema(Schema):
+    """
+    Actors are paginated by the cursor returned in the previous page,
+    it contains (actor name, actor id) of the last actor.
+    """
+    limit = fields.Integer(load_default=100, allow_none=False, validate=validate.Range(min=1, max=1000))
+    cursor = Cursor(load_default=None)
+
+    @validates("cursor")
+    def validate_cursor(self, value, **kwargs):
+        if value is None:
+            return
+
+        # Actors may have no name
+        if len(value) != 2 \
+                or not (value[0] is None or isinstance(value[0], str)) \
+                or not isinstance(value[1], int) or isinstance(value[1], bool):
+            raise ValidationError("Invalid cursor")
+
+
+class ActorsResolutionSchema(Schema):
+    actors = fields.Nested(ActorSchema, many=True)
+    missing_names = fields.List(fields.String())
+
+
+class CoStarSchema(Schema):
+    actor_id = fields.Integer()
+    movies_number = fields.Integer()
+
+
+class CoStarsParametersSchema(Schema):
+    limit = fields.Integer(load_default=20, allow_none=False, validate=validate.Range(min=1, max=1000))
+
+
+class ActorsPathSchema(Schema):
+    actor_ids = fields.List(fields.Integer())
+    movie_ids = fields.List(fields.Integer())
+
+
 class ActorAggregatedSchema(Schema):
     name = fields.String()
     year = fields.Integer()
@@ -17,3 +65,35 @@ class ActorAggregatedPaginatedSchema(Schema):
     total = fields.Integer()
     limit = fields.Integer()
     offset = fields.Integer()
+    next_cursor = Cursor()
+
+
+class ActorAggregatedPaginationSchema(PaginationSchema):
+    """
+    Pagination of aggregated actors either by offset
+    or by the cursor returned in the previous page.
+    The cursor contains (actor name, actor id, year)
+    of the last item of the previous page.
+    """
+    limit = fields.Integer(
+        load_default=100,
+        allow_none=False,
+        validate=validate.Range(min=1, max=settings.ACTORS_AGGREGATED_MAX_LIMIT),
+    )
+    cursor = Cursor(load_default=None)
+
+    @validates("cursor")
+    def validate_cursor(self, value, **kwargs):
+        if value is None:
+            return
+
+        # Actors may have no name
+        if len(value) != 3 \
+                or not (value[0] is None or isinstance(value[0], str)) \
+                or not all(isinstance(item, int) and not isinstance(item, bool) for item in value[1:]):
+            raise ValidationError("Invalid cursor")
+
+    @validates_schema
+    def validate_pagination(self, data, **kwargs):
+        if data.get("cursor") is not None and data.get("offset"):
+            raise ValidationError("Only one of 'offset' and 'cursor' can be used", "cursor")
@@ -1,9 +1,77 @@
-from marshmallow import Schema, fields, validate
+import base64
+import binascii
+import json
+
+from marshmallow import Schema, ValidationError, fields, validate
+
+from entities import TOTAL_MODES
+import settings
+
+
+class Cursor(fields.Field):
+    """
+    Opaque cursor for keyset pagination.
+    A tuple of the last returned item key values
+    is transferred as URL-safe base64 encoded JSON array.
+    """
+    def _serialize(self, value, attr, obj, **kwargs):
+        if value is None:
+            return None
+
+        data = json.dumps(list(value), separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(data).decode()
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(value.encode()))
+        except (AttributeError, ValueError, binascii.Error):
+            raise ValidationError("Invalid cursor")
+
+        if not isinstance(values, list):
+            raise ValidationError("Invalid cursor")
+
+        return tuple(values)
+
+
+class IntegerList(fields.Field):
+    """
+    List of integers passed as a comma separated string,
+    e.g. "1,2,3" in a query parameter.
+    """
+    def _serialize(self, value, attr, obj, **kwargs):
+        if value is None:
+            return None
+
+        return ",".join(str(item) for item in value)
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        if not isinstance(value, str):
+            raise ValidationError("Comma separated list of integers is expected")
+
+        try:
+            return [int(item) for item in value.split(",") if item.strip()]
+        except ValueError:
+            raise ValidationError("Comma separated list of integers is expected")
+
+
+class NamesSchema(Schema):
+    """
+    Names of the objects resolved to their ids.
+    """
+    names = fields.List(
+        fields.String(allow_none=False),
+        required=True,
+        allow_none=False,
+        validate=validate.Length(min=1, max=settings.NAMES_RESOLVE_MAX_SIZE),
+    )
 
 
 class PaginationSchema(Schema):
     offset = fields.Integer(load_default=0, allow_none=False, validate=validate.Range(min=0))
     limit = fields.Integer(load_default=100, allow_none=False, validate=validate.Range(min=1, max=1000))
+    # The way of counting the total number of items, see entities.TOTAL_MODES.
+    # If it is not set the endpoint chooses the default one.
+    total = fields.String(load_default=None, validate=validate.OneOf(TOTAL_MODES))
 
 
 class BaseAPIErrorSchema(Schema):
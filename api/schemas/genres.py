@@ -4,3 +4,8 @@ from marshmallow import Schema, fields
 class GenreSchema(Schema):
     id = fields.Integer()
     name = fields.String()
+
+
+class GenresResolutionSchema(Schema):
+    genres = fields.Nested(GenreSchema, many=True)
+    missing_names = fields.List(fields.String())
@@ -1,7 +1,19 @@
-from marshmallow import Schema, fields, post_load
+from marshmallow import Schema, ValidationError, fields, post_load, validate, validates_schema
 
-from entities import Actor, Genre, Movie
+from entities import (
+    MOVIE_ACTIONS,
+    MOVIE_CREATE,
+    MOVIE_DELETE,
+    MOVIE_SORTS,
+    Actor,
+    Genre,
+    Movie,
+    MovieOperation,
+    MoviesFilter,
+)
+import settings
 from .actors import ActorSchema
+from .common import Cursor, IntegerList
 from .genres import GenreSchema
 
 
@@ -13,11 +25,77 @@ class MovieSchema(Schema):
     genres = fields.Nested(GenreSchema, many=True)
 
 
+class MoviesBatchSchema(Schema):
+    movies = fields.Nested(MovieSchema, many=True)
+    missing_ids = fields.List(fields.Integer())
+
+
+class MoviesPageSchema(Schema):
+    movies = fields.Nested(MovieSchema, many=True)
+    next_cursor = Cursor()
+
+
+class MoviesQuerySchema(Schema):
+    """
+    Either the movies requested by their ids (GET /movies?ids=1,2,3)
+    or the page of the movies list meeting the filter conditions,
+    e.g. GET /movies?year_from=1990&genre_ids=1,2&actor_ids=3&sort=-year.
+    The next page is requested with the cursor returned in the previous one,
+    it contains (sort value, movie id) of the last movie of the page.
+    """
+    ids = IntegerList(
+        load_default=None,
+        validate=validate.Length(min=1, max=settings.MOVIES_BATCH_MAX_SIZE),
+    )
+    year_from = fields.Integer(load_default=None)
+    year_to = fields.Integer(load_default=None)
+    # Movies having any of the genres
+    genre_ids = IntegerList(load_default=list, validate=validate.Length(max=100))
+    # Movies having all of the actors
+    actor_ids = IntegerList(load_default=list, validate=validate.Length(max=10))
+    sort = fields.String(load_default="id", allow_none=False, validate=validate.OneOf(MOVIE_SORTS))
+    limit = fields.Integer(
+        load_default=20,
+        allow_none=False,
+        validate=validate.Range(min=1, max=settings.MOVIES_PAGE_MAX_LIMIT),
+    )
+    cursor = Cursor(load_default=None)
+
+    @validates_schema(pass_original=True)
+    def validate_query(self, data, original_data, **kwargs):
+        if data.get("ids") is not None:
+            # All list parameters have defaults, so the passed ones are found in the original data
+            for name in original_data:
+                if name != "ids" and name in self.fields:
+                    raise ValidationError("Movies list parameters can't be used with 'ids'", name)
+            return
+
+        cursor = data.get("cursor")
+        if cursor is None:
+            return
+
+        sort_type = str if data.get("sort", "id").lstrip("-") == "title" else int
+        if len(cursor) != 2 \
+                or not all(isinstance(item, int) and not isinstance(item, bool) for item in cursor[1:]) \
+                or not (cursor[0] is None or type(cursor[0]) is sort_type):
+            raise ValidationError("Invalid cursor", "cursor")
+
+    @post_load
+    def create_filter(self, data, **kwargs) -> dict:
+        data["filter"] = MoviesFilter(
+            year_from=data.pop("year_from"),
+            year_to=data.pop("year_to"),
+            genre_ids=data.pop("genre_ids"),
+            actor_ids=data.pop("actor_ids"),
+        )
+        return data
+
+
 class CreateMovieSchema(Schema):
     title = fields.String(required=True, allow_none=False)
     year = fields.Integer(required=True, allow_none=False)
-    actor_ids = fields.List(fields.Integer, required=False, allow_none=False, default=[])
-    genre_ids = fields.List(fields.Integer, required=False, allow_none=False, default=[])
+    actor_ids = fields.List(fields.Integer, required=False, allow_none=False, load_default=list)
+    genre_ids = fields.List(fields.Integer, required=False, allow_none=False, load_default=list)
 
     @post_load
     def create_entity(self, data, **kwargs) -> Movie:
@@ -35,3 +113,52 @@ class CreateMovieSchema(Schema):
 
 class EditMovieSchema(CreateMovieSchema):
     pass
+
+
+class MovieOperationSchema(Schema):
+    """
+    A single operation of the movies batch:
+    {"action": "create", "movie": {...}},
+    {"action": "update", "id": 1, "movie": {...}}
+    or {"action": "delete", "id": 1}.
+    """
+    action = fields.String(required=True, allow_none=False, validate=validate.OneOf(MOVIE_ACTIONS))
+    id = fields.Integer(load_default=None)
+    movie = fields.Nested(CreateMovieSchema, load_default=None)
+
+    @validates_schema
+    def validate_operation(self, data, **kwargs):
+        action = data.get("action")
+        if action != MOVIE_CREATE and data.get("id") is None:
+            raise ValidationError(f"Movie id is required for '{action}' action", "id")
+
+        if action != MOVIE_DELETE and data.get("movie") is None:
+            raise ValidationError(f"Movie data is required for '{action}' action", "movie")
+
+    @post_load
+    def create_entity(self, data, **kwargs) -> MovieOperation:
+        return MovieOperation(
+            action=data["action"],
+            movie_id=data["id"],
+            movie=data["movie"] if data["action"] != MOVIE_DELETE else None,
+        )
+
+
+class MovieOperationsSchema(Schema):
+    operations = fields.List(
+        fields.Nested(MovieOperationSchema),
+        required=True,
+        allow_none=False,
+        validate=validate.Length(min=1, max=settings.MOVIES_BATCH_MAX_OPERATIONS),
+    )
+
+
+class MovieOperationResultSchema(Schema):
+    action = fields.String()
+    status = fields.String()
+    id = fields.Integer()
+    message = fields.String()
+
+
+class MovieOperationResultsSchema(Schema):
+    results = fields.Nested(MovieOperationResultSchema, many=True)
@@ -0,0 +1,29 @@
+from marshmallow import Schema, ValidationError, fields, validate, validates_schema
+
+import settings
+
+from .actors import ActorSchema
+
+
+class SearchParametersSchema(Schema):
+    q = fields.String(required=True, allow_none=False, validate=validate.Length(min=1, max=200))
+    offset = fields.Integer(load_default=0, allow_none=False, validate=validate.Range(min=0))
+    limit = fields.Integer(load_default=20, allow_none=False, validate=validate.Range(min=1, max=100))
+
+    @validates_schema
+    def validate_window(self, data, **kwargs):
+        if data.get("offset", 0) + data.get("limit", 0) > settings.SEARCH_MAX_RESULTS:
+            raise ValidationError(f"Only the first {settings.SEARCH_MAX_RESULTS} results can be requested", "offset")
+
+
+class SearchMovieSchema(Schema):
+    id = fields.Integer()
+    title = fields.String()
+    year = fields.Integer()
+
+
+class SearchResultsSchema(Schema):
+    movies = fields.Nested(SearchMovieSchema, many=True)
+    actors = fields.Nested(ActorSchema, many=True)
+    offset = fields.Integer()
+    limit = fields.Integer()
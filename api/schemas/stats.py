@@ -0,0 +1,30 @@
+from marshmallow import Schema, fields, validate
+
+from entities import ACTOR_STATS_ORDERS
+
+from .common import IntegerList
+
+
+class GenreYearCountSchema(Schema):
+    genre_id = fields.Integer()
+    year = fields.Integer()
+    number = fields.Integer()
+
+
+class GenresYearsParametersSchema(Schema):
+    genre_ids = IntegerList(load_default=list)
+    year_from = fields.Integer(load_default=None)
+    year_to = fields.Integer(load_default=None)
+
+
+class ActorStatsSchema(Schema):
+    actor_id = fields.Integer()
+    movies_number = fields.Integer()
+    first_year = fields.Integer()
+    last_year = fields.Integer()
+    co_stars_number = fields.Integer()
+
+
+class TopActorsParametersSchema(Schema):
+    order = fields.String(load_default=ACTOR_STATS_ORDERS[0], validate=validate.OneOf(ACTOR_STATS_ORDERS))
+    limit = fields.Integer(load_default=10, allow_none=False, validate=validate.Range(min=1, max=100))
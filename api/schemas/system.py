@@ -0,0 +1,21 @@
+from marshmallow import Schema, fields
+
+
+class PoolMetricsSchema(Schema):
+    status = fields.String()
+    size = fields.Integer()
+    checked_in = fields.Integer()
+    checked_out = fields.Integer()
+    overflow = fields.Integer()
+    connects = fields.Integer()
+    checkouts = fields.Integer()
+    invalidations = fields.Integer()
+
+
+class CacheStatsSchema(Schema):
+    name = fields.String()
+    size = fields.Integer()
+    max_size = fields.Integer()
+    hits = fields.Integer()
+    misses = fields.Integer()
+    evictions = fields.Integer()
@@ -0,0 +1,154 @@
+"""
+Pre-forking HTTP server running the WSGI application
+in several processes (manage.py run --prefork).
+
+The master process opens the listening socket and forks the workers
+accepting the connections from it. Every worker creates its own application
+after fork and serves one request at a time, so the requests are served
+in parallel by all CPU cores. A worker is replaced by a new one
+after serving the configured number of requests or if it dies.
+
+SIGTERM or SIGINT stops the server gracefully: the workers finish
+their current requests and are killed if they don't exit in time.
+The second signal kills them at once.
+"""
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+import typing
+
+from werkzeug.serving import make_server
+
+# Seconds between the checks of the stop flag by an idle worker
+_WORKER_POLL_INTERVAL = 1
+# Workers failing sooner are restarted with this delay to avoid a busy loop of crashes
+_MIN_WORKER_LIFETIME = 1
+_LISTEN_BACKLOG = 1024
+
+
+class PreforkServer:
+    def __init__(
+        self,
+        app_factory: typing.Callable[[], typing.Callable],
+        address: typing.Tuple[str, int],
+        workers: int,
+        max_requests: int = 0,
+        graceful_timeout: int = 30,
+    ):
+        self.app_factory = app_factory
+        self.address = address
+        self.workers = workers
+        # 0 means the workers are never replaced
+        self.max_requests = max_requests
+        self.graceful_timeout = graceful_timeout
+        # Start time of the workers by their pids
+        self._worker_pids: typing.Dict[int, float] = {}
+        self._stopping = False
+        self._socket: typing.Optional[socket.socket] = None
+
+    def serve_forever(self):
+        self._socket = socket.create_server(self.address, backlog=_LISTEN_BACKLOG)
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGALRM, self._kill_workers)
+        host, port = self._socket.getsockname()[:2]
+        print(f"Serving on http://{host}:{port} with {self.workers} workers", file=sys.stderr)
+
+        try:
+            for _ in range(self.workers):
+                self._start_worker()
+
+            while self._worker_pids:
+                try:
+                    pid, status = os.wait()
+                except ChildProcessError:
+                    break
+
+                start_time = self._worker_pids.pop(pid, None)
+                if start_time is None or self._stopping:
+                    continue
+
+                failed = os.waitstatus_to_exitcode(status) != 0
+                if failed and time.monotonic() - start_time < _MIN_WORKER_LIFETIME:
+                    time.sleep(_MIN_WORKER_LIFETIME)
+                self._start_worker()
+        finally:
+            signal.alarm(0)
+            self._socket.close()
+
+    def _stop(self, signum, frame):
+        if self._stopping:
+            self._kill_workers(signum, frame)
+            return
+
+        print("Stopping the workers", file=sys.stderr)
+        self._stopping = True
+        self._signal_workers(signal.SIGTERM)
+        signal.alarm(self.graceful_timeout)
+
+    def _kill_workers(self, signum, frame):
+        self._signal_workers(signal.SIGKILL)
+
+    def _signal_workers(self, signum: int):
+        for pid in list(self._worker_pids):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _start_worker(self):
+        pid = os.fork()
+        if pid:
+            self._worker_pids[pid] = time.monotonic()
+            return
+
+        exit_code = 0
+        try:
+            self._run_worker()
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # The worker must not return to the code of the master process
+            os._exit(exit_code)
+
+    def _run_worker(self):
+        master_pid = os.getppid()
+        stopping = False
+        requests_number = 0
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        # Ctrl+C is sent to the whole process group, the master stops the workers itself
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGALRM, signal.SIG_DFL)
+
+        app = self.app_factory()
+
+        def counting_app(environ, start_response):
+            nonlocal requests_number
+            requests_number += 1
+            return app(environ, start_response)
+
+        host, port = self.address
+        server = make_server(host, port, counting_app, fd=self._socket.fileno())
+        # All idle workers are woken by a new connection and only one of them gets it,
+        # so the others must not block in accept
+        server.socket.setblocking(False)
+        server.timeout = _WORKER_POLL_INTERVAL
+
+        try:
+            while not stopping and os.getppid() == master_pid:
+                if self.max_requests and requests_number >= self.max_requests:
+                    break
+                server.handle_request()
+        finally:
+            server.server_close()
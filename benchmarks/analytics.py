@@ -0,0 +1,84 @@
+"""
+Comparing the statistics of the in-memory analytics (services.analytics)
+with the same SQL GROUP BY queries on a generated database.
+
+    python -m benchmarks.analytics --movies 1000000
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy.orm import Session
+
+from benchmarks.common import create_database, measure
+from database.repositories import RelationsRepo
+from services.analytics import _Snapshot
+
+QUERIES = (
+    (
+        "genres by years",
+        "SELECT genre_movie.genre_id, movie.year, count(*) FROM genre_movie "
+        "JOIN movie ON movie.id = genre_movie.movie_id WHERE movie.year IS NOT NULL "
+        "GROUP BY genre_movie.genre_id, movie.year ORDER BY genre_movie.genre_id, movie.year",
+        lambda actor_id: (),
+        lambda snapshot, actor_id: snapshot.genre_year_counts,
+    ),
+    (
+        "actor stats",
+        "SELECT count(*), min(movie.year), max(movie.year), ("
+        "SELECT count(DISTINCT co_star.actor_id) - 1 FROM actor_movie AS actor "
+        "JOIN actor_movie AS co_star ON co_star.movie_id = actor.movie_id WHERE actor.actor_id = ?"
+        ") FROM actor_movie JOIN movie ON movie.id = actor_movie.movie_id WHERE actor_movie.actor_id = ?",
+        lambda actor_id: (actor_id, actor_id),
+        lambda snapshot, actor_id: snapshot.get_actor_stats(actor_id),
+    ),
+    (
+        "top 10 actors by movies",
+        "SELECT actor_id, count(*) AS number FROM actor_movie "
+        "GROUP BY actor_id ORDER BY number DESC, actor_id LIMIT 10",
+        lambda actor_id: (),
+        lambda snapshot, actor_id: snapshot.get_top_actor_ids("movies", 10),
+    ),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--movies", type=int, default=1000000, help="Number of generated movies")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of runs of every query")
+    args = parser.parse_args()
+
+    engine = create_database(args.movies)
+    rand = random.Random(2)
+
+    with Session(bind=engine) as session:
+        start = time.perf_counter()
+        relations = RelationsRepo().read_relations(version=1, movie_ids=None, session=session)
+        print(f"loading relations {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+    start = time.perf_counter()
+    snapshot = _Snapshot(relations)
+    for _, _, _, call in QUERIES:
+        call(snapshot, 1)
+    print(f"first aggregation {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+    with Session(bind=engine) as session:
+        movie_ids = [rand.randint(1, args.movies) for _ in range(100)]
+        start = time.perf_counter()
+        changed = RelationsRepo().read_relations(version=2, movie_ids=movie_ids, session=session)
+        snapshot.update(changed_movie_ids=movie_ids, relations=changed)
+        print(f"updating 100 movies {(time.perf_counter() - start) * 1000:7.1f} ms")
+
+    print(f"{'query':24} {'SQL':>12} {'memory':>12}")
+    with engine.connect() as connection:
+        for name, sql, get_parameters, call in QUERIES:
+            sql_time = measure(
+                lambda: connection.exec_driver_sql(sql, get_parameters(rand.randint(1, args.movies // 2))).fetchall(),
+                args.repeat,
+            )
+            memory_time = measure(lambda: call(snapshot, rand.randint(1, args.movies // 2)), args.repeat)
+            print(f"{name:24} {sql_time:9.3f} ms {memory_time:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import os
+import random
+import statistics
+import tempfile
+import time
+import typing
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from database.loader import MoviesLoader
+from database.repositories import ActorsRepo
+from database import models
+
+GENRES = ("Drama", "Comedy", "Action", "Horror", "Western", "Sci-Fi", "Documentary", "Noir")
+
+
+def generate_movies(movies_number: int, seed: int = 1) -> typing.Iterator[dict]:
+    """
+    Generating raw movies (see database.dumps) with random casts.
+    There are about half as many actors as movies
+    and every movie has up to 8 actors and up to 3 genres.
+    """
+    rand = random.Random(seed)
+    actors_number = max(movies_number // 2, 10)
+    for number in range(movies_number):
+        yield {
+            "title": f"Movie {number}",
+            "year": rand.randint(1900, 2020),
+            "cast": [f"Actor {rand.randrange(actors_number)}" for _ in range(rand.randint(0, 8))],
+            "genres": rand.sample(GENRES, rand.randint(0, 3)),
+        }
+
+
+def create_database(movies_number: int, with_indexes: bool = True) -> Engine:
+    """
+    Creating a temporary SQLite database filled with generated movies.
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix="filmography-benchmark-"), "db")
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        for table in models.Base.metadata.sorted_tables:
+            connection.execute(CreateTable(table))
+
+        MoviesLoader(connection=connection).load(generate_movies(movies_number))
+        ActorsRepo().rebuild_actors_aggregated(connection)
+
+        if with_indexes:
+            create_indexes(connection)
+
+    return engine
+
+
+def create_indexes(connection: Connection):
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            connection.execute(CreateIndex(index))
+
+    connection.exec_driver_sql("ANALYZE")
+
+
+def drop_indexes(connection: Connection):
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+
+    connection.exec_driver_sql("ANALYZE")
+
+
+def measure(function: typing.Callable[[], typing.Any], repeat: int) -> float:
+    """
+    Return the median time of the function call in milliseconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(times)
+
+
+def get_query_plan(connection: Connection, sql: str, parameters: tuple) -> str:
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+    return "; ".join(row[-1] for row in rows)
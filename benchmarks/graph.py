@@ -0,0 +1,65 @@
+"""
+Measuring building of the in-memory actors graph (services.graph)
+and the co-stars and shortest path queries on a generated database.
+
+    python -m benchmarks.graph --movies 1000000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy.orm import Session
+
+from benchmarks.common import create_database, measure
+from database.repositories import RelationsRepo
+from services.graph import GraphService, _Graph, _SNAPSHOT_NAME
+from services.snapshots import SnapshotKeeper
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--movies", type=int, default=1000000, help="Number of generated movies")
+    parser.add_argument("--repeat", type=int, default=100, help="Number of queries of random actors")
+    args = parser.parse_args()
+
+    engine = create_database(args.movies)
+    with Session(bind=engine) as session:
+        start = time.perf_counter()
+        relations = RelationsRepo().read_relations(version=1, movie_ids=None, session=session)
+        print(f"loading relations {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+    start = time.perf_counter()
+    graph = _Graph.from_relations(relations)
+    print(f"building graph    {(time.perf_counter() - start) * 1000:9.1f} ms")
+    size = sum(values.itemsize * len(values) for values in (
+        graph.movie_offsets, graph.movie_actor_ids, graph.actor_offsets, graph.actor_movie_ids,
+    ))
+    print(f"graph size        {size / 2 ** 20:9.1f} MB")
+
+    service = GraphService(snapshots=SnapshotKeeper())
+    service.snapshots._snapshots = {_SNAPSHOT_NAME: graph}
+    service.check_interval = float("inf")
+
+    rand = random.Random(2)
+    actors_number = len(graph.actor_offsets) - 1
+    co_stars_time = measure(lambda: service.get_co_stars(rand.randrange(1, actors_number), limit=20), args.repeat)
+    print(f"co-stars          {co_stars_time:9.3f} ms")
+
+    times = []
+    lengths = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        path = service.get_path(rand.randrange(1, actors_number), rand.randrange(1, actors_number))
+        times.append((time.perf_counter() - start) * 1000)
+        if path is not None:
+            lengths.append(len(path.movie_ids))
+
+    print(
+        f"shortest path     {statistics.median(times):9.3f} ms median, {max(times):.3f} ms max, "
+        f"{statistics.mean(lengths) if lengths else 0:.1f} movies on average, {args.repeat - len(lengths)} not found"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Comparing query plans and latency of the repository queries
+with and without the indexes of join tables, actor names and movie years.
+
+    python -m benchmarks.indexes --movies 200000
+"""
+import argparse
+import random
+
+from benchmarks.common import create_database, drop_indexes, create_indexes, get_query_plan, measure
+
+# The queries made by the repositories, "?" are replaced by random ids
+QUERIES = (
+    (
+        "movie with relations",
+        "SELECT ?, movie.id, movie.id, movie.title, movie.year, movie.id FROM movie WHERE movie.id IN (?) "
+        "UNION ALL SELECT ?, actor_movie.movie_id, actor.id, actor.name, NULL, actor_movie.id "
+        "FROM actor_movie JOIN actor ON actor.id = actor_movie.actor_id WHERE actor_movie.movie_id IN (?) "
+        "UNION ALL SELECT ?, genre_movie.movie_id, genre.id, genre.name, NULL, genre_movie.id "
+        "FROM genre_movie JOIN genre ON genre.id = genre_movie.genre_id WHERE genre_movie.movie_id IN (?)",
+        lambda movie_id, actor_id: (0, movie_id, 1, movie_id, 2, movie_id),
+    ),
+    (
+        "actor ids of a movie",
+        "SELECT actor_movie.actor_id FROM actor_movie WHERE actor_movie.movie_id = ?",
+        lambda movie_id, actor_id: (movie_id,),
+    ),
+    (
+        "movies of an actor",
+        "SELECT actor_movie.movie_id FROM actor_movie WHERE actor_movie.actor_id = ?",
+        lambda movie_id, actor_id: (actor_id,),
+    ),
+    (
+        "aggregated actors page",
+        "SELECT actor.id, actor.name, actor_year.year, actor_year.number "
+        "FROM actor JOIN actor_year ON actor.id = actor_year.actor_id "
+        "ORDER BY actor.name, actor.id, actor_year.year LIMIT 101 OFFSET 0",
+        lambda movie_id, actor_id: (),
+    ),
+    (
+        "movies of a year",
+        "SELECT count(*) FROM movie WHERE movie.year = 2000",
+        lambda movie_id, actor_id: (),
+    ),
+)
+
+
+def run(connection, movies_number: int, repeat: int) -> dict:
+    rand = random.Random(2)
+    results = {}
+    for name, sql, get_parameters in QUERIES:
+        plan = get_query_plan(connection, sql, get_parameters(1, 1))
+
+        def call():
+            parameters = get_parameters(rand.randint(1, movies_number), rand.randint(1, movies_number // 2))
+            connection.exec_driver_sql(sql, parameters).fetchall()
+
+        results[name] = (measure(call, repeat), plan)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--movies", type=int, default=100000, help="Number of generated movies")
+    parser.add_argument("--repeat", type=int, default=50, help="Number of runs of every query")
+    args = parser.parse_args()
+
+    engine = create_database(args.movies, with_indexes=False)
+    with engine.connect() as connection:
+        drop_indexes(connection)
+        before = run(connection, args.movies, args.repeat)
+        create_indexes(connection)
+        after = run(connection, args.movies, args.repeat)
+
+    for name, _, _ in QUERIES:
+        print(name)
+        print(f"  without indexes: {before[name][0]:9.3f} ms  {before[name][1]}")
+        print(f"  with indexes:    {after[name][0]:9.3f} ms  {after[name][1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Comparing the queries of the filtered movies list (GET /movies)
+made with semi-joins (MoviesRepo.get_movies_page) and with joins
+of the relation tables and DISTINCT for the combinations of filters and orders.
+
+    python -m benchmarks.movie_filters --movies 1000000
+"""
+import argparse
+import typing
+
+from benchmarks.common import create_database, get_query_plan, measure
+
+LIMIT = 21
+
+
+class Case(typing.NamedTuple):
+    name: str
+    year_from: typing.Optional[int] = None
+    year_to: typing.Optional[int] = None
+    genre_ids: typing.Tuple[int, ...] = ()
+    actors_number: int = 0
+    sort: str = "id"
+    # The cursor is taken from the first page to measure the next one
+    next_page: bool = False
+
+
+CASES = (
+    Case("no filter", sort="id"),
+    Case("no filter", sort="-year"),
+    Case("no filter", sort="title"),
+    Case("years", year_from=1990, year_to=1995, sort="year"),
+    Case("years", year_from=1990, year_to=1995, sort="-title"),
+    Case("genre", genre_ids=(1,), sort="-year"),
+    Case("genre, next page", genre_ids=(1,), sort="-year", next_page=True),
+    Case("two genres", genre_ids=(1, 2), sort="title"),
+    Case("years and genre", year_from=2000, year_to=2000, genre_ids=(3,), sort="id"),
+    Case("genre and old years", year_from=1950, year_to=1960, genre_ids=(8,), sort="-title"),
+    Case("actor", actors_number=1, sort="year"),
+    Case("two actors", actors_number=2, sort="title"),
+    Case("actor and genre", genre_ids=(1, 2, 3), actors_number=1, sort="-id"),
+)
+
+_COLUMNS = {"id": "movie.id", "year": "movie.year", "title": "movie.title"}
+
+
+def make_sql(case: Case, actor_ids: typing.List[int], cursor: typing.Optional[tuple], joins: bool) -> tuple:
+    """
+    Making the query of the page and its parameters.
+    If joins is True the relations are joined and repeated movies are removed by DISTINCT,
+    otherwise they are checked as MoviesRepo does.
+    """
+    column = _COLUMNS[case.sort.lstrip("-")]
+    descending = case.sort.startswith("-")
+    tables = ["movie"]
+    conditions = []
+    parameters = []
+
+    if case.year_from is not None:
+        conditions.append("movie.year >= ?")
+        parameters.append(case.year_from)
+    if case.year_to is not None:
+        conditions.append("movie.year <= ?")
+        parameters.append(case.year_to)
+
+    genre_marks = ", ".join("?" for _ in case.genre_ids)
+    if case.genre_ids and joins:
+        tables.append("JOIN genre_movie ON genre_movie.movie_id = movie.id")
+        conditions.append(f"genre_movie.genre_id IN ({genre_marks})")
+    elif case.genre_ids:
+        conditions.append(
+            "EXISTS (SELECT * FROM genre_movie WHERE genre_movie.movie_id = movie.id "
+            f"AND genre_movie.genre_id IN ({genre_marks}))"
+        )
+    parameters.extend(case.genre_ids)
+
+    for number, actor_id in enumerate(actor_ids):
+        if joins:
+            tables.append(f"JOIN actor_movie AS am{number} ON am{number}.movie_id = movie.id")
+            conditions.append(f"am{number}.actor_id = ?")
+        else:
+            conditions.append(
+                "movie.id IN (SELECT actor_movie.movie_id FROM actor_movie WHERE actor_movie.actor_id = ?)"
+            )
+        parameters.append(actor_id)
+
+    # The generated movies have all years and titles, NULL values are not handled
+    if cursor is not None and column == "movie.id":
+        conditions.append(f"movie.id {'<' if descending else '>'} ?")
+        parameters.append(cursor[1])
+    elif cursor is not None:
+        conditions.append(f"({column}, movie.id) {'<' if descending else '>'} (?, ?)")
+        parameters.extend(cursor)
+
+    order = f"{column} DESC, movie.id DESC" if descending else f"{column}, movie.id"
+    sql = (
+        f"SELECT {'DISTINCT ' if joins else ''}{column}, movie.id FROM {' '.join(tables)}"
+        f"{' WHERE ' + ' AND '.join(conditions) if conditions else ''} ORDER BY {order} LIMIT {LIMIT}"
+    )
+    return sql, tuple(parameters)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--movies", type=int, default=1000000, help="Number of generated movies")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of runs of every query")
+    parser.add_argument("--plans", action="store_true", help="Print query plans")
+    args = parser.parse_args()
+
+    engine = create_database(args.movies)
+    with engine.connect() as connection:
+        # Actors playing together in a movie with the most actors, so the two actors filter matches
+        movie_id = connection.exec_driver_sql(
+            "SELECT movie_id FROM actor_movie GROUP BY movie_id ORDER BY count(*) DESC LIMIT 1"
+        ).scalar()
+        actor_ids = [
+            row[0] for row in connection.exec_driver_sql(
+                "SELECT actor_id FROM actor_movie WHERE movie_id = ? ORDER BY actor_id", (movie_id,)
+            )
+        ]
+
+        print(f"{'filter':22} {'sort':6} {'semi-joins':>12} {'joins':>12} {'rows':>5}")
+        for case in CASES:
+            case_actor_ids = actor_ids[:case.actors_number]
+            cursor = None
+            if case.next_page:
+                sql, parameters = make_sql(case, case_actor_ids, None, joins=False)
+                cursor = tuple(connection.exec_driver_sql(sql, parameters).fetchall()[-1])
+
+            times = []
+            for joins in (False, True):
+                sql, parameters = make_sql(case, case_actor_ids, cursor, joins=joins)
+                rows = connection.exec_driver_sql(sql, parameters).fetchall()
+                times.append(measure(lambda: connection.exec_driver_sql(sql, parameters).fetchall(), args.repeat))
+                if args.plans:
+                    print(f"    {'joins' if joins else 'semi-joins'}: {get_query_plan(connection, sql, parameters)}")
+
+            print(f"{case.name:22} {case.sort:6} {times[0]:9.3f} ms {times[1]:9.3f} ms {len(rows):5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Measuring the full-text search queries of SearchRepo
+on a generated database with titles and names made of random words.
+
+    python -m benchmarks.search --movies 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import typing
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+
+from benchmarks.common import create_indexes, generate_movies, measure
+from database.loader import MoviesLoader
+from database.repositories import SearchRepo
+from database import models
+import settings
+
+SYLLABLES = ("ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "dre", "gal", "mon", "pri", "stor", "tek", "zan", "wel")
+
+# Number of the matching movies, every word is a prefix as in SearchRepo
+COUNT_SQL = "SELECT count(*) FROM movie_fts WHERE movie_fts.title MATCH ?"
+LIMIT = 20
+
+
+def make_words(number: int, seed: int) -> typing.List[str]:
+    rand = random.Random(seed)
+    return ["".join(rand.choice(SYLLABLES) for _ in range(rand.randint(2, 4))).capitalize() for _ in range(number)]
+
+
+def generate_titled_movies(movies_number: int) -> typing.Iterator[dict]:
+    """
+    Generated movies with titles of 1-4 random words
+    and actors named by two words.
+    """
+    rand = random.Random(3)
+    words = make_words(20000, seed=4)
+    actor_names = {}
+    for movie in generate_movies(movies_number):
+        movie["title"] = " ".join(rand.choice(words) for _ in range(rand.randint(1, 4)))
+        movie["cast"] = [
+            actor_names.setdefault(name, f"{rand.choice(words)} {rand.choice(words)}") for name in movie["cast"]
+        ]
+        yield movie
+
+
+def create_search_database(movies_number: int) -> Engine:
+    path = os.path.join(tempfile.mkdtemp(prefix="filmography-benchmark-"), "db")
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        for table in models.Base.metadata.sorted_tables:
+            connection.execute(CreateTable(table))
+        for statement in models.SEARCH_TABLES_DDL:
+            connection.exec_driver_sql(statement)
+
+        MoviesLoader(connection=connection).load(generate_titled_movies(movies_number))
+        create_indexes(connection)
+        SearchRepo().rebuild_index(connection)
+
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--movies", type=int, default=1000000, help="Number of generated movies")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of runs of every query")
+    args = parser.parse_args()
+
+    engine = create_search_database(args.movies)
+    word = next(word for word in make_words(100, seed=4) if len(word) >= 7).lower()
+    queries = (
+        ("2 characters prefix", word[:2]),
+        ("3 characters prefix", word[:3]),
+        ("5 characters prefix", word[:5]),
+        ("whole word", word),
+        ("two words", f"{word} {word[:3]}"),
+    )
+    search_repo = SearchRepo()
+
+    # The queries of movies and actors are measured together
+    # for the first page and the last one of the ranked matches
+    print(f"{'query':20} {'words':16} {'matches':>9} {'first page':>12} {'last page':>12}")
+    with Session(bind=engine) as session:
+        for name, query in queries:
+            match_query = " ".join(f'"{query_word}"*' for query_word in query.split())
+            matches = session.connection().exec_driver_sql(COUNT_SQL, (match_query,)).scalar()
+            times = [
+                measure(lambda: search_repo.read_search_results(query, offset, LIMIT, session=session), args.repeat)
+                for offset in (0, settings.SEARCH_MAX_RESULTS - LIMIT)
+            ]
+            print(f"{name:20} {query:16} {matches:9} {times[0]:9.3f} ms {times[1]:9.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Comparing marshmallow Schema.dumps with api.encoders.SchemaEncoder
+on the largest responses of the API. Outputs are checked to be identical.
+
+    python -m benchmarks.serialization
+"""
+import argparse
+import datetime
+
+from api.encoders import SchemaEncoder
+from api.schemas import ActorAggregatedPaginatedSchema, MovieSchema, MoviesBatchSchema
+from benchmarks.common import measure
+from entities import Actor, ActorAggregated, ActorsAggregatedPaginated, Genre, Movie, MoviesBatch
+
+
+def make_movie(movie_id: int, cast_size: int) -> Movie:
+    return Movie(
+        id=movie_id,
+        title=f"Movie {movie_id}",
+        year=1900 + movie_id % 120,
+        actors=[Actor(id=actor_id, name=f"Actor {actor_id}") for actor_id in range(1, cast_size + 1)],
+        genres=[Genre(id=1, name="Drama"), Genre(id=2, name="Comedy")],
+        version=1,
+        updated_at=datetime.datetime(2020, 1, 1),
+    )
+
+
+CASES = (
+    (
+        "aggregated actors page of 1000 items",
+        ActorAggregatedPaginatedSchema(),
+        ActorsAggregatedPaginated(
+            actors=[
+                ActorAggregated(name=f"Actor {number // 3}", year=1950 + number % 3, number=number % 7 + 1)
+                for number in range(1000)
+            ],
+            total=100000,
+            limit=1000,
+            offset=None,
+            next_cursor=("Actor 333", 334, 1950),
+        ),
+    ),
+    (
+        "movie with 1000 actors",
+        MovieSchema(),
+        make_movie(1, cast_size=1000),
+    ),
+    (
+        "batch of 100 movies with 10 actors",
+        MoviesBatchSchema(),
+        MoviesBatch(movies=[make_movie(movie_id, cast_size=10) for movie_id in range(100)], missing_ids=[100, 101]),
+    ),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="Number of runs of every serialization")
+    args = parser.parse_args()
+
+    for name, schema, obj in CASES:
+        encoder = SchemaEncoder(schema)
+        if encoder.encode(obj) != schema.dumps(obj):
+            raise AssertionError(f"Outputs differ for {name}")
+
+        marshmallow_time = measure(lambda: schema.dumps(obj), args.repeat)
+        encoder_time = measure(lambda: encoder.encode(obj), args.repeat)
+        print(name)
+        print(f"  marshmallow: {marshmallow_time:9.3f} ms")
+        print(f"  encoder:     {encoder_time:9.3f} ms  ({marshmallow_time / encoder_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
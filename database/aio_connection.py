@@ -0,0 +1,88 @@
+"""
+Asynchronous connections to the database used by the ASGI application.
+SQLite databases are used by aiosqlite driver.
+"""
+import contextlib
+import os
+import typing
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from database.connection import listen_pool_events
+import settings
+
+_async_engine = None
+
+
+def get_async_engine() -> AsyncEngine:
+    # The engine is used by the single thread of the event loop so no lock is needed
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = _create_async_engine(settings.DATABASE_ASYNC_URL or settings.DATABASE_URL)
+
+    return _async_engine
+
+
+def _reset_async_engine():
+    # The connections of the parent process are not used after fork (see database.connection)
+    global _async_engine
+    _async_engine = None
+
+
+os.register_at_fork(after_in_child=_reset_async_engine)
+
+
+def _create_async_engine(url: str) -> AsyncEngine:
+    """
+    Creating an engine with the asynchronous driver
+    and the pool configured as the one of the synchronous engine.
+    """
+    url = make_url(url)
+    options = {}
+
+    if url.get_backend_name() == "sqlite":
+        if url.get_driver_name() == "pysqlite":
+            url = url.set(drivername="sqlite+aiosqlite")
+
+        options["connect_args"] = {"timeout": settings.DATABASE_TIMEOUT}
+        if url.database in (None, "", ":memory:"):
+            return create_async_engine(url, **options)
+
+        options["poolclass"] = AsyncAdaptedQueuePool
+
+    engine = create_async_engine(
+        url,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_POOL_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        **options,
+    )
+    # The pool is counted in the metrics and checked for the replaced SQLite file
+    listen_pool_events(engine.sync_engine)
+    return engine
+
+
+@contextlib.asynccontextmanager
+async def get_async_session() -> typing.AsyncIterator[AsyncSession]:
+    """
+    Getting a new asynchronous session closed on exit.
+    Synchronous repository code is run in it by AsyncSession.run_sync.
+    """
+    session = AsyncSession(get_async_engine(), autoflush=False, expire_on_commit=False)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def dispose_async_engine():
+    """
+    Closing the connections of the engine, e.g. on shutdown of the application.
+    """
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
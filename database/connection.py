@@ -1,19 +1,279 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import create_session
+import contextlib
+import contextvars
+import itertools
+import os
+import threading
+import typing
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+import entities
+import settings
 
 _engine = None
-_url = "sqlite:///db"
+_replica_engines = None
+_replica_counter = itertools.count()
+_engine_lock = threading.Lock()
+_session_factory = None
+
+# Sessions shared by all repositories inside session_scope
+_session_scope: contextvars.ContextVar = contextvars.ContextVar("session_scope", default=None)
+
+# Counters of the pool events
+_pool_counters = {
+    "connects": 0,
+    "checkouts": 0,
+    "invalidations": 0,
+}
 
 
-def get_engine():
+def get_engine() -> Engine:
     global _engine
     if _engine is None:
-        _engine = create_engine(url=_url)
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine(settings.DATABASE_URL)
 
     return _engine
 
 
-def get_session():
-    engine = get_engine()
+def get_replica_engines() -> typing.List[Engine]:
+    global _replica_engines
+    if _replica_engines is None:
+        with _engine_lock:
+            if _replica_engines is None:
+                _replica_engines = [_create_engine(url) for url in settings.DATABASE_REPLICA_URLS]
+
+    return _replica_engines
+
+
+def _select_replica_engine() -> Engine:
+    """
+    Choosing a replica for read-only queries.
+    If no replicas are configured the primary database is used.
+    """
+    engines = get_replica_engines()
+    if not engines:
+        return get_engine()
+
+    if settings.DATABASE_REPLICA_SELECTION == "least_busy":
+        return min(engines, key=lambda engine: engine.pool.checkedout() if isinstance(engine.pool, QueuePool) else 0)
+
+    return engines[next(_replica_counter) % len(engines)]
+
+
+def _create_engine(url: str) -> Engine:
+    """
+    Creating an engine with a pool of connections configured by the settings.
+    SQLite connections are allowed to be used by different threads
+    as the pool passes them between the threads of the server.
+    """
+    url = make_url(url)
+    options = {}
+
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False, "timeout": settings.DATABASE_TIMEOUT}
+        if url.database in (None, "", ":memory:"):
+            # In-memory database exists only in its single connection
+            engine = create_engine(url, **options)
+            _begin_immediately(engine)
+            return engine
+
+        options["poolclass"] = QueuePool
+
+    engine = create_engine(
+        url,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_POOL_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        **options,
+    )
+    if url.get_backend_name() == "sqlite":
+        _begin_immediately(engine)
+    listen_pool_events(engine)
+    return engine
+
+
+def _begin_immediately(engine: Engine):
+    """
+    pysqlite starts a transaction only before the first change,
+    so the queries made in the transaction before it hold no lock
+    and their results may be changed by others before the changes are saved.
+    The transactions are started by the engine instead and take the write lock at once
+    (only the changing methods begin transactions), e.g. the actors checked
+    for existence by MoviesRepo can't be removed until the movies are saved.
+    """
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def on_begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _reset_engines():
+    """
+    Forked processes (e.g. workers of the server) must not use
+    the connections opened by the parent process, so they create their own engines.
+    The connections of the parent are left open for it.
+    """
+    global _engine, _replica_engines, _engine_lock
+    for engine in [_engine, *(_replica_engines or [])]:
+        if engine is not None:
+            engine.dispose(close=False)
+
+    _engine = None
+    _replica_engines = None
+    _engine_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_engines)
+
+
+def listen_pool_events(engine: Engine):
+    """
+    Counting the connections of the engine for the metrics
+    and checking them for the replaced SQLite file,
+    the asynchronous engines are listened by their sync_engine.
+    """
+    path = None
+    if engine.url.get_backend_name() == "sqlite":
+        path = os.path.abspath(engine.url.database)
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        _pool_counters["connects"] += 1
+        if path:
+            connection_record.info["file_id"] = _get_file_id(path)
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _pool_counters["checkouts"] += 1
+        # SQLite database file may be replaced (see manage.py reload --fast),
+        # the connections opened to the old file must not be used any more
+        if path and connection_record.info.get("file_id") != _get_file_id(path):
+            raise DisconnectionError("Database file has been replaced")
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        _pool_counters["invalidations"] += 1
+
+
+def _get_file_id(path: str) -> typing.Optional[typing.Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    return stat.st_dev, stat.st_ino
+
+
+def get_pool_metrics() -> entities.PoolMetrics:
+    pool = get_engine().pool
+    return entities.PoolMetrics(
+        status=pool.status(),
+        size=pool.size() if isinstance(pool, QueuePool) else None,
+        checked_in=pool.checkedin() if isinstance(pool, QueuePool) else None,
+        checked_out=pool.checkedout() if isinstance(pool, QueuePool) else None,
+        overflow=pool.overflow() if isinstance(pool, QueuePool) else None,
+        **_pool_counters,
+    )
+
+
+def _create_session(engine: Engine = None) -> Session:
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(
+            autocommit=True,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+
+    return _session_factory(bind=engine or get_engine())
+
+
+class _SessionScope:
+    """
+    Sessions shared by the repositories inside session_scope.
+    Read-only queries go to a replica chosen once for the scope
+    until any other session is requested. After that all queries
+    of the scope go to the primary database,
+    so the data written in the scope is read back from it.
+    """
+    def __init__(self):
+        self.primary: typing.Optional[Session] = None
+        self.replica: typing.Optional[Session] = None
+
+    def get_session(self, read_only: bool) -> Session:
+        if read_only and self.primary is None:
+            if self.replica is None:
+                self.replica = _create_session(_select_replica_engine())
+            return self.replica
+
+        if self.primary is None:
+            self.primary = _create_session()
+        return self.primary
+
+    def close(self):
+        for session in (self.primary, self.replica):
+            if session is not None:
+                session.close()
+
+
+@contextlib.contextmanager
+def get_session(read_only: bool = False, scoped: bool = True) -> typing.Iterator[Session]:
+    """
+    Getting a session for the repository method.
+    Read-only methods get sessions bound to replicas if they are configured.
+
+    Inside session_scope the sessions of the scope are returned
+    so all repositories share them, otherwise (or if scoped is False)
+    a new session is created and closed on exit.
+    """
+    scope = _session_scope.get() if scoped else None
+    if scope is None:
+        session = _create_session(_select_replica_engine() if read_only else None)
+        try:
+            yield session
+        finally:
+            session.close()
+        return
+
+    session = scope.get_session(read_only)
+    try:
+        yield session
+    except BaseException:
+        # The shared session must be usable by the next repository calls
+        if session.in_transaction():
+            session.rollback()
+        raise
+
+
+def open_session_scope():
+    """
+    Starting the scope (e.g. of an API request)
+    where all repositories use the same sessions.
+    """
+    _session_scope.set(_SessionScope())
+
+
+def close_session_scope():
+    scope = _session_scope.get()
+    if scope is not None:
+        _session_scope.set(None)
+        scope.close()
+
 
-    return create_session(bind=engine, autoflush=False)
+@contextlib.contextmanager
+def session_scope():
+    open_session_scope()
+    try:
+        yield
+    finally:
+        close_session_scope()
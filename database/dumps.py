@@ -0,0 +1,151 @@
+"""
+Reading and writing files with movies data.
+
+Every movie is represented by a dictionary:
+
+    {"title": "Movie", "year": 2000, "cast": ["Actor"], "genres": ["Drama"]}
+
+Files contain either a JSON array of such dictionaries
+or one dictionary per line (NDJSON).
+"""
+import json
+import re
+import typing
+
+import entities
+
+# The number of characters read from a file at once
+_BUFFER_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"\s*")
+
+
+def iter_raw_movies(file: typing.TextIO, buffer_size: int = _BUFFER_SIZE) -> typing.Iterator[dict]:
+    """
+    Iterating over the movies of a JSON array or NDJSON file
+    without reading the whole file to memory.
+    The file is parsed incrementally item by item
+    so the memory usage is bounded by the size of the largest item
+    rather than by the size of the file.
+    """
+    decoder = json.JSONDecoder()
+    reader = _Reader(file, buffer_size)
+
+    if reader.peek() != "[":
+        # Newline delimited objects, the line breaks are skipped as whitespace
+        while reader.peek():
+            yield reader.decode(decoder)
+        return
+
+    reader.expect("[")
+    if reader.skip("]"):
+        return
+
+    while True:
+        yield reader.decode(decoder)
+
+        if reader.skip("]"):
+            break
+
+        reader.expect(",")
+
+    if reader.peek():
+        raise ValueError("Unexpected data after the end of the array")
+
+
+def movie_to_raw_movie(movie: entities.Movie) -> dict:
+    return {
+        "title": movie.title,
+        "year": movie.year,
+        "cast": [actor.name for actor in movie.actors],
+        "genres": [genre.name for genre in movie.genres],
+    }
+
+
+def write_raw_movies(file: typing.TextIO, raw_movies: typing.Iterable[dict]) -> int:
+    """
+    Writing the movies to the file as NDJSON.
+    Return the number of written movies.
+    """
+    number = 0
+    for raw_movie in raw_movies:
+        file.write(json.dumps(raw_movie))
+        file.write("\n")
+        number += 1
+
+    return number
+
+
+class _Reader:
+    """
+    Buffered reader of a text file
+    which allows to decode JSON values one by one.
+    """
+    def __init__(self, file: typing.TextIO, buffer_size: int):
+        self.file = file
+        self.buffer_size = buffer_size
+        self.buffer = ""
+        self.position = 0
+
+    def _read(self) -> bool:
+        """
+        Appending the next part of the file to the buffer.
+        Already parsed data is dropped from the buffer.
+        Return False at the end of the file.
+        """
+        data = self.file.read(self.buffer_size)
+        if not data:
+            return False
+
+        self.buffer = self.buffer[self.position:] + data
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Getting the next non-whitespace character
+        or an empty string at the end of the file.
+        """
+        while True:
+            self.position = _WHITESPACE.match(self.buffer, self.position).end()
+
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+
+            if not self._read():
+                return ""
+
+    def skip(self, character: str) -> bool:
+        """
+        Skipping the next non-whitespace character if it is the given one.
+        """
+        if self.peek() == character:
+            self.position += 1
+            return True
+
+        return False
+
+    def expect(self, character: str):
+        if not self.skip(character):
+            raise ValueError(f"'{character}' is expected at position {self.position} of the buffer")
+
+    def decode(self, decoder: json.JSONDecoder) -> dict:
+        """
+        Decoding the next JSON object.
+        If the object is not read completely
+        the next part of the file is read and decoding is repeated.
+        """
+        self.peek()
+        while True:
+            try:
+                value, position = decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+
+            if not isinstance(value, dict):
+                raise ValueError("Movies must be JSON objects")
+
+            self.position = position
+            return value
@@ -0,0 +1,279 @@
+import datetime
+import os
+import sqlite3
+import typing
+
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import Table, create_engine
+from sqlalchemy.engine import Connection
+from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from database.connection import get_engine
+from database.repositories import ActorsRepo, SearchRepo, VersionsRepo
+from database import models
+import settings
+
+# The default number of movies inserted by a single statement
+DEFAULT_CHUNK_SIZE = 10000
+
+
+class MoviesLoader:
+    """
+    Loading movies to the empty database in chunks.
+    Movies are taken one by one from any iterable
+    of raw dictionaries (see database.dumps) and inserted
+    by executemany statements when the chunk is full.
+    Only dictionaries of actor and genre names are kept
+    in memory for the whole time of loading.
+
+    Object ids are set here instead of
+    using autogenerated database values
+    as it allows to create relations between
+    objects before their insert.
+    The database is empty so it doesn't make collisions.
+    """
+    def __init__(
+        self,
+        connection: Connection,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress: typing.Callable[[int], None] = None,
+    ):
+        self.connection = connection
+        self.chunk_size = chunk_size
+        # Function called with the number of loaded movies after every chunk
+        self.progress = progress
+
+        self.actor_ids: typing.Dict[str, int] = {}
+        self.genre_ids: typing.Dict[str, int] = {}
+        self.movies_number = 0
+        self._statements = {}
+
+        # All movies are loaded at the same time. The value is passed
+        # to the driver as is so it's converted by the column type once.
+        self.updated_at = datetime.datetime.utcnow()
+        bind_processor = models.Movie.updated_at.type.bind_processor(connection.dialect)
+        if bind_processor:
+            self.updated_at = bind_processor(self.updated_at)
+        self._reset_chunk()
+
+    def load(self, raw_movies: typing.Iterable[dict]) -> int:
+        """
+        Loading all movies. Return the number of loaded movies.
+        """
+        for raw_movie in raw_movies:
+            self._add_movie(raw_movie)
+            if len(self.movies) >= self.chunk_size:
+                self._flush()
+
+        self._flush()
+        return self.movies_number
+
+    def _reset_chunk(self):
+        self.movies = []
+        self.actors = []
+        self.genres = []
+        self.actor_movies = []
+        self.genre_movies = []
+
+    def _add_movie(self, raw_movie: dict):
+        self.movies_number += 1
+        movie_id = self.movies_number
+        self.movies.append((movie_id, raw_movie["title"], raw_movie["year"], self.updated_at))
+
+        for actor_name in dict.fromkeys(raw_movie["cast"]):
+
+            actor_id = self.actor_ids.get(actor_name)
+            if actor_id is None:
+                actor_id = len(self.actor_ids) + 1
+                self.actor_ids[actor_name] = actor_id
+                self.actors.append((actor_id, actor_name))
+
+            self.actor_movies.append((actor_id, movie_id))
+
+        for genre_name in dict.fromkeys(raw_movie["genres"]):
+
+            genre_id = self.genre_ids.get(genre_name)
+            if genre_id is None:
+                genre_id = len(self.genre_ids) + 1
+                self.genre_ids[genre_name] = genre_id
+                self.genres.append((genre_id, genre_name))
+
+            self.genre_movies.append((genre_id, movie_id))
+
+    def _flush(self):
+        """
+        Saving collected chunk to the database.
+        """
+        for model, columns, rows in (
+            (models.Actor, ("id", "name"), self.actors),
+            (models.Genre, ("id", "name"), self.genres),
+            (models.Movie, ("id", "title", "year", "updated_at"), self.movies),
+            (models.ActorMovie, ("actor_id", "movie_id"), self.actor_movies),
+            (models.GenreMovie, ("genre_id", "movie_id"), self.genre_movies),
+        ):
+            if rows:
+                self._insert(model.__table__, columns, rows)
+
+        if self.movies and self.progress:
+            self.progress(self.movies_number)
+
+        self._reset_chunk()
+
+    def _insert(self, table: Table, columns: typing.Tuple[str, ...], rows: typing.List[tuple]):
+        """
+        Inserting rows of values of the given columns by the DBAPI executemany call.
+        The statement is compiled only once per table and
+        SQLAlchemy processing of every row parameters is avoided
+        as it takes much more time than the insert itself.
+        """
+        statement = self._statements.get(table.name)
+        if statement is None:
+            statement = table.insert().compile(dialect=self.connection.dialect, column_keys=list(columns))
+            self._statements[table.name] = statement
+
+        if not statement.positional:
+            rows = [dict(zip(columns, row)) for row in rows]
+        elif tuple(statement.positiontup) != columns:
+            indexes = [columns.index(key) for key in statement.positiontup]
+            rows = [tuple(row[index] for index in indexes) for row in rows]
+
+        self.connection.exec_driver_sql(str(statement), rows)
+
+
+def reload_sqlite_fast(
+    raw_movies: typing.Iterable[dict],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: typing.Callable[[int], None] = None,
+) -> int:
+    """
+    Replacing SQLite database file with a new one filled by the given movies.
+
+    The data is loaded to a new file next to the live database
+    with journaling and synchronous writes turned off
+    and secondary indexes are built only after all data is inserted.
+    Then the new file atomically replaces the live one,
+    so the application keeps serving the old data until the swap.
+    Changes made to the live database during the reload are lost.
+
+    Return the number of loaded movies.
+    """
+    engine = get_engine()
+    if engine.url.get_backend_name() != "sqlite" or engine.url.database in (None, "", ":memory:"):
+        raise ValueError("Fast reload is supported only for SQLite database files")
+
+    path = os.path.abspath(engine.url.database)
+    new_path = path + ".reload"
+    if os.path.exists(new_path):
+        os.remove(new_path)
+
+    # The final version is set when the file is swapped (see _replace_database)
+    version = VersionsRepo().get_version(read_only=False) + 1
+
+    new_engine = create_engine(f"sqlite:///{new_path}", poolclass=NullPool)
+    try:
+        with new_engine.connect() as connection:
+
+            for pragma in _FAST_LOAD_PRAGMAS:
+                connection.exec_driver_sql(pragma)
+
+            with connection.begin():
+                _create_tables(connection, version=version)
+                loader = MoviesLoader(connection=connection, chunk_size=chunk_size, progress=progress)
+                movies_number = loader.load(raw_movies)
+
+            with connection.begin():
+                for table in models.Base.metadata.sorted_tables:
+                    for index in table.indexes:
+                        connection.execute(CreateIndex(index))
+
+                ActorsRepo().rebuild_actors_aggregated(connection)
+                SearchRepo().rebuild_index(connection)
+
+            connection.exec_driver_sql("ANALYZE")
+            connection.exec_driver_sql("PRAGMA journal_mode=DELETE")
+    except BaseException:
+        new_engine.dispose()
+        os.remove(new_path)
+        raise
+
+    new_engine.dispose()
+    try:
+        _replace_database(path, new_path)
+    except BaseException:
+        if os.path.exists(new_path):
+            os.remove(new_path)
+        raise
+    # Connections to the replaced file must not be reused
+    engine.dispose()
+
+    return movies_number
+
+
+def _replace_database(path: str, new_path: str):
+    """
+    Replacing the live database file with the new one.
+
+    The live database is locked for writing during the swap,
+    so the version of the new file is greater than any version
+    of the live one, including the versions of the changes
+    made during the reload, and the values cached for the old data
+    (e.g. ETags "data.<version>") never match the new data.
+    """
+    live = sqlite3.connect(path, timeout=settings.DATABASE_TIMEOUT, isolation_level=None)
+    try:
+        journal_mode, = live.execute("PRAGMA journal_mode").fetchone()
+        if journal_mode.lower() == "wal":
+            raise ValueError("Fast reload is not supported for SQLite database in WAL mode")
+
+        # Taking the lock SQLite rolls back a hot journal left by a failed transaction
+        live.execute("BEGIN IMMEDIATE")
+        row = live.execute("SELECT version FROM data_version").fetchone()
+        version = (row[0] if row else 0) + 1
+
+        # A journal would be applied to the new file after the swap
+        for sidecar_path in (path + "-journal", path + "-wal"):
+            if os.path.exists(sidecar_path):
+                raise RuntimeError(f"Database file can't be replaced while {sidecar_path} exists")
+
+        new = sqlite3.connect(new_path, isolation_level=None)
+        try:
+            new.execute("UPDATE data_version SET version = ?, changes_since = ?", (version, version))
+        finally:
+            new.close()
+
+        os.replace(new_path, path)
+        live.execute("ROLLBACK")
+    finally:
+        live.close()
+
+
+# Settings of SQLite connection used for loading the data to a new file.
+# Durability is not required here because the file
+# is thrown away if the loading fails.
+_FAST_LOAD_PRAGMAS = (
+    "PRAGMA journal_mode=OFF",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA locking_mode=EXCLUSIVE",
+    "PRAGMA temp_store=MEMORY",
+    # 512 MB
+    "PRAGMA cache_size=-524288",
+)
+
+
+def _create_tables(connection: Connection, version: int):
+    """
+    Creating the tables of the models without their secondary indexes
+    and the tables of the search index and marking the database with the latest migration revision.
+    """
+    for table in models.Base.metadata.sorted_tables:
+        connection.execute(CreateTable(table))
+    for statement in models.SEARCH_TABLES_DDL:
+        connection.exec_driver_sql(statement)
+
+    connection.execute(models.DataVersion.__table__.insert().values(id=1, version=version, changes_since=version))
+
+    migrations = ScriptDirectory(os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations"))
+    context = MigrationContext.configure(connection)
+    context.stamp(migrations, migrations.get_current_head())
@@ -13,11 +13,14 @@ currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfram
 parentdir = os.path.dirname(os.path.dirname(currentdir))
 sys.path.insert(0, parentdir)
 
-from database.models import Base
+from database.models import Base, search_metadata
+import settings
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
+# The database is taken from the application settings
+config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -29,6 +32,15 @@ fileConfig(config.config_file_name)
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+# Tables of the full-text search and their shadow tables (e.g. movie_fts_data)
+# are virtual tables which are not compared by autogenerate
+_SEARCH_TABLE_PREFIXES = tuple(search_metadata.tables)
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == "table" and name.startswith(_SEARCH_TABLE_PREFIXES))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -74,7 +86,7 @@ def run_migrations_online():
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,53 @@
+"""Relation and name indexes
+
+Revision ID: 2e6f9a0c7d15
+Revises: 8d3a5c91f0b4
+Create Date: 2026-10-18 12:41:05.906114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "2e6f9a0c7d15"
+down_revision = "8d3a5c91f0b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Duplicated relations are removed before creating unique indexes.
+    # The summary is refilled as duplicates were counted in it.
+    op.execute(
+        "DELETE FROM actor_movie WHERE id NOT IN "
+        "(SELECT min(id) FROM actor_movie GROUP BY actor_id, movie_id)"
+    )
+    op.execute(
+        "DELETE FROM genre_movie WHERE id NOT IN "
+        "(SELECT min(id) FROM genre_movie GROUP BY genre_id, movie_id)"
+    )
+    op.execute("DELETE FROM actor_year")
+    op.execute(
+        "INSERT INTO actor_year (actor_id, year, number) "
+        "SELECT actor_movie.actor_id, movie.year, count(*) "
+        "FROM actor_movie JOIN movie ON movie.id = actor_movie.movie_id "
+        "WHERE movie.year IS NOT NULL "
+        "GROUP BY actor_movie.actor_id, movie.year"
+    )
+
+    op.create_index("ix_actor_movie_actor_id_movie_id", "actor_movie", ["actor_id", "movie_id"], unique=True)
+    op.create_index("ix_actor_movie_movie_id_actor_id", "actor_movie", ["movie_id", "actor_id"], unique=False)
+    op.create_index("ix_genre_movie_genre_id_movie_id", "genre_movie", ["genre_id", "movie_id"], unique=True)
+    op.create_index("ix_genre_movie_movie_id_genre_id", "genre_movie", ["movie_id", "genre_id"], unique=False)
+    op.create_index("ix_actor_name", "actor", ["name"], unique=False)
+    op.create_index("ix_movie_year", "movie", ["year"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_movie_year", table_name="movie")
+    op.drop_index("ix_actor_name", table_name="actor")
+    op.drop_index("ix_genre_movie_movie_id_genre_id", table_name="genre_movie")
+    op.drop_index("ix_genre_movie_genre_id_movie_id", table_name="genre_movie")
+    op.drop_index("ix_actor_movie_movie_id_actor_id", table_name="actor_movie")
+    op.drop_index("ix_actor_movie_actor_id_movie_id", table_name="actor_movie")
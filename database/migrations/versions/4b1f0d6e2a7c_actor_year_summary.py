@@ -0,0 +1,39 @@
+"""Actor year summary table
+
+Revision ID: 4b1f0d6e2a7c
+Revises: c9e92c1ecf2c
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "4b1f0d6e2a7c"
+down_revision = "c9e92c1ecf2c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "actor_year",
+        sa.Column("actor_id", sa.Integer(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("number", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["actor_id"], ["actor.id"], ),
+        sa.PrimaryKeyConstraint("actor_id", "year")
+    )
+    # Filling the summary with the already existing data
+    op.execute(
+        "INSERT INTO actor_year (actor_id, year, number) "
+        "SELECT actor_movie.actor_id, movie.year, count(*) "
+        "FROM actor_movie JOIN movie ON movie.id = actor_movie.movie_id "
+        "WHERE movie.year IS NOT NULL "
+        "GROUP BY actor_movie.actor_id, movie.year"
+    )
+
+
+def downgrade():
+    op.drop_table("actor_year")
@@ -0,0 +1,29 @@
+"""Movie version
+
+Revision ID: 5f7b2d4e8a13
+Revises: 2e6f9a0c7d15
+Create Date: 2026-10-18 16:02:37.418520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5f7b2d4e8a13"
+down_revision = "2e6f9a0c7d15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("movie", sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+    # SQLite doesn't allow adding a column with a non-constant default
+    op.add_column("movie", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE movie SET updated_at = CURRENT_TIMESTAMP")
+
+
+def downgrade():
+    with op.batch_alter_table("movie") as batch_op:
+        batch_op.drop_column("updated_at")
+        batch_op.drop_column("version")
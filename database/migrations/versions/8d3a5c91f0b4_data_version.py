@@ -0,0 +1,30 @@
+"""Data version table
+
+Revision ID: 8d3a5c91f0b4
+Revises: 4b1f0d6e2a7c
+Create Date: 2026-10-18 10:03:17.542961
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8d3a5c91f0b4"
+down_revision = "4b1f0d6e2a7c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    data_version = op.create_table(
+        "data_version",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.bulk_insert(data_version, [{"id": 1, "version": 1}])
+
+
+def downgrade():
+    op.drop_table("data_version")
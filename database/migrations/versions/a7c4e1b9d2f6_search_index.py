@@ -0,0 +1,31 @@
+"""Full-text search index
+
+Revision ID: a7c4e1b9d2f6
+Revises: 5f7b2d4e8a13
+Create Date: 2026-10-18 19:24:05.730914
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "a7c4e1b9d2f6"
+down_revision = "5f7b2d4e8a13"
+branch_labels = None
+depends_on = None
+
+_FTS_OPTIONS = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4'"
+
+
+def upgrade():
+    # SQLite FTS5 virtual tables, see database.models.search
+    op.execute(f"CREATE VIRTUAL TABLE movie_fts USING fts5(title, {_FTS_OPTIONS})")
+    op.execute(f"CREATE VIRTUAL TABLE actor_fts USING fts5(name, {_FTS_OPTIONS})")
+    # Indexing the already existing data
+    op.execute("INSERT INTO movie_fts (rowid, title) SELECT id, title FROM movie WHERE title IS NOT NULL")
+    op.execute("INSERT INTO actor_fts (rowid, name) SELECT id, name FROM actor WHERE name IS NOT NULL")
+
+
+def downgrade():
+    op.drop_table("actor_fts")
+    op.drop_table("movie_fts")
@@ -0,0 +1,34 @@
+"""Data change log
+
+Revision ID: b5d2e7a9c3f1
+Revises: e3b8d1f5c6a9
+Create Date: 2026-10-18 17:05:12.604931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b5d2e7a9c3f1"
+down_revision = "e3b8d1f5c6a9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "data_change",
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("movie_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.PrimaryKeyConstraint("version", "movie_id")
+    )
+    op.add_column("data_version", sa.Column("changes_since", sa.Integer(), server_default="0", nullable=False))
+    # Earlier changes are not logged
+    op.execute("UPDATE data_version SET changes_since = version")
+
+
+def downgrade():
+    with op.batch_alter_table("data_version") as batch_op:
+        batch_op.drop_column("changes_since")
+    op.drop_table("data_change")
@@ -0,0 +1,28 @@
+"""Movie updated_at not null
+
+Revision ID: d8f3a6c2e5b4
+Revises: b5d2e7a9c3f1
+Create Date: 2026-10-18 18:41:09.275316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d8f3a6c2e5b4"
+down_revision = "b5d2e7a9c3f1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The column was nullable, so movies may have been inserted without the time
+    op.execute("UPDATE movie SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL")
+    with op.batch_alter_table("movie") as batch_op:
+        batch_op.alter_column("updated_at", existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table("movie") as batch_op:
+        batch_op.alter_column("updated_at", existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,25 @@
+"""Movie title index
+
+Revision ID: e3b8d1f5c6a9
+Revises: a7c4e1b9d2f6
+Create Date: 2026-10-18 16:22:47.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e3b8d1f5c6a9"
+down_revision = "a7c4e1b9d2f6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Movies are listed in the order of titles, the rowid of the index is the order of ids
+    op.create_index("ix_movie_title", "movie", ["title"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_movie_title", table_name="movie")
@@ -1,4 +1,6 @@
 from .base import Base
 from .movie import Movie
-from .cast import Actor, ActorMovie
+from .cast import Actor, ActorMovie, ActorYear
 from .genre import Genre, GenreMovie
+from .version import DataChange, DataVersion
+from .search import SEARCH_TABLES_DDL, actor_fts, movie_fts, search_metadata
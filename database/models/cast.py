@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
 
 from .base import Base
 
@@ -7,6 +7,9 @@ metadata = Base.metadata
 
 class Actor(Base):
     __tablename__ = "actor"
+    __table_args__ = (
+        Index("ix_actor_name", "name"),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String(1))
@@ -17,7 +20,24 @@ class Actor(Base):
 
 class ActorMovie(Base):
     __tablename__ = "actor_movie"
+    __table_args__ = (
+        Index("ix_actor_movie_actor_id_movie_id", "actor_id", "movie_id", unique=True),
+        Index("ix_actor_movie_movie_id_actor_id", "movie_id", "actor_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     actor_id = Column(ForeignKey("actor.id"), nullable=False)
     movie_id = Column(ForeignKey("movie.id"), nullable=False)
+
+
+class ActorYear(Base):
+    """
+    Number of movies of an actor released in a year.
+    This table is a summary of actor, actor_movie and movie tables
+    and it is maintained by the repositories on changing movies.
+    """
+    __tablename__ = "actor_year"
+
+    actor_id = Column(ForeignKey("actor.id"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    number = Column(Integer, nullable=False)
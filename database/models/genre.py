@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
 
 from .base import Base
 
@@ -17,6 +17,10 @@ class Genre(Base):
 
 class GenreMovie(Base):
     __tablename__ = "genre_movie"
+    __table_args__ = (
+        Index("ix_genre_movie_genre_id_movie_id", "genre_id", "movie_id", unique=True),
+        Index("ix_genre_movie_movie_id_genre_id", "movie_id", "genre_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     genre_id = Column(ForeignKey("genre.id"), nullable=False)
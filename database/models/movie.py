@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, DateTime, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from .base import Base
@@ -8,10 +8,19 @@ metadata = Base.metadata
 
 class Movie(Base):
     __tablename__ = "movie"
+    __table_args__ = (
+        Index("ix_movie_year", "year"),
+        Index("ix_movie_title", "title"),
+    )
 
     id = Column(Integer, primary_key=True)
     title = Column(String(1))
     year = Column(Integer)
+    # Increased on every change of the movie or its relations.
+    # Along with the time of the change it identifies the state of the movie,
+    # ids and versions start over when the data is reloaded but times don't.
+    version = Column(Integer, nullable=False, server_default="1")
+    updated_at = Column(DateTime, nullable=False)
 
     actors = relationship("Actor", secondary="actor_movie", backref="movies")
     genres = relationship("Genre", secondary="genre_movie")
@@ -0,0 +1,35 @@
+"""
+SQLite FTS5 tables of the full-text search.
+
+They are virtual tables which SQLAlchemy can't create,
+so they are not a part of Base.metadata: they are created
+by the migrations and by SEARCH_TABLES_DDL when a database is made from scratch.
+The rowid of a row is the id of the indexed movie or actor.
+"""
+from sqlalchemy import Column, Integer, MetaData, String, Table
+
+search_metadata = MetaData()
+
+movie_fts = Table(
+    "movie_fts",
+    search_metadata,
+    Column("rowid", Integer, primary_key=True),
+    Column("title", String),
+)
+
+actor_fts = Table(
+    "actor_fts",
+    search_metadata,
+    Column("rowid", Integer, primary_key=True),
+    Column("name", String),
+)
+
+# Words are matched case and diacritics insensitively.
+# Prefixes of 2-4 characters are indexed separately so prefix queries
+# don't scan all words starting with them.
+_FTS_OPTIONS = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4'"
+
+SEARCH_TABLES_DDL = (
+    f"CREATE VIRTUAL TABLE movie_fts USING fts5(title, {_FTS_OPTIONS})",
+    f"CREATE VIRTUAL TABLE actor_fts USING fts5(name, {_FTS_OPTIONS})",
+)
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer
+
+from .base import Base
+
+metadata = Base.metadata
+
+
+class DataVersion(Base):
+    """
+    Single row table with the version of the data.
+    The version is increased by every transaction
+    which changes movies or their relations
+    so it may be used for invalidation of cached values.
+    """
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    # All changes of the movies made after this version are logged in data_change table
+    changes_since = Column(Integer, nullable=False, server_default="0")
+
+    def __repr__(self):
+        return f"DataVersion(version={self.version})"
+
+
+class DataChange(Base):
+    """
+    Log of the movies changed by every version of the data,
+    so the data kept in memory (e.g. by analytics) is updated
+    by reading only the changed movies.
+    """
+    __tablename__ = "data_change"
+
+    version = Column(Integer, primary_key=True)
+    movie_id = Column(Integer, primary_key=True, autoincrement=False)
+
+    def __repr__(self):
+        return f"DataChange(version={self.version}, movie_id={self.movie_id})"
@@ -1,3 +1,6 @@
+from .versions import AsyncVersionsRepo, VersionsRepo
 from .actors import ActorsRepo
 from .genres import GenresRepo
-from .movies import MoviesRepo
+from .relations import RelationsRepo
+from .search import SearchRepo
+from .movies import AsyncMoviesRepo, MoviesRepo
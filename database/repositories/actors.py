@@ -1,15 +1,23 @@
 import typing
 
-from sqlalchemy import func
+from sqlalchemy import and_, bindparam, func, or_, select, tuple_
+from sqlalchemy.orm import Query, Session
 
 from database.connection import get_session
 from database import models
 import entities
 
+# The number of rows fetched at once by the iterators
+_YIELD_BATCH_SIZE = 500
+# The maximum number of names passed to a single statement
+_NAMES_CHUNK_SIZE = 900
+# The maximum number of ids passed to a single statement
+_IDS_CHUNK_SIZE = 900
+
 
 class ActorsRepo:
     def get_actors(self, actor_ids: typing.List[int]) -> typing.List[entities.Actor]:
-        with get_session() as session:
+        with get_session(read_only=True) as session:
 
             actor_models = session.query(models.Actor).filter(models.Actor.id.in_(actor_ids)).all()
             return [
@@ -19,7 +27,63 @@ class ActorsRepo:
                 ) for actor_model in actor_models
             ]
 
-    def get_actors_aggregated(self, offset: int, limit: int) -> entities.ActorsAggregatedPaginated:
+    def get_actors_page(
+        self,
+        limit: int,
+        cursor: typing.Optional[typing.Tuple[str, int]] = None,
+    ) -> entities.ActorsPage:
+        """
+        Getting a page of actors ordered by their names.
+        The page starts right after the cursor (actor name, actor id)
+        of the last actor of the previous page.
+        Actors without a name (NULL) are the first ones.
+        """
+        with get_session(read_only=True) as session:
+
+            query = session.query(models.Actor.id, models.Actor.name). \
+                order_by(models.Actor.name). \
+                order_by(models.Actor.id)
+            if cursor is not None:
+                query = query.filter(self._get_cursor_condition([models.Actor.id], cursor))
+
+            # One more item is requested to find out if there is the next page
+            rows = query.limit(limit + 1).all()
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = (rows[-1].name, rows[-1].id)
+
+            return entities.ActorsPage(
+                actors=[entities.Actor(id=row.id, name=row.name) for row in rows],
+                next_cursor=next_cursor,
+            )
+
+    def get_actors_by_names(self, names: typing.List[str]) -> typing.List[entities.Actor]:
+        """
+        Getting the actors having any of the names, ordered by ids.
+        Names are looked up in ix_actor_name index by one query per chunk of names.
+        """
+        names = list(dict.fromkeys(names))
+        actors = []
+
+        with get_session(read_only=True) as session:
+
+            for start in range(0, len(names), _NAMES_CHUNK_SIZE):
+                rows = session.query(models.Actor.id, models.Actor.name). \
+                    filter(models.Actor.name.in_(names[start:start + _NAMES_CHUNK_SIZE])). \
+                    all()
+                actors.extend(entities.Actor(id=row.id, name=row.name) for row in rows)
+
+        actors.sort(key=lambda actor: actor.id)
+        return actors
+
+    def get_actors_aggregated(
+        self,
+        offset: int,
+        limit: int,
+        cursor: typing.Optional[typing.Tuple[str, int, int]] = None,
+        total_mode: str = entities.TOTAL_EXACT,
+    ) -> entities.ActorsAggregatedPaginated:
         """
         Getting the list of actors aggregated
         by their name and years of their movies
@@ -27,33 +91,232 @@ class ActorsRepo:
         The results are ordered by actors' names and movies' year
         in the ascending order.
 
-        This request may be time consuming on large tables of data.
-        In this case creation of a new table should be considered
-        which will include actor id, movie year and number of movies
-        though it will require filling this table on changing data
-        in actor, movie and actor_movie tables.
+        The data is read from actor_year summary table
+        which is filled on changing movies
+        so no aggregation is made on request.
+
+        If the cursor (actor name, actor id, year) of the last item
+        of the previous page is given the page starts right after it
+        and the offset is ignored, so deep pages cost the same as the first one.
+        Actors without a name (NULL) are the first ones.
+
+        The total number of items is counted according to total_mode,
+        see entities.TOTAL_MODES. The cached mode is handled by the services,
+        the repository counts the items in this mode as in the exact one.
         """
-        with get_session() as session:
+        with get_session(read_only=True) as session:
 
-            query = session.query(models.Actor, models.Movie.year, func.count(models.Actor.id)). \
-                join(models.ActorMovie, models.Actor.id == models.ActorMovie.actor_id). \
-                join(models.Movie, models.Movie.id == models.ActorMovie.movie_id). \
-                group_by(models.Actor, models.Movie.year). \
-                order_by(models.Actor.name). \
-                order_by(models.Movie.year)
-            total = query.count()
-
-            items = query.offset(offset).limit(limit).all()
-
-            return entities.ActorsAggregatedPaginated(
-                actors=[
-                    entities.ActorAggregated(
-                        name=item[0].name,
-                        year=item[1],
-                        number=item[2],
-                    ) for item in items
-                ],
-                total=total,
-                limit=limit,
+            return self._get_actors_aggregated(
                 offset=offset,
+                limit=limit,
+                cursor=cursor,
+                total_mode=total_mode,
+                session=session,
             )
+
+    def iter_actors_aggregated(
+        self,
+        offset: int,
+        limit: int,
+        cursor: typing.Optional[typing.Tuple[str, int, int]] = None,
+        total_mode: str = entities.TOTAL_EXACT,
+    ) -> entities.ActorsAggregatedPaginated:
+        """
+        The same as get_actors_aggregated but the actors
+        are an iterator reading rows from the database in batches,
+        so the page is never kept in memory as a whole.
+        Every batch is read by a separate statement (by keyset pagination
+        after the last row of the previous one), so no statement is left open
+        holding SQLite lock while the page is consumed, and changes
+        made meanwhile may be partially visible.
+
+        The iterator uses its own session since it may be consumed
+        after the session scope is closed (e.g. by a streamed response).
+        next_cursor is set when the iterator is exhausted.
+        """
+        with get_session(read_only=True) as session:
+
+            total = self._get_actors_aggregated_total(total_mode=total_mode, session=session)
+
+        page = entities.ActorsAggregatedPaginated(
+            actors=[],
+            total=total,
+            limit=limit,
+            offset=offset if cursor is None else None,
+        )
+        page.actors = self._iter_actors_aggregated(page=page, offset=offset, cursor=cursor)
+        return page
+
+    def _iter_actors_aggregated(
+        self,
+        page: entities.ActorsAggregatedPaginated,
+        offset: int,
+        cursor: typing.Optional[typing.Tuple[str, int, int]],
+    ) -> typing.Iterator[entities.ActorAggregated]:
+        with get_session(read_only=True, scoped=False) as session:
+
+            number = 0
+            last_row = None
+            while True:
+                # One more item is requested to find out if there is the next page
+                batch_size = min(_YIELD_BATCH_SIZE, page.limit + 1 - number)
+                query = self._get_actors_aggregated_query(offset=offset, cursor=cursor, session=session)
+                rows = query.limit(batch_size).all()
+
+                for row in rows:
+                    if number == page.limit:
+                        page.next_cursor = (last_row.name, last_row.id, last_row.year)
+                        return
+
+                    yield entities.ActorAggregated(name=row.name, year=row.year, number=row.number)
+                    number += 1
+                    last_row = row
+
+                if len(rows) < batch_size:
+                    return
+
+                cursor = (last_row.name, last_row.id, last_row.year)
+
+    def _get_actors_aggregated(
+        self,
+        offset: int,
+        limit: int,
+        cursor: typing.Optional[typing.Tuple[str, int, int]],
+        total_mode: str,
+        session: Session,
+    ) -> entities.ActorsAggregatedPaginated:
+        query = self._get_actors_aggregated_query(offset=offset, cursor=cursor, session=session)
+        total = self._get_actors_aggregated_total(total_mode=total_mode, session=session)
+
+        # One more item is requested to find out if there is the next page
+        items = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = (items[-1].name, items[-1].id, items[-1].year)
+
+        return entities.ActorsAggregatedPaginated(
+            actors=[
+                entities.ActorAggregated(
+                    name=item.name,
+                    year=item.year,
+                    number=item.number,
+                ) for item in items
+            ],
+            total=total,
+            limit=limit,
+            offset=offset if cursor is None else None,
+            next_cursor=next_cursor,
+        )
+
+    def _get_actors_aggregated_query(
+        self,
+        offset: int,
+        cursor: typing.Optional[typing.Tuple[str, int, int]],
+        session: Session,
+    ) -> Query:
+        query = session.query(
+            models.Actor.id,
+            models.Actor.name,
+            models.ActorYear.year,
+            models.ActorYear.number,
+        ). \
+            join(models.ActorYear, models.Actor.id == models.ActorYear.actor_id). \
+            order_by(models.Actor.name). \
+            order_by(models.Actor.id). \
+            order_by(models.ActorYear.year)
+
+        if cursor is None:
+            return query.offset(offset)
+
+        return query.filter(self._get_cursor_condition([models.Actor.id, models.ActorYear.year], cursor))
+
+    def _get_cursor_condition(self, columns: list, cursor: tuple):
+        """
+        Condition of the rows after the cursor (actor name, *values of the columns)
+        in the order of actor names and the columns.
+        Actors without a name (NULL) are the first ones.
+        """
+        name, *values = cursor
+        if name is None:
+            return or_(
+                and_(models.Actor.name.is_(None), tuple_(*columns) > tuple_(*values)),
+                models.Actor.name.isnot(None),
+            )
+
+        return tuple_(models.Actor.name, *columns) > tuple_(*cursor)
+
+    def count_actors_aggregated(self) -> int:
+        """
+        Counting the number of aggregated actors.
+        """
+        with get_session(read_only=True) as session:
+
+            return self._get_actors_aggregated_total(total_mode=entities.TOTAL_EXACT, session=session)
+
+    def _get_actors_aggregated_total(self, total_mode: str, session: Session) -> typing.Optional[int]:
+        if total_mode == entities.TOTAL_NONE:
+            return None
+
+        return session.query(func.count(models.ActorYear.actor_id)).scalar()
+
+    def change_actors_aggregated(self, changes: typing.Mapping[typing.Tuple[int, int], int], session: Session):
+        """
+        Changing the number of movies in actor_year summary table.
+        Changes are mapped by (actor id, year) pairs to the difference
+        in the number of movies, e.g. {(1, 2000): -1, (1, 2001): 1}.
+        It must be called in the same transaction
+        which changes movies or their relations with actors.
+        The rows are changed by a few statements per chunk of actors
+        regardless of the number of changes.
+        """
+        table = models.ActorYear.__table__
+        changes = {key: difference for key, difference in changes.items() if difference and key[1] is not None}
+        actor_ids = sorted({actor_id for actor_id, _ in changes})
+
+        existing_keys = set()
+        for start in range(0, len(actor_ids), _IDS_CHUNK_SIZE):
+            query = select(table.c.actor_id, table.c.year). \
+                where(table.c.actor_id.in_(actor_ids[start:start + _IDS_CHUNK_SIZE]))
+            existing_keys.update((row.actor_id, row.year) for row in session.execute(query))
+
+        updates = [
+            {"key_actor_id": actor_id, "key_year": year, "difference": difference}
+            for (actor_id, year), difference in changes.items() if (actor_id, year) in existing_keys
+        ]
+        if updates:
+            statement = table.update(). \
+                where(table.c.actor_id == bindparam("key_actor_id"), table.c.year == bindparam("key_year")). \
+                values(number=table.c.number + bindparam("difference"))
+            session.execute(statement, updates)
+
+        inserts = [
+            {"actor_id": actor_id, "year": year, "number": difference}
+            for (actor_id, year), difference in changes.items()
+            if (actor_id, year) not in existing_keys and difference > 0
+        ]
+        if inserts:
+            session.execute(table.insert(), inserts)
+
+        decreased_actor_ids = sorted({actor_id for (actor_id, _), difference in changes.items() if difference < 0})
+        for start in range(0, len(decreased_actor_ids), _IDS_CHUNK_SIZE):
+            chunk = decreased_actor_ids[start:start + _IDS_CHUNK_SIZE]
+            session.execute(table.delete().where(table.c.actor_id.in_(chunk), table.c.number <= 0))
+
+    def rebuild_actors_aggregated(self, session: Session):
+        """
+        Filling actor_year summary table from scratch
+        by the data of actor_movie and movie tables.
+        """
+        table = models.ActorYear.__table__
+        session.execute(table.delete())
+        session.execute(
+            table.insert().from_select(
+                ["actor_id", "year", "number"],
+                select(models.ActorMovie.actor_id, models.Movie.year, func.count()).
+                join(models.Movie, models.Movie.id == models.ActorMovie.movie_id).
+                where(models.Movie.year.isnot(None)).
+                group_by(models.ActorMovie.actor_id, models.Movie.year),
+            )
+        )
+
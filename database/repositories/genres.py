@@ -7,7 +7,7 @@ import entities
 
 class GenresRepo:
     def get_genres(self, genres_ids: typing.List[int]) -> typing.List[entities.Genre]:
-        with get_session() as session:
+        with get_session(read_only=True) as session:
 
             genre_models = session.query(models.Genre).filter(models.Genre.id.in_(genres_ids)).all()
             return [
@@ -16,3 +16,18 @@ class GenresRepo:
                     name=genre_model.name,
                 ) for genre_model in genre_models
             ]
+
+    def get_all_genres(self) -> typing.List[entities.Genre]:
+        """
+        Getting all genres ordered by their names.
+        There are few genres, so they are never paginated.
+        """
+        with get_session(read_only=True) as session:
+
+            genre_models = session.query(models.Genre).order_by(models.Genre.name, models.Genre.id).all()
+            return [
+                entities.Genre(
+                    id=genre_model.id,
+                    name=genre_model.name,
+                ) for genre_model in genre_models
+            ]
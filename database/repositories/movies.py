@@ -1,12 +1,70 @@
+import collections
+import dataclasses
+import datetime
 import typing
 
+from sqlalchemy import and_, bindparam, exists, func, literal, literal_column, null, or_, select, tuple_, union_all
 from sqlalchemy.orm import Session
 
+from database.aio_connection import get_async_session
 from database.connection import get_session
-from database.repositories import ActorsRepo, GenresRepo
+from database.repositories import ActorsRepo, SearchRepo, VersionsRepo
 from database import models
 import entities
 
+# Kinds of rows in the result of MoviesRepo._fetch_movies query
+_MOVIE_ROW = 0
+_ACTOR_ROW = 1
+_GENRE_ROW = 2
+
+# The maximum number of movies fetched by a single statement.
+# Every id is passed three times so SQLite limit of variables is not reached.
+_FETCH_CHUNK_SIZE = 300
+# The maximum number of ids checked for existence by a single statement.
+_IDS_CHUNK_SIZE = 900
+# Columns of the movies lists orders (see entities.MOVIE_SORTS)
+_SORT_COLUMNS = {
+    "id": models.Movie.id,
+    "year": models.Movie.year,
+    "title": models.Movie.title,
+}
+# Statuses of the operations which change the movies
+_CHANGED_STATUSES = (entities.OPERATION_CREATED, entities.OPERATION_UPDATED, entities.OPERATION_DELETED)
+
+
+@dataclasses.dataclass
+class _MoviesBatch:
+    """
+    Changes of the movies made by the operations of MoviesRepo.apply_operations
+    before they are saved. Created movies get ids after the largest one
+    existing before the batch, so they never get the ids of the movies deleted by it.
+    """
+    # Years and actor ids of the movies, None for the missing ones
+    states: typing.Dict[int, typing.Optional[typing.Tuple[typing.Optional[int], typing.List[int]]]]
+    next_movie_id: int
+    created: typing.Dict[int, entities.Movie] = dataclasses.field(default_factory=dict)
+    updated: typing.Dict[int, entities.Movie] = dataclasses.field(default_factory=dict)
+    # Number of updates of every movie, its version is increased by each of them
+    update_counts: typing.Counter[int] = dataclasses.field(default_factory=collections.Counter)
+    deleted: typing.List[int] = dataclasses.field(default_factory=list)
+    # Changes of actor_year summary table
+    changes: typing.Counter[typing.Tuple[int, int]] = dataclasses.field(default_factory=collections.Counter)
+
+    def set_state(self, movie_id: int, year: typing.Optional[int], actor_ids: typing.Optional[typing.List[int]]):
+        """
+        Replacing the state of the movie, None actor_ids means that it's removed.
+        """
+        state = self.states.get(movie_id)
+        if state is not None:
+            self.changes.update({(actor_id, state[0]): -1 for actor_id in state[1]})
+
+        if actor_ids is None:
+            self.states[movie_id] = None
+            return
+
+        self.states[movie_id] = (year, actor_ids)
+        self.changes.update({(actor_id, year): 1 for actor_id in actor_ids})
+
 
 class MoviesRepo:
     def get_movie(self, movie_id: int) -> typing.Optional[entities.Movie]:
@@ -14,15 +72,87 @@ class MoviesRepo:
         Movie object is retrieved from the database
         with the related Actor and Genre objects.
         """
-        with get_session() as session:
+        with get_session(read_only=True) as session:
 
-            movie_model = session.query(models.Movie).filter(models.Movie.id == movie_id).first()
-            if not movie_model:
-                return
+            return self._fetch_movies(movie_ids=[movie_id], session=session).get(movie_id)
+
+    def get_movies(self, movie_ids: typing.List[int]) -> typing.List[entities.Movie]:
+        """
+        Movies are retrieved from the database
+        with the related Actor and Genre objects
+        by a single statement per chunk of ids regardless of their number.
+        Found movies are returned in the order of the given ids,
+        duplicated ids are ignored.
+        """
+        with get_session(read_only=True) as session:
+
+            return self.read_movies(movie_ids=movie_ids, session=session)
+
+    def iter_movies(self, batch_size: int = _FETCH_CHUNK_SIZE) -> typing.Iterator[entities.Movie]:
+        """
+        Iterating over all movies in the order of their ids.
+        Movies are fetched in batches by keyset pagination without ORM objects,
+        so the memory usage doesn't depend on the number of movies.
+        Every batch is read by a separate statement, so the iteration
+        doesn't hold a transaction for the whole time and changes
+        made meanwhile may be partially visible.
+
+        The iterator uses its own session since it may be consumed
+        after the session scope is closed (e.g. by a streamed response).
+        """
+        batch_size = min(batch_size, _FETCH_CHUNK_SIZE)
+        last_id = None
+
+        with get_session(read_only=True, scoped=False) as session:
+
+            while True:
+                query = select(models.Movie.id).order_by(models.Movie.id).limit(batch_size)
+                if last_id is not None:
+                    query = query.where(models.Movie.id > last_id)
+
+                movie_ids = session.execute(query).scalars().all()
+                if not movie_ids:
+                    break
+
+                movies = self._fetch_movies(movie_ids=movie_ids, session=session)
+                for movie_id in movie_ids:
+                    # The movie may be deleted meanwhile
+                    if movie_id in movies:
+                        yield movies[movie_id]
+
+                last_id = movie_ids[-1]
+
+    def get_movies_page(
+        self,
+        movies_filter: entities.MoviesFilter,
+        sort: str = "id",
+        limit: int = 20,
+        cursor: typing.Optional[tuple] = None,
+    ) -> entities.MoviesPage:
+        """
+        Getting a page of the movies meeting the filter conditions
+        in the given order (see entities.MOVIE_SORTS).
+        The next pages are requested by the cursor of the previous one.
+        """
+        with get_session(read_only=True) as session:
 
-            # Database model is converted to the entity
-            # to unbound it from the database connection.
-            return self._model_to_entity(movie_model)
+            return self.read_movies_page(
+                movies_filter=movies_filter,
+                sort=sort,
+                limit=limit,
+                cursor=cursor,
+                session=session,
+            )
+
+    def get_movies_versions(self, movie_ids: typing.List[int]) -> typing.List[entities.MovieVersion]:
+        """
+        Getting only the versions of the movies
+        which is much cheaper than getting the movies.
+        Missing movies are skipped.
+        """
+        with get_session(read_only=True) as session:
+
+            return self.read_movies_versions(movie_ids=movie_ids, session=session)
 
     def create_movie(self, movie: entities.Movie) -> entities.Movie:
         """
@@ -30,27 +160,25 @@ class MoviesRepo:
         Related Actor and Genre objects may contain only their ids.
         Return the inserted object id.
         """
-        # Checking that actors and genres are actually exist
-        # because SQLite doesn't check for foreign constraints
-        self._check_for_actor_existence(movie.actors)
-        self._check_for_genre_existence(movie.genres)
-
         with get_session() as session:
 
             session.begin()
-            movie_model = models.Movie()
-            movie_model.title = movie.title
-            movie_model.year = movie.year
-            session.add(movie_model)
-            # Need to save the movie here to get its id
-            session.commit()
+            # Checking that actors and genres are actually exist
+            # because SQLite doesn't check for foreign constraints
+            self._check_for_existence(
+                movie=movie,
+                existing_actor_ids=self._get_existing_actor_ids(movies=[movie], session=session),
+                existing_genre_ids=self._get_existing_genre_ids(movies=[movie], session=session),
+            )
 
-            session.begin()
-            self._create_actor_relations(movie_id=movie_model.id, actors=movie.actors, session=session)
-            self._create_genre_relations(movie_id=movie_model.id, genres=movie.genres, session=session)
+            changes = collections.Counter()
+            movie_id = self._insert_movie(movie=movie, changes=changes, session=session)
+            self._change_actors_aggregated(changes=changes, session=session)
+            self._index_movies(movie_ids=[movie_id], session=session)
+            self._increase_version(movie_ids=[movie_id], session=session)
             session.commit()
 
-            return self._model_to_entity(movie_model)
+            return self._fetch_movies(movie_ids=[movie_id], session=session)[movie_id]
 
     def edit_movie(self, movie: entities.Movie) -> typing.Optional[entities.Movie]:
         """
@@ -58,27 +186,28 @@ class MoviesRepo:
         Old relations with Actor and Genre objects are removed
         and new ones are created.
         """
-        # Checking that actors and genres are actually exist
-        # because SQLite doesn't check for foreign constraints
-        self._check_for_actor_existence(movie.actors)
-        self._check_for_genre_existence(movie.genres)
-
         with get_session() as session:
 
-            movie_model = session.query(models.Movie).filter(models.Movie.id == movie.id).first()
-            if not movie_model:
+            session.begin()
+            # Checking that actors and genres are actually exist
+            # because SQLite doesn't check for foreign constraints
+            self._check_for_existence(
+                movie=movie,
+                existing_actor_ids=self._get_existing_actor_ids(movies=[movie], session=session),
+                existing_genre_ids=self._get_existing_genre_ids(movies=[movie], session=session),
+            )
+
+            changes = collections.Counter()
+            if not self._update_movie(movie=movie, changes=changes, session=session):
+                session.rollback()
                 return
 
-            session.begin()
-            movie_model.title = movie.title
-            movie_model.year = movie.year
-            self._delete_actor_relations(movie_id=movie.id, session=session)
-            self._delete_genre_relations(movie_id=movie.id, session=session)
-            self._create_actor_relations(movie_id=movie.id, actors=movie.actors, session=session)
-            self._create_genre_relations(movie_id=movie.id, genres=movie.genres, session=session)
+            self._change_actors_aggregated(changes=changes, session=session)
+            self._index_movies(movie_ids=[movie.id], session=session)
+            self._increase_version(movie_ids=[movie.id], session=session)
             session.commit()
 
-            return self._model_to_entity(movie_model)
+            return self._fetch_movies(movie_ids=[movie.id], session=session)[movie.id]
 
     def delete_movie(self, movie_id: int):
         """
@@ -89,58 +218,612 @@ class MoviesRepo:
         with get_session() as session:
 
             session.begin()
-            self._delete_actor_relations(movie_id=movie_id, session=session)
-            self._delete_genre_relations(movie_id=movie_id, session=session)
-            session.query(models.Movie).filter(models.Movie.id == movie_id).delete()
+            changes = collections.Counter()
+            self._remove_movie(movie_id=movie_id, changes=changes, session=session)
+            self._change_actors_aggregated(changes=changes, session=session)
+            self._index_movies(movie_ids=[movie_id], session=session)
+            self._increase_version(movie_ids=[movie_id], session=session)
+            session.commit()
+
+    def apply_operations(
+        self,
+        operations: typing.List[entities.MovieOperation],
+    ) -> typing.List[entities.MovieOperationResult]:
+        """
+        Movies are created, updated and removed in a single transaction.
+        Operations referencing absent actors, genres or movies
+        are skipped and reported in their results, others are applied.
+
+        The operations are applied in their order to the states
+        of the movies read before any changes (see _MoviesBatch),
+        then every table is changed by one statement per chunk of ids,
+        so the number of statements doesn't depend on the number of operations.
+        """
+        movies = [operation.movie for operation in operations if operation.movie is not None]
+        movie_ids = [operation.movie_id for operation in operations if operation.action != entities.MOVIE_CREATE]
+
+        with get_session() as session:
+
+            # Everything is read in the transaction,
+            # so nothing read can be changed by others before the changes are saved
+            session.begin()
+            existing_actor_ids = self._get_existing_actor_ids(movies=movies, session=session)
+            existing_genre_ids = self._get_existing_genre_ids(movies=movies, session=session)
+            batch = _MoviesBatch(
+                states=self._get_movies_states(movie_ids=movie_ids, session=session),
+                next_movie_id=(session.query(func.max(models.Movie.id)).scalar() or 0) + 1,
+            )
+            results = [
+                self._apply_operation(
+                    operation=operation,
+                    existing_actor_ids=existing_actor_ids,
+                    existing_genre_ids=existing_genre_ids,
+                    batch=batch,
+                ) for operation in operations
+            ]
+            self._save_batch(batch=batch, session=session)
+            self._change_actors_aggregated(changes=batch.changes, session=session)
+            changed_movie_ids = [result.id for result in results if result.status in _CHANGED_STATUSES]
+            self._index_movies(movie_ids=changed_movie_ids, session=session)
+            self._increase_version(movie_ids=changed_movie_ids, session=session)
             session.commit()
 
-    def _model_to_entity(self, model: models.Movie) -> entities.Movie:
-        return entities.Movie(
-            id=model.id,
-            title=model.title,
-            year=model.year,
-            actors=[
-                entities.Actor(
-                    id=actor_model.id,
-                    name=actor_model.name,
-                ) for actor_model in model.actors
-            ],
-            genres=[
-                entities.Genre(
-                    id=genre_model.id,
-                    name=genre_model.name,
-                ) for genre_model in model.genres
-            ],
+            return results
+
+    def read_movies(self, movie_ids: typing.List[int], session: Session) -> typing.List[entities.Movie]:
+        """
+        The read_* methods are the queries of the public methods
+        run in the given session, e.g. of the asynchronous driver (see AsyncMoviesRepo).
+        """
+        movie_ids = list(dict.fromkeys(movie_ids))
+        movies = {}
+
+        for start in range(0, len(movie_ids), _FETCH_CHUNK_SIZE):
+            chunk = movie_ids[start:start + _FETCH_CHUNK_SIZE]
+            movies.update(self._fetch_movies(movie_ids=chunk, session=session))
+
+        return [movies[movie_id] for movie_id in movie_ids if movie_id in movies]
+
+    def read_movies_page(
+        self,
+        movies_filter: entities.MoviesFilter,
+        sort: str,
+        limit: int,
+        cursor: typing.Optional[tuple],
+        session: Session,
+    ) -> entities.MoviesPage:
+        descending = sort.startswith("-")
+        sort_column = _SORT_COLUMNS[sort.lstrip("-")]
+
+        conditions = self._get_filter_conditions(movies_filter)
+        if cursor is not None:
+            conditions.append(self._get_cursor_condition(sort_column, descending=descending, cursor=cursor))
+
+        order = [sort_column, models.Movie.id] if sort_column is not models.Movie.id else [models.Movie.id]
+        query = select(sort_column.label("sort_value"), models.Movie.id). \
+            where(*conditions). \
+            order_by(*(column.desc() for column in order) if descending else order). \
+            limit(limit + 1)
+
+        # One more item is requested to find out if there is the next page
+        rows = session.execute(query).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1].sort_value, rows[-1].id)
+
+        movies = self._fetch_movies(movie_ids=[row.id for row in rows], session=session) if rows else {}
+        return entities.MoviesPage(
+            movies=[movies[row.id] for row in rows if row.id in movies],
+            next_cursor=next_cursor,
         )
 
-    def _check_for_actor_existence(self, actors: typing.List[entities.Actor]):
-        actors_repo = ActorsRepo()
-        found_actors = actors_repo.get_actors([actor.id for actor in actors])
-        if len(found_actors) < len(actors):
+    def read_movies_versions(self, movie_ids: typing.List[int], session: Session) -> typing.List[entities.MovieVersion]:
+        versions = []
+        for start in range(0, len(movie_ids), _IDS_CHUNK_SIZE):
+            query = session.query(models.Movie.id, models.Movie.version, models.Movie.updated_at). \
+                filter(models.Movie.id.in_(movie_ids[start:start + _IDS_CHUNK_SIZE]))
+            versions.extend(
+                entities.MovieVersion(id=row.id, version=row.version, updated_at=row.updated_at)
+                for row in query
+            )
+
+        return versions
+
+    def _get_filter_conditions(self, movies_filter: entities.MoviesFilter) -> list:
+        """
+        Relations are checked by semi-joins, so a movie is never repeated
+        and no DISTINCT is needed. Movies of an actor are few, so they are
+        selected by actor_movie index (IN). Movies of a genre are many, so
+        genres of the listed movies are checked by genre_movie index (EXISTS)
+        which allows to stop as soon as the page is filled.
+        """
+        conditions = []
+        if movies_filter.year_from is not None:
+            conditions.append(models.Movie.year >= movies_filter.year_from)
+        if movies_filter.year_to is not None:
+            conditions.append(models.Movie.year <= movies_filter.year_to)
+
+        if movies_filter.genre_ids:
+            conditions.append(exists().where(
+                models.GenreMovie.movie_id == models.Movie.id,
+                models.GenreMovie.genre_id.in_(movies_filter.genre_ids),
+            ))
+
+        for actor_id in dict.fromkeys(movies_filter.actor_ids):
+            conditions.append(models.Movie.id.in_(
+                select(models.ActorMovie.movie_id).where(models.ActorMovie.actor_id == actor_id)
+            ))
+
+        return conditions
+
+    def _get_cursor_condition(self, sort_column, descending: bool, cursor: tuple):
+        """
+        Condition of the movies after the cursor (sort value, movie id).
+        Movies without the sort value (NULL) are the first ones in ascending order
+        and the last ones in descending order.
+        """
+        value, movie_id = cursor
+        if sort_column is models.Movie.id:
+            return models.Movie.id < movie_id if descending else models.Movie.id > movie_id
+
+        if value is None:
+            if descending:
+                return and_(sort_column.is_(None), models.Movie.id < movie_id)
+            return or_(and_(sort_column.is_(None), models.Movie.id > movie_id), sort_column.isnot(None))
+
+        if descending:
+            return or_(tuple_(sort_column, models.Movie.id) < (value, movie_id), sort_column.is_(None))
+        return tuple_(sort_column, models.Movie.id) > (value, movie_id)
+
+    def _fetch_movies(self, movie_ids: typing.List[int], session: Session) -> typing.Dict[int, entities.Movie]:
+        """
+        Movies are retrieved with their actors and genres
+        by a single statement and converted to the entities
+        without creating any ORM objects.
+        Rows of movies, actors and genres are united in one result
+        where the "kind" column tells what the row is.
+        """
+        movies_query = select(
+            literal(_MOVIE_ROW).label("kind"),
+            models.Movie.id.label("movie_id"),
+            models.Movie.id.label("id"),
+            models.Movie.title.label("name"),
+            models.Movie.year.label("year"),
+            models.Movie.id.label("position"),
+            models.Movie.version.label("version"),
+            models.Movie.updated_at.label("updated_at"),
+        ).where(models.Movie.id.in_(movie_ids))
+        actors_query = select(
+            literal(_ACTOR_ROW),
+            models.ActorMovie.movie_id,
+            models.Actor.id,
+            models.Actor.name,
+            null(),
+            models.ActorMovie.id,
+            null(),
+            null(),
+        ).join_from(models.ActorMovie, models.Actor, models.Actor.id == models.ActorMovie.actor_id). \
+            where(models.ActorMovie.movie_id.in_(movie_ids))
+        genres_query = select(
+            literal(_GENRE_ROW),
+            models.GenreMovie.movie_id,
+            models.Genre.id,
+            models.Genre.name,
+            null(),
+            models.GenreMovie.id,
+            null(),
+            null(),
+        ).join_from(models.GenreMovie, models.Genre, models.Genre.id == models.GenreMovie.genre_id). \
+            where(models.GenreMovie.movie_id.in_(movie_ids))
+        # Relations are ordered by the time of their creation
+        query = union_all(movies_query, actors_query, genres_query). \
+            order_by(literal_column("kind"), literal_column("position"))
+
+        movies = {}
+        for row in session.execute(query):
+            if row.kind == _MOVIE_ROW:
+                movies[row.id] = entities.Movie(
+                    id=row.id,
+                    title=row.name,
+                    year=row.year,
+                    version=row.version,
+                    updated_at=row.updated_at,
+                )
+            elif row.kind == _ACTOR_ROW:
+                movies[row.movie_id].actors.append(entities.Actor(id=row.id, name=row.name))
+            else:
+                movies[row.movie_id].genres.append(entities.Genre(id=row.id, name=row.name))
+
+        return movies
+
+    def _apply_operation(
+        self,
+        operation: entities.MovieOperation,
+        existing_actor_ids: typing.Set[int],
+        existing_genre_ids: typing.Set[int],
+        batch: _MoviesBatch,
+    ) -> entities.MovieOperationResult:
+        """
+        Applying the operation to the batch without changing the database.
+        """
+        if operation.movie is not None:
+            try:
+                self._check_for_existence(
+                    movie=operation.movie,
+                    existing_actor_ids=existing_actor_ids,
+                    existing_genre_ids=existing_genre_ids,
+                )
+            except entities.ObjectDoesNotExistError as e:
+                return entities.MovieOperationResult(
+                    action=operation.action,
+                    status=entities.OPERATION_INVALID,
+                    id=operation.movie_id,
+                    message=str(e),
+                )
+
+        if operation.action == entities.MOVIE_CREATE:
+            movie_id = batch.next_movie_id
+            batch.next_movie_id += 1
+            operation.movie.id = movie_id
+            batch.created[movie_id] = operation.movie
+            batch.set_state(movie_id, year=operation.movie.year, actor_ids=_get_actor_ids(operation.movie))
+            return entities.MovieOperationResult(
+                action=operation.action,
+                status=entities.OPERATION_CREATED,
+                id=movie_id,
+            )
+
+        movie_id = operation.movie_id
+        if batch.states.get(movie_id) is None:
+            return entities.MovieOperationResult(
+                action=operation.action,
+                status=entities.OPERATION_NOT_FOUND,
+                id=movie_id,
+                message="Movie not found",
+            )
+
+        if operation.action == entities.MOVIE_UPDATE:
+            operation.movie.id = movie_id
+            if movie_id in batch.created:
+                batch.created[movie_id] = operation.movie
+            else:
+                batch.updated[movie_id] = operation.movie
+                batch.update_counts[movie_id] += 1
+            batch.set_state(movie_id, year=operation.movie.year, actor_ids=_get_actor_ids(operation.movie))
+            status = entities.OPERATION_UPDATED
+        else:
+            if batch.created.pop(movie_id, None) is None:
+                batch.updated.pop(movie_id, None)
+                batch.deleted.append(movie_id)
+            batch.set_state(movie_id, year=None, actor_ids=None)
+            status = entities.OPERATION_DELETED
+
+        return entities.MovieOperationResult(action=operation.action, status=status, id=movie_id)
+
+    def _save_batch(self, batch: _MoviesBatch, session: Session):
+        """
+        Saving the movies of the batch and their relations.
+        Relations of the updated and deleted movies are removed
+        and the ones of the created and updated movies are inserted.
+        """
+        now = datetime.datetime.utcnow()
+        movie_table = models.Movie.__table__
+
+        replaced_ids = batch.deleted + list(batch.updated)
+        for start in range(0, len(replaced_ids), _IDS_CHUNK_SIZE):
+            chunk = replaced_ids[start:start + _IDS_CHUNK_SIZE]
+            self._delete_actor_relations(movie_ids=chunk, session=session)
+            self._delete_genre_relations(movie_ids=chunk, session=session)
+
+        for start in range(0, len(batch.deleted), _IDS_CHUNK_SIZE):
+            chunk = batch.deleted[start:start + _IDS_CHUNK_SIZE]
+            session.execute(movie_table.delete().where(movie_table.c.id.in_(chunk)))
+
+        if batch.updated:
+            statement = movie_table.update(). \
+                where(movie_table.c.id == bindparam("movie_id")). \
+                values(
+                    title=bindparam("new_title"),
+                    year=bindparam("new_year"),
+                    version=movie_table.c.version + bindparam("updates"),
+                    updated_at=now,
+                )
+            session.execute(statement, [
+                {
+                    "movie_id": movie_id,
+                    "new_title": movie.title,
+                    "new_year": movie.year,
+                    "updates": batch.update_counts[movie_id],
+                } for movie_id, movie in batch.updated.items()
+            ])
+
+        if batch.created:
+            session.execute(movie_table.insert(), [
+                {"id": movie_id, "title": movie.title, "year": movie.year, "updated_at": now}
+                for movie_id, movie in batch.created.items()
+            ])
+
+        saved_movies = [*batch.created.values(), *batch.updated.values()]
+        actor_relations = [
+            {"actor_id": actor_id, "movie_id": movie.id}
+            for movie in saved_movies for actor_id in _get_actor_ids(movie)
+        ]
+        if actor_relations:
+            session.execute(models.ActorMovie.__table__.insert(), actor_relations)
+
+        genre_relations = [
+            {"genre_id": genre_id, "movie_id": movie.id}
+            for movie in saved_movies for genre_id in dict.fromkeys(genre.id for genre in movie.genres)
+        ]
+        if genre_relations:
+            session.execute(models.GenreMovie.__table__.insert(), genre_relations)
+
+    def _get_movies_states(
+        self,
+        movie_ids: typing.List[int],
+        session: Session,
+    ) -> typing.Dict[int, typing.Tuple[typing.Optional[int], typing.List[int]]]:
+        """
+        Getting the years and the actor ids of the existing movies
+        by two statements per chunk of ids.
+        """
+        movie_ids = list(dict.fromkeys(movie_ids))
+        states = {}
+        for start in range(0, len(movie_ids), _IDS_CHUNK_SIZE):
+            chunk = movie_ids[start:start + _IDS_CHUNK_SIZE]
+            for row in session.execute(select(models.Movie.id, models.Movie.year).where(models.Movie.id.in_(chunk))):
+                states[row.id] = (row.year, [])
+
+            query = select(models.ActorMovie.movie_id, models.ActorMovie.actor_id). \
+                where(models.ActorMovie.movie_id.in_(chunk))
+            for row in session.execute(query):
+                states[row.movie_id][1].append(row.actor_id)
+
+        return states
+
+    def _insert_movie(
+        self,
+        movie: entities.Movie,
+        changes: typing.Counter[typing.Tuple[int, int]],
+        session: Session,
+    ) -> int:
+        """
+        Inserting a movie with its relations.
+        Changes of actor_year summary table are added to the given counter.
+        Return the inserted movie id.
+        """
+        result = session.execute(models.Movie.__table__.insert().values(
+            title=movie.title,
+            year=movie.year,
+            updated_at=datetime.datetime.utcnow(),
+        ))
+        movie_id = result.inserted_primary_key[0]
+
+        actor_ids = self._create_actor_relations(movie_id=movie_id, actors=movie.actors, session=session)
+        self._create_genre_relations(movie_id=movie_id, genres=movie.genres, session=session)
+        changes.update(self._get_actor_year_changes(actor_ids=actor_ids, year=movie.year, difference=1))
+        return movie_id
+
+    def _update_movie(
+        self,
+        movie: entities.Movie,
+        changes: typing.Counter[typing.Tuple[int, int]],
+        session: Session,
+    ) -> bool:
+        """
+        Updating a movie and replacing its relations.
+        Changes of actor_year summary table are added to the given counter.
+        Return False if the movie doesn't exist.
+        """
+        row = session.query(models.Movie.year).filter(models.Movie.id == movie.id).first()
+        if row is None:
+            return False
+
+        changes.update(self._get_actor_year_changes(
+            actor_ids=self._get_movie_actor_ids(movie_id=movie.id, session=session),
+            year=row.year,
+            difference=-1,
+        ))
+
+        session.query(models.Movie).filter(models.Movie.id == movie.id).update(
+            {
+                models.Movie.title: movie.title,
+                models.Movie.year: movie.year,
+                models.Movie.version: models.Movie.version + 1,
+                models.Movie.updated_at: datetime.datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+        self._delete_actor_relations(movie_ids=[movie.id], session=session)
+        self._delete_genre_relations(movie_ids=[movie.id], session=session)
+        actor_ids = self._create_actor_relations(movie_id=movie.id, actors=movie.actors, session=session)
+        self._create_genre_relations(movie_id=movie.id, genres=movie.genres, session=session)
+        changes.update(self._get_actor_year_changes(actor_ids=actor_ids, year=movie.year, difference=1))
+        return True
+
+    def _remove_movie(
+        self,
+        movie_id: int,
+        changes: typing.Counter[typing.Tuple[int, int]],
+        session: Session,
+    ) -> bool:
+        """
+        Removing a movie with its relations.
+        Changes of actor_year summary table are added to the given counter.
+        Return False if the movie doesn't exist.
+        """
+        row = session.query(models.Movie.year).filter(models.Movie.id == movie_id).first()
+        if row is None:
+            return False
+
+        changes.update(self._get_actor_year_changes(
+            actor_ids=self._get_movie_actor_ids(movie_id=movie_id, session=session),
+            year=row.year,
+            difference=-1,
+        ))
+
+        self._delete_actor_relations(movie_ids=[movie_id], session=session)
+        self._delete_genre_relations(movie_ids=[movie_id], session=session)
+        session.query(models.Movie).filter(models.Movie.id == movie_id).delete(synchronize_session=False)
+        return True
+
+    def _get_existing_actor_ids(self, movies: typing.List[entities.Movie], session: Session) -> typing.Set[int]:
+        actor_ids = {actor.id for movie in movies for actor in movie.actors}
+        return self._get_existing_ids(model=models.Actor, ids=actor_ids, session=session)
+
+    def _get_existing_genre_ids(self, movies: typing.List[entities.Movie], session: Session) -> typing.Set[int]:
+        genre_ids = {genre.id for movie in movies for genre in movie.genres}
+        return self._get_existing_ids(model=models.Genre, ids=genre_ids, session=session)
+
+    def _get_existing_ids(self, model, ids: typing.Set[int], session: Session) -> typing.Set[int]:
+        """
+        Getting the ids of the given model objects
+        which exist in the database by one statement per chunk of ids.
+        """
+        ids = list(ids)
+        existing_ids = set()
+        for start in range(0, len(ids), _IDS_CHUNK_SIZE):
+            rows = session.query(model.id).filter(model.id.in_(ids[start:start + _IDS_CHUNK_SIZE])).all()
+            existing_ids.update(row.id for row in rows)
+
+        return existing_ids
+
+    def _check_for_existence(
+        self,
+        movie: entities.Movie,
+        existing_actor_ids: typing.Set[int],
+        existing_genre_ids: typing.Set[int],
+    ):
+        if any(actor.id not in existing_actor_ids for actor in movie.actors):
             raise entities.ObjectDoesNotExistError("Some actors don't exist")
 
-    def _check_for_genre_existence(self, genres: typing.List[entities.Genre]):
-        genres_repo = GenresRepo()
-        found_genres = genres_repo.get_genres([genre.id for genre in genres])
-        if len(found_genres) < len(genres):
+        if any(genre.id not in existing_genre_ids for genre in movie.genres):
             raise entities.ObjectDoesNotExistError("Some genres don't exist")
 
-    def _create_actor_relations(self, movie_id: int, actors: typing.List[entities.Actor], session: Session):
-        for actor in actors:
-            actor_movie_model = models.ActorMovie()
-            actor_movie_model.actor_id = actor.id
-            actor_movie_model.movie_id = movie_id
-            session.add(actor_movie_model)
+    def _create_actor_relations(
+        self,
+        movie_id: int,
+        actors: typing.List[entities.Actor],
+        session: Session,
+    ) -> typing.List[int]:
+        """
+        Relations are inserted by a single statement.
+        Duplicated actors are ignored.
+        Return the ids of related actors.
+        """
+        actor_ids = list(dict.fromkeys(actor.id for actor in actors))
+        if actor_ids:
+            session.execute(
+                models.ActorMovie.__table__.insert(),
+                [{"actor_id": actor_id, "movie_id": movie_id} for actor_id in actor_ids],
+            )
+
+        return actor_ids
 
     def _create_genre_relations(self, movie_id: int, genres: typing.List[entities.Genre], session: Session):
-        for genre in genres:
-            genre_movie_model = models.GenreMovie()
-            genre_movie_model.genre_id = genre.id
-            genre_movie_model.movie_id = movie_id
-            session.add(genre_movie_model)
+        """
+        Relations are inserted by a single statement.
+        Duplicated genres are ignored.
+        """
+        genre_ids = list(dict.fromkeys(genre.id for genre in genres))
+        if genre_ids:
+            session.execute(
+                models.GenreMovie.__table__.insert(),
+                [{"genre_id": genre_id, "movie_id": movie_id} for genre_id in genre_ids],
+            )
+
+    def _delete_actor_relations(self, movie_ids: typing.List[int], session: Session):
+        session.query(models.ActorMovie).filter(models.ActorMovie.movie_id.in_(movie_ids)). \
+            delete(synchronize_session=False)
+
+    def _delete_genre_relations(self, movie_ids: typing.List[int], session: Session):
+        session.query(models.GenreMovie).filter(models.GenreMovie.movie_id.in_(movie_ids)). \
+            delete(synchronize_session=False)
+
+    def _get_movie_actor_ids(self, movie_id: int, session: Session) -> typing.List[int]:
+        rows = session.query(models.ActorMovie.actor_id).filter(models.ActorMovie.movie_id == movie_id).all()
+        return [row.actor_id for row in rows]
+
+    def _get_actor_year_changes(
+        self,
+        actor_ids: typing.List[int],
+        year: int,
+        difference: int,
+    ) -> typing.Counter[typing.Tuple[int, int]]:
+        """
+        Making the changes of actor_year summary table
+        for adding (difference=1) or removing (difference=-1)
+        the relations of a movie of the given year with actors.
+        """
+        changes = collections.Counter()
+        for actor_id in actor_ids:
+            changes[(actor_id, year)] += difference
+        return changes
+
+    def _change_actors_aggregated(self, changes: typing.Mapping[typing.Tuple[int, int], int], session: Session):
+        actors_repo = ActorsRepo()
+        actors_repo.change_actors_aggregated(changes=changes, session=session)
+
+    def _index_movies(self, movie_ids: typing.List[int], session: Session):
+        search_repo = SearchRepo()
+        search_repo.index_movies(movie_ids=movie_ids, session=session)
+
+    def _increase_version(self, movie_ids: typing.List[int], session: Session):
+        versions_repo = VersionsRepo()
+        versions_repo.increase_version(session, movie_ids=movie_ids)
+
+
+def _get_actor_ids(movie: entities.Movie) -> typing.List[int]:
+    return list(dict.fromkeys(actor.id for actor in movie.actors))
+
+
+class AsyncMoviesRepo:
+    """
+    Asynchronous version of the reading methods of MoviesRepo
+    for the ASGI application. The queries of MoviesRepo
+    are run by the asynchronous driver.
+    """
+    def __init__(self):
+        self.movies_repo = MoviesRepo()
+
+    async def get_movie(self, movie_id: int) -> typing.Optional[entities.Movie]:
+        async with get_async_session() as session:
+
+            movies = await session.run_sync(
+                lambda sync_session: self.movies_repo.read_movies(movie_ids=[movie_id], session=sync_session)
+            )
+            return movies[0] if movies else None
+
+    async def get_movies(self, movie_ids: typing.List[int]) -> typing.List[entities.Movie]:
+        async with get_async_session() as session:
+
+            return await session.run_sync(
+                lambda sync_session: self.movies_repo.read_movies(movie_ids=movie_ids, session=sync_session)
+            )
+
+    async def get_movies_page(
+        self,
+        movies_filter: entities.MoviesFilter,
+        sort: str = "id",
+        limit: int = 20,
+        cursor: typing.Optional[tuple] = None,
+    ) -> entities.MoviesPage:
+        async with get_async_session() as session:
+
+            return await session.run_sync(
+                lambda sync_session: self.movies_repo.read_movies_page(
+                    movies_filter=movies_filter,
+                    sort=sort,
+                    limit=limit,
+                    cursor=cursor,
+                    session=sync_session,
+                )
+            )
 
-    def _delete_actor_relations(self, movie_id: int, session: Session):
-        session.query(models.ActorMovie).filter(models.ActorMovie.movie_id == movie_id).delete()
+    async def get_movies_versions(self, movie_ids: typing.List[int]) -> typing.List[entities.MovieVersion]:
+        async with get_async_session() as session:
 
-    def _delete_genre_relations(self, movie_id: int, session: Session):
-        session.query(models.GenreMovie).filter(models.GenreMovie.movie_id == movie_id).delete()
+            return await session.run_sync(
+                lambda sync_session: self.movies_repo.read_movies_versions(movie_ids=movie_ids, session=sync_session)
+            )
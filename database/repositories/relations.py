@@ -0,0 +1,117 @@
+import array
+import itertools
+import typing
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from database.connection import get_session
+from database import models
+import entities
+
+# The maximum number of ids passed to a single statement
+_IDS_CHUNK_SIZE = 900
+# The number of rows converted to the columns at once
+_PARTITION_SIZE = 10000
+
+
+class RelationsRepo:
+    """
+    Reading movies with their relations as compact integer columns
+    for the structures kept in memory, e.g. the analytics.
+    """
+    def get_relations(self) -> entities.Relations:
+        """
+        Reading all movies and relations.
+        The version is read before the data, so the data
+        may be newer than the version but never older.
+        """
+        with get_session(read_only=True) as session:
+
+            version = session.query(models.DataVersion.version).scalar() or 0
+            return self.read_relations(version=version, movie_ids=None, session=session)
+
+    def get_movies_relations(self, movie_ids: typing.List[int], version: int) -> entities.Relations:
+        """
+        Reading the given movies and their relations,
+        e.g. the ones changed after some version (see VersionsRepo.get_changes).
+        Deleted movies are missing in the result.
+        """
+        with get_session(read_only=True) as session:
+
+            return self.read_relations(version=version, movie_ids=sorted(set(movie_ids)), session=session)
+
+    def read_relations(
+        self,
+        version: int,
+        movie_ids: typing.Optional[typing.List[int]],
+        session: Session,
+    ) -> entities.Relations:
+        """
+        Reading the given or all (None) movies in the given session,
+        e.g. of the benchmarks.
+        """
+        movie_columns = self._read_columns(
+            select(models.Movie.id, func.coalesce(models.Movie.year, 0)),
+            models.Movie.id,
+            movie_ids=movie_ids,
+            session=session,
+        )
+        actor_columns = self._read_columns(
+            select(models.ActorMovie.movie_id, models.ActorMovie.actor_id),
+            models.ActorMovie.movie_id,
+            movie_ids=movie_ids,
+            session=session,
+        )
+        genre_columns = self._read_columns(
+            select(models.GenreMovie.movie_id, models.GenreMovie.genre_id),
+            models.GenreMovie.movie_id,
+            movie_ids=movie_ids,
+            session=session,
+        )
+
+        return entities.Relations(
+            version=version,
+            movie_ids=movie_columns[0],
+            movie_years=movie_columns[1],
+            actor_movie_ids=actor_columns[0],
+            actor_ids=actor_columns[1],
+            genre_movie_ids=genre_columns[0],
+            genre_ids=genre_columns[1],
+        )
+
+    def _read_columns(
+        self,
+        query,
+        movie_id_column,
+        movie_ids: typing.Optional[typing.List[int]],
+        session: Session,
+    ) -> typing.Tuple[array.array, array.array]:
+        """
+        Reading two integer columns ordered by movie id
+        of all movies or of the given ones (ordered by id).
+        Rows are fetched by the DBAPI cursor in partitions without keeping them all in memory,
+        as SQLAlchemy processing of every row takes much more time than the query itself.
+        """
+        if movie_ids is None:
+            queries = [query.order_by(movie_id_column)]
+        else:
+            queries = [
+                query.where(movie_id_column.in_(movie_ids[start:start + _IDS_CHUNK_SIZE])).order_by(movie_id_column)
+                for start in range(0, len(movie_ids), _IDS_CHUNK_SIZE)
+            ]
+
+        connection = session.connection()
+        values = array.array("i")
+        for chunk_query in queries:
+            # All parameters are integers, so they are rendered in the statement
+            statement = chunk_query.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+            cursor = connection.connection.cursor()
+            try:
+                cursor.execute(str(statement))
+                for rows in iter(lambda: cursor.fetchmany(_PARTITION_SIZE), []):
+                    values.extend(itertools.chain.from_iterable(rows))
+            finally:
+                cursor.close()
+
+        return values[0::2], values[1::2]
@@ -0,0 +1,143 @@
+import re
+import typing
+
+from sqlalchemy import Table, literal_column, select, text
+from sqlalchemy.orm import Session
+
+from database.connection import get_session
+from database import models
+import entities
+import settings
+
+# The maximum number of ids passed to a single statement
+_IDS_CHUNK_SIZE = 900
+# Words of the search queries, other characters are ignored
+_WORD = re.compile(r"\w+")
+# Longer queries are cut as every word makes the query slower
+_MAX_QUERY_WORDS = 10
+
+
+class SearchRepo:
+    """
+    Full-text search of movies by titles and actors by names
+    in SQLite FTS5 tables (see database.models.search).
+    The index is not updated automatically: the code changing
+    movie titles or actors must call the index methods
+    in the same transaction.
+    """
+    def search(self, query: str, offset: int, limit: int) -> entities.SearchResults:
+        """
+        Searching for the movies and the actors having all words of the query.
+        Every word matches the words starting with it,
+        e.g. "star wa" finds "Star Wars".
+        All matches are ordered by relevance, only the most relevant of them
+        are returned (see settings.SEARCH_MAX_RESULTS), the pages beyond them are empty.
+        """
+        with get_session(read_only=True) as session:
+
+            return self.read_search_results(query=query, offset=offset, limit=limit, session=session)
+
+    def read_search_results(self, query: str, offset: int, limit: int, session: Session) -> entities.SearchResults:
+        """
+        The queries of search run in the given session, e.g. of the benchmarks.
+        """
+        results = entities.SearchResults(movies=[], actors=[], offset=offset, limit=limit)
+        match_query = _make_match_query(query)
+        limit = min(limit, settings.SEARCH_MAX_RESULTS - offset)
+        if match_query is None or limit <= 0:
+            return results
+
+        hits = self._get_hits_query(models.movie_fts, models.movie_fts.c.title, match_query, offset, limit)
+        rows = session.execute(
+            select(models.Movie.id, models.Movie.title, models.Movie.year).
+            join(hits, hits.c.rowid == models.Movie.id).
+            order_by(hits.c.rank, hits.c.rowid)
+        )
+        results.movies = [entities.Movie(id=row.id, title=row.title, year=row.year) for row in rows]
+
+        hits = self._get_hits_query(models.actor_fts, models.actor_fts.c.name, match_query, offset, limit)
+        rows = session.execute(
+            select(models.Actor.id, models.Actor.name).
+            join(hits, hits.c.rowid == models.Actor.id).
+            order_by(hits.c.rank, hits.c.rowid)
+        )
+        results.actors = [entities.Actor(id=row.id, name=row.name) for row in rows]
+
+        return results
+
+    def index_movies(self, movie_ids: typing.List[int], session: Session):
+        """
+        Updating the index of the given movies after they are
+        inserted, changed or deleted.
+        """
+        self._index(models.movie_fts, models.Movie.title, ids=movie_ids, session=session)
+
+    def index_actors(self, actor_ids: typing.List[int], session: Session):
+        """
+        Updating the index of the given actors after they are
+        inserted, changed or deleted.
+        """
+        self._index(models.actor_fts, models.Actor.name, ids=actor_ids, session=session)
+
+    def delete_missing_actors(self, session: Session):
+        """
+        Removing the actors deleted from the database from the index.
+        """
+        session.execute(
+            models.actor_fts.delete().where(models.actor_fts.c.rowid.notin_(select(models.Actor.id)))
+        )
+
+    def rebuild_index(self, session: Session):
+        """
+        Filling the index from scratch by the data of movie and actor tables.
+        """
+        for table, column in ((models.movie_fts, models.Movie.title), (models.actor_fts, models.Actor.name)):
+            session.execute(table.delete())
+            session.execute(
+                table.insert().from_select(
+                    ["rowid", column.key],
+                    select(column.class_.id, column).where(column.isnot(None)),
+                )
+            )
+            # Merging the parts of the index created by the inserts makes queries faster
+            session.execute(text(f"INSERT INTO {table.name} ({table.name}) VALUES ('optimize')"))
+
+    def _index(self, table: Table, column, ids: typing.List[int], session: Session):
+        model = column.class_
+        ids = list(dict.fromkeys(ids))
+        for start in range(0, len(ids), _IDS_CHUNK_SIZE):
+            chunk = ids[start:start + _IDS_CHUNK_SIZE]
+            session.execute(table.delete().where(table.c.rowid.in_(chunk)))
+            session.execute(
+                table.insert().from_select(
+                    ["rowid", column.key],
+                    select(model.id, column).where(model.id.in_(chunk), column.isnot(None)),
+                )
+            )
+
+    def _get_hits_query(self, table: Table, column, match_query: str, offset: int, limit: int):
+        """
+        Ids of the matching rows ordered by BM25 relevance.
+        All matches are ranked, but only offset + limit of the best ones
+        are kept by SQLite while sorting, so the memory and the sorting time
+        are bounded by the page end (see settings.SEARCH_MAX_RESULTS).
+        """
+        rank = literal_column(f"{table.name}.rank")
+        return select(table.c.rowid, rank.label("rank")). \
+            where(column.match(match_query)). \
+            order_by(rank, table.c.rowid). \
+            limit(limit). \
+            offset(offset). \
+            subquery()
+
+
+def _make_match_query(query: str) -> typing.Optional[str]:
+    """
+    Making FTS5 query of the words of the user query.
+    Words are quoted so they are never treated as FTS5 syntax.
+    """
+    words = _WORD.findall(query)[:_MAX_QUERY_WORDS]
+    if not words:
+        return None
+
+    return " ".join(f'"{word}"*' for word in words)
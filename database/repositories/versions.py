@@ -0,0 +1,100 @@
+import typing
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from database.aio_connection import get_async_session
+from database.connection import get_session
+from database import models
+import entities
+import settings
+
+
+class VersionsRepo:
+    def get_version(self, read_only: bool = True) -> int:
+        """
+        Getting the current version of the data.
+        If read_only is False the version is read from the primary database
+        even if replicas are configured.
+        """
+        with get_session(read_only=read_only) as session:
+
+            return self.read_version(session)
+
+    def increase_version(self, session: Session, movie_ids: typing.Optional[typing.Iterable[int]] = None):
+        """
+        Increasing the version of the data.
+        It must be called in the same transaction
+        which changes the data.
+        The changed movies are logged with the new version,
+        if they are not given the changes of all versions up to the new one
+        are considered unknown.
+        """
+        table = models.DataVersion.__table__
+        if movie_ids is None:
+            session.execute(table.update().values(version=table.c.version + 1, changes_since=table.c.version + 1))
+            return
+
+        session.execute(table.update().values(version=table.c.version + 1))
+        version = self.read_version(session)
+
+        change_table = models.DataChange.__table__
+        changes = [{"version": version, "movie_id": movie_id} for movie_id in dict.fromkeys(movie_ids)]
+        if changes:
+            session.execute(change_table.insert(), changes)
+
+        # The log is truncated, older versions are treated as unknown changes
+        oldest_version = version - settings.DATA_CHANGES_KEPT_VERSIONS
+        session.execute(change_table.delete().where(change_table.c.version <= oldest_version))
+        session.execute(
+            table.update().where(table.c.changes_since < oldest_version).values(changes_since=oldest_version)
+        )
+
+    def get_changes(self, since_version: int) -> typing.Optional[entities.DataChanges]:
+        """
+        Getting the ids of the movies changed after the given version.
+        Return None if the changes are unknown, e.g. the data is reloaded
+        or the log is truncated.
+        """
+        with get_session(read_only=True) as session:
+
+            return self.read_changes(since_version=since_version, session=session)
+
+    def read_changes(self, since_version: int, session: Session) -> typing.Optional[entities.DataChanges]:
+        """
+        The read_* methods are the queries of the public methods
+        run in the given session, e.g. of the asynchronous driver (see AsyncVersionsRepo).
+        """
+        row = session.query(models.DataVersion.version, models.DataVersion.changes_since).first()
+        if row is None or not row.changes_since <= since_version <= row.version:
+            return None
+
+        query = select(models.DataChange.movie_id). \
+            where(models.DataChange.version > since_version, models.DataChange.version <= row.version). \
+            group_by(models.DataChange.movie_id)
+        return entities.DataChanges(version=row.version, movie_ids=list(session.execute(query).scalars()))
+
+    def read_version(self, session: Session) -> int:
+        version = session.query(models.DataVersion.version).scalar()
+        return version or 0
+
+
+class AsyncVersionsRepo:
+    """
+    Asynchronous version of VersionsRepo for the ASGI application.
+    """
+    def __init__(self):
+        self.versions_repo = VersionsRepo()
+
+    async def get_version(self) -> int:
+        async with get_async_session() as session:
+
+            return await session.run_sync(self.versions_repo.read_version)
+
+    async def get_changes(self, since_version: int) -> typing.Optional[entities.DataChanges]:
+        async with get_async_session() as session:
+
+            return await session.run_sync(lambda sync_session: self.versions_repo.read_changes(
+                since_version=since_version,
+                session=sync_session,
+            ))
@@ -0,0 +1,222 @@
+import collections
+import dataclasses
+import datetime
+import typing
+
+from sqlalchemy.orm import Session
+
+from database.repositories import ActorsRepo, SearchRepo, VersionsRepo
+from database import models
+
+# The maximum number of ids passed to a single statement
+_IDS_CHUNK_SIZE = 900
+
+
+@dataclasses.dataclass
+class SyncResult:
+    movies_inserted: int = 0
+    movies_updated: int = 0
+    movies_deleted: int = 0
+    actors_inserted: int = 0
+    actors_deleted: int = 0
+    genres_inserted: int = 0
+    genres_deleted: int = 0
+
+
+class MoviesSynchronizer:
+    """
+    Making the database contain the same movies as a file
+    by applying only the difference between them
+    instead of removing all data and loading it again.
+
+    Movies are matched by their title and year,
+    actors and genres are matched by their names.
+    Matched objects keep their ids, movies which relations
+    differ are updated, new objects are inserted
+    and objects absent in the file are removed.
+    All changes are made in the current transaction of the session.
+    """
+    def __init__(self, session: Session):
+        self.session = session
+        self.result = SyncResult()
+        # Time of the change of all inserted and updated movies
+        self.updated_at = datetime.datetime.utcnow()
+
+        self.actor_ids: typing.Dict[str, int] = {}
+        self.genre_ids: typing.Dict[str, int] = {}
+        # Ids of not yet matched movies by their (title, year)
+        self.movie_ids: typing.Dict[typing.Tuple[str, int], typing.Deque[int]] = {}
+        self.movie_years: typing.Dict[int, int] = {}
+        self.movie_actor_ids: typing.Dict[int, typing.List[int]] = collections.defaultdict(list)
+        self.movie_genre_ids: typing.Dict[int, typing.List[int]] = collections.defaultdict(list)
+
+        # Relations of the inserted and updated movies
+        self.replaced_movie_ids: typing.List[int] = []
+        self.actor_movies: typing.List[dict] = []
+        self.genre_movies: typing.List[dict] = []
+        # Changes of actor_year summary table
+        self.changes: typing.Counter[typing.Tuple[int, int]] = collections.Counter()
+        # Movies and actors changing the search index
+        self.indexed_movie_ids: typing.List[int] = []
+        self.indexed_actor_ids: typing.List[int] = []
+
+    def sync(self, raw_movies: typing.Iterable[dict]) -> SyncResult:
+        self._read_database()
+
+        for raw_movie in raw_movies:
+            self._sync_movie(raw_movie)
+
+        self._delete_unmatched_movies()
+        self._save_relations()
+        self._delete_unused_actors_and_genres()
+        ActorsRepo().change_actors_aggregated(changes=self.changes, session=self.session)
+        self._update_search_index()
+        VersionsRepo().increase_version(self.session, movie_ids=self.replaced_movie_ids + self.indexed_movie_ids)
+
+        return self.result
+
+    def _read_database(self):
+        """
+        Reading the current state of the database.
+        Only ids, names and years are read without creating ORM objects.
+        """
+        for actor_id, name in self.session.query(models.Actor.id, models.Actor.name).order_by(models.Actor.id):
+            self.actor_ids.setdefault(name, actor_id)
+
+        for genre_id, name in self.session.query(models.Genre.id, models.Genre.name).order_by(models.Genre.id):
+            self.genre_ids.setdefault(name, genre_id)
+
+        query = self.session.query(models.Movie.id, models.Movie.title, models.Movie.year).order_by(models.Movie.id)
+        for movie_id, title, year in query:
+            self.movie_ids.setdefault((title, year), collections.deque()).append(movie_id)
+            self.movie_years[movie_id] = year
+
+        query = self.session.query(models.ActorMovie.movie_id, models.ActorMovie.actor_id). \
+            order_by(models.ActorMovie.id)
+        for movie_id, actor_id in query:
+            self.movie_actor_ids[movie_id].append(actor_id)
+
+        query = self.session.query(models.GenreMovie.movie_id, models.GenreMovie.genre_id). \
+            order_by(models.GenreMovie.id)
+        for movie_id, genre_id in query:
+            self.movie_genre_ids[movie_id].append(genre_id)
+
+    def _sync_movie(self, raw_movie: dict):
+        actor_ids = [self._get_actor_id(name) for name in dict.fromkeys(raw_movie["cast"])]
+        genre_ids = [self._get_genre_id(name) for name in dict.fromkeys(raw_movie["genres"])]
+        year = raw_movie["year"]
+
+        matched_ids = self.movie_ids.get((raw_movie["title"], year))
+        if matched_ids:
+            movie_id = matched_ids.popleft()
+            old_actor_ids = self.movie_actor_ids.pop(movie_id, [])
+            old_genre_ids = self.movie_genre_ids.pop(movie_id, [])
+            del self.movie_years[movie_id]
+            if old_actor_ids == actor_ids and old_genre_ids == genre_ids:
+                return
+
+            self.replaced_movie_ids.append(movie_id)
+            self._count_changes(actor_ids=old_actor_ids, year=year, difference=-1)
+            self.result.movies_updated += 1
+        else:
+            result = self.session.execute(
+                models.Movie.__table__.insert().values(title=raw_movie["title"], year=year, updated_at=self.updated_at)
+            )
+            movie_id = result.inserted_primary_key[0]
+            self.indexed_movie_ids.append(movie_id)
+            self.result.movies_inserted += 1
+
+        self._count_changes(actor_ids=actor_ids, year=year, difference=1)
+        self.actor_movies.extend({"actor_id": actor_id, "movie_id": movie_id} for actor_id in actor_ids)
+        self.genre_movies.extend({"genre_id": genre_id, "movie_id": movie_id} for genre_id in genre_ids)
+
+    def _get_actor_id(self, name: str) -> int:
+        actor_id = self.actor_ids.get(name)
+        if actor_id is None:
+            result = self.session.execute(models.Actor.__table__.insert().values(name=name))
+            actor_id = self.actor_ids[name] = result.inserted_primary_key[0]
+            self.indexed_actor_ids.append(actor_id)
+            self.result.actors_inserted += 1
+
+        return actor_id
+
+    def _get_genre_id(self, name: str) -> int:
+        genre_id = self.genre_ids.get(name)
+        if genre_id is None:
+            result = self.session.execute(models.Genre.__table__.insert().values(name=name))
+            genre_id = self.genre_ids[name] = result.inserted_primary_key[0]
+            self.result.genres_inserted += 1
+
+        return genre_id
+
+    def _count_changes(self, actor_ids: typing.List[int], year: int, difference: int):
+        for actor_id in actor_ids:
+            self.changes[(actor_id, year)] += difference
+
+    def _delete_unmatched_movies(self):
+        """
+        Removing the movies which are not found in the file.
+        """
+        movie_ids = list(self.movie_years)
+        for movie_id in movie_ids:
+            self._count_changes(
+                actor_ids=self.movie_actor_ids.get(movie_id, []),
+                year=self.movie_years[movie_id],
+                difference=-1,
+            )
+
+        self._delete_relations(movie_ids)
+        for chunk in _chunks(movie_ids):
+            self.session.query(models.Movie).filter(models.Movie.id.in_(chunk)).delete(synchronize_session=False)
+
+        self.indexed_movie_ids.extend(movie_ids)
+        self.result.movies_deleted = len(movie_ids)
+
+    def _save_relations(self):
+        """
+        Replacing the relations of inserted and updated movies.
+        Versions of the updated movies are increased.
+        """
+        self._delete_relations(self.replaced_movie_ids)
+        for chunk in _chunks(self.replaced_movie_ids):
+            self.session.query(models.Movie).filter(models.Movie.id.in_(chunk)).update(
+                {models.Movie.version: models.Movie.version + 1, models.Movie.updated_at: self.updated_at},
+                synchronize_session=False,
+            )
+        if self.actor_movies:
+            self.session.execute(models.ActorMovie.__table__.insert(), self.actor_movies)
+        if self.genre_movies:
+            self.session.execute(models.GenreMovie.__table__.insert(), self.genre_movies)
+
+    def _delete_relations(self, movie_ids: typing.List[int]):
+        for chunk in _chunks(movie_ids):
+            self.session.query(models.ActorMovie).filter(models.ActorMovie.movie_id.in_(chunk)). \
+                delete(synchronize_session=False)
+            self.session.query(models.GenreMovie).filter(models.GenreMovie.movie_id.in_(chunk)). \
+                delete(synchronize_session=False)
+
+    def _delete_unused_actors_and_genres(self):
+        """
+        Removing actors and genres which have no movies any more.
+        """
+        self.result.actors_deleted = self.session.query(models.Actor). \
+            filter(~models.Actor.id.in_(self.session.query(models.ActorMovie.actor_id))). \
+            delete(synchronize_session=False)
+        self.result.genres_deleted = self.session.query(models.Genre). \
+            filter(~models.Genre.id.in_(self.session.query(models.GenreMovie.genre_id))). \
+            delete(synchronize_session=False)
+
+    def _update_search_index(self):
+        """
+        Titles and names of the matched objects are the same,
+        so only inserted and deleted objects change the index.
+        """
+        search_repo = SearchRepo()
+        search_repo.index_movies(movie_ids=self.indexed_movie_ids, session=self.session)
+        search_repo.index_actors(actor_ids=self.indexed_actor_ids, session=self.session)
+        search_repo.delete_missing_actors(self.session)
+
+
+def _chunks(ids: typing.List[int]) -> typing.Iterator[typing.List[int]]:
+    for start in range(0, len(ids), _IDS_CHUNK_SIZE):
+        yield ids[start:start + _IDS_CHUNK_SIZE]
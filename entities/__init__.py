@@ -1,4 +1,28 @@
-from .cast import Actor, ActorAggregated, ActorsAggregatedPaginated
-from .errors import ObjectDoesNotExistError
-from .genre import Genre
-from .movie import Movie
+from .cast import Actor, ActorAggregated, ActorsAggregatedPaginated, ActorsPage, ActorsResolution
+from .errors import CacheUnavailableError, ObjectDoesNotExistError
+from .genre import Genre, GenresResolution
+from .graph import ActorsPath, CoStar
+from .movie import (
+    MOVIE_ACTIONS,
+    MOVIE_CREATE,
+    MOVIE_DELETE,
+    MOVIE_SORTS,
+    MOVIE_UPDATE,
+    OPERATION_CREATED,
+    OPERATION_DELETED,
+    OPERATION_INVALID,
+    OPERATION_NOT_FOUND,
+    OPERATION_UPDATED,
+    Movie,
+    MovieOperation,
+    MovieOperationResult,
+    MoviesBatch,
+    MoviesFilter,
+    MoviesPage,
+    MovieVersion,
+)
+from .pagination import TOTAL_CACHED, TOTAL_EXACT, TOTAL_MODES, TOTAL_NONE
+from .relations import DataChanges, Relations
+from .search import SearchResults
+from .stats import ACTOR_STATS_ORDER_MOVIES, ACTOR_STATS_ORDER_SPAN, ACTOR_STATS_ORDERS, ActorStats, GenreYearCount
+from .system import CacheStats, PoolMetrics
@@ -8,6 +8,23 @@ class Actor:
     name: typing.Optional[str] = None
 
 
+@dataclasses.dataclass
+class ActorsPage:
+    actors: typing.List[Actor]
+    # (actor name, actor id) of the last actor if there are more actors after this page
+    next_cursor: typing.Optional[typing.Tuple[str, int]] = None
+
+
+@dataclasses.dataclass
+class ActorsResolution:
+    """
+    Actors found by their names in the order of the names.
+    All actors having the same name are found.
+    """
+    actors: typing.List[Actor]
+    missing_names: typing.List[str]
+
+
 @dataclasses.dataclass
 class ActorAggregated:
     name: str
@@ -18,6 +35,9 @@ class ActorAggregated:
 @dataclasses.dataclass
 class ActorsAggregatedPaginated:
     actors: typing.List[ActorAggregated]
-    total: int
+    total: typing.Optional[int]
     limit: int
-    offset: int
+    offset: typing.Optional[int]
+    # (actor name, actor id, year) of the last item
+    # if there are more items after this page
+    next_cursor: typing.Optional[typing.Tuple[str, int, int]] = None
@@ -4,3 +4,7 @@ class ApplicationError(Exception):
 
 class ObjectDoesNotExistError(ApplicationError):
     """Object does not exist"""
+
+
+class CacheUnavailableError(ApplicationError):
+    """Cache is not available"""
@@ -6,3 +6,12 @@ import typing
 class Genre:
     id: typing.Optional[int] = None
     name: typing.Optional[str] = None
+
+
+@dataclasses.dataclass
+class GenresResolution:
+    """
+    Genres found by their names in the order of the names.
+    """
+    genres: typing.List[Genre]
+    missing_names: typing.List[str]
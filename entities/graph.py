@@ -0,0 +1,19 @@
+import dataclasses
+import typing
+
+
+@dataclasses.dataclass
+class CoStar:
+    actor_id: int
+    # Number of the movies with both actors
+    movies_number: int
+
+
+@dataclasses.dataclass
+class ActorsPath:
+    """
+    The shortest chain of actors connecting two actors:
+    actor_ids[i] and actor_ids[i + 1] play in movie_ids[i].
+    """
+    actor_ids: typing.List[int]
+    movie_ids: typing.List[int]
@@ -1,4 +1,5 @@
 import dataclasses
+import datetime
 import typing
 
 from .cast import Actor
@@ -12,3 +13,82 @@ class Movie:
     id: typing.Optional[int] = None
     actors: typing.List[Actor] = dataclasses.field(default_factory=list)
     genres: typing.List[Genre] = dataclasses.field(default_factory=list)
+    # State of the saved movie, see MovieVersion
+    version: typing.Optional[int] = None
+    updated_at: typing.Optional[datetime.datetime] = None
+
+
+@dataclasses.dataclass(frozen=True)
+class MovieVersion:
+    """
+    State of the saved movie which changes on every change of the movie.
+    """
+    id: int
+    version: int
+    updated_at: datetime.datetime
+
+
+@dataclasses.dataclass
+class MoviesBatch:
+    movies: typing.List[Movie]
+    # Requested ids of the movies which are not found
+    missing_ids: typing.List[int]
+
+
+# Orders of the movies lists, "-" prefix means the descending order.
+# Movies with the same values are ordered by their ids.
+MOVIE_SORTS = ("id", "-id", "year", "-year", "title", "-title")
+
+
+@dataclasses.dataclass
+class MoviesFilter:
+    """
+    Conditions of the movies lists, all of them must be met.
+    """
+    year_from: typing.Optional[int] = None
+    year_to: typing.Optional[int] = None
+    # Movies having any of the genres
+    genre_ids: typing.List[int] = dataclasses.field(default_factory=list)
+    # Movies having all of the actors
+    actor_ids: typing.List[int] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass
+class MoviesPage:
+    movies: typing.List[Movie]
+    # (sort value, movie id) of the last movie
+    # if there are more movies after this page
+    next_cursor: typing.Optional[tuple] = None
+
+
+# Actions of the movie operations
+MOVIE_CREATE = "create"
+MOVIE_UPDATE = "update"
+MOVIE_DELETE = "delete"
+
+MOVIE_ACTIONS = (MOVIE_CREATE, MOVIE_UPDATE, MOVIE_DELETE)
+
+# Statuses of the applied movie operations
+OPERATION_CREATED = "created"
+OPERATION_UPDATED = "updated"
+OPERATION_DELETED = "deleted"
+OPERATION_NOT_FOUND = "not_found"
+OPERATION_INVALID = "invalid"
+
+
+@dataclasses.dataclass
+class MovieOperation:
+    # One of MOVIE_ACTIONS
+    action: str
+    # Id of the updated or deleted movie
+    movie_id: typing.Optional[int] = None
+    # New data of the created or updated movie
+    movie: typing.Optional[Movie] = None
+
+
+@dataclasses.dataclass
+class MovieOperationResult:
+    action: str
+    status: str
+    id: typing.Optional[int] = None
+    message: typing.Optional[str] = None
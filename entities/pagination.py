@@ -0,0 +1,9 @@
+# The ways of getting the total number of items of paginated lists.
+# Exact number is counted on every request.
+TOTAL_EXACT = "exact"
+# The number is counted once and reused until the data is changed.
+TOTAL_CACHED = "cached"
+# The number is not returned at all.
+TOTAL_NONE = "none"
+
+TOTAL_MODES = (TOTAL_EXACT, TOTAL_CACHED, TOTAL_NONE)
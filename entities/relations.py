@@ -0,0 +1,30 @@
+import array
+import dataclasses
+import typing
+
+
+@dataclasses.dataclass
+class Relations:
+    """
+    Movies and their relations as compact columns of 32-bit integers
+    ordered by movie id, e.g. movie_ids[i] has year movie_years[i]
+    and actor_movie_ids[j] plays actor_ids[j].
+    Years of the movies without a year are 0.
+    """
+    version: int
+    movie_ids: array.array
+    movie_years: array.array
+    actor_movie_ids: array.array
+    actor_ids: array.array
+    genre_movie_ids: array.array
+    genre_ids: array.array
+
+
+@dataclasses.dataclass
+class DataChanges:
+    """
+    Ids of the movies changed after some version of the data
+    up to the current version, deleted movies included.
+    """
+    version: int
+    movie_ids: typing.List[int]
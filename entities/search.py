@@ -0,0 +1,17 @@
+import dataclasses
+import typing
+
+from .cast import Actor
+from .movie import Movie
+
+
+@dataclasses.dataclass
+class SearchResults:
+    """
+    Pages of the movies and the actors matching a search query
+    ordered by relevance. Found movies have no relations.
+    """
+    movies: typing.List[Movie]
+    actors: typing.List[Actor]
+    offset: int
+    limit: int
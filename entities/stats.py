@@ -0,0 +1,25 @@
+import dataclasses
+import typing
+
+# Orders of the top actors: by the number of movies or by the years between the first and the last movies
+ACTOR_STATS_ORDER_MOVIES = "movies"
+ACTOR_STATS_ORDER_SPAN = "span"
+ACTOR_STATS_ORDERS = (ACTOR_STATS_ORDER_MOVIES, ACTOR_STATS_ORDER_SPAN)
+
+
+@dataclasses.dataclass
+class GenreYearCount:
+    genre_id: int
+    year: int
+    number: int
+
+
+@dataclasses.dataclass
+class ActorStats:
+    actor_id: int
+    movies_number: int
+    # Years of the first and the last movies, None if no movie has a year
+    first_year: typing.Optional[int]
+    last_year: typing.Optional[int]
+    # Number of distinct actors playing with the actor
+    co_stars_number: int
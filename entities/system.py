@@ -0,0 +1,29 @@
+import dataclasses
+import typing
+
+
+@dataclasses.dataclass
+class PoolMetrics:
+    # Description of the pool state given by SQLAlchemy
+    status: str
+    # Current state of the pool if it keeps connections
+    size: typing.Optional[int]
+    checked_in: typing.Optional[int]
+    checked_out: typing.Optional[int]
+    overflow: typing.Optional[int]
+    # Counters of the pool events since the start of the process
+    connects: int
+    checkouts: int
+    invalidations: int
+
+
+@dataclasses.dataclass
+class CacheStats:
+    name: str
+    # Current and maximum number of the cached items
+    size: int
+    max_size: int
+    # Counters since the start of the process
+    hits: int
+    misses: int
+    evictions: int
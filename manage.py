@@ -1,10 +1,34 @@
 import argparse
-import json
+import dataclasses
+import os
+import sys
 import typing
 
+from sqlalchemy.orm import Session
+
 from api import create_app
+from api.server import PreforkServer
 from database.connection import get_session
-from database.models import Actor, ActorMovie, Genre, GenreMovie, Movie
+from database.dumps import iter_raw_movies, write_raw_movies
+from database.loader import DEFAULT_CHUNK_SIZE, MoviesLoader, reload_sqlite_fast
+from database.models import Actor, ActorMovie, ActorYear, Genre, GenreMovie, Movie
+from database.repositories import ActorsRepo, SearchRepo, VersionsRepo
+from database.sync import MoviesSynchronizer
+import services
+from services.cache import CacheServer, parse_address
+import settings
+
+
+def _delete_data(session: Session):
+    """
+    Removing all movies data in the current transaction.
+    """
+    session.query(ActorYear).delete()
+    session.query(ActorMovie).delete()
+    session.query(Actor).delete()
+    session.query(GenreMovie).delete()
+    session.query(Genre).delete()
+    session.query(Movie).delete()
 
 
 def _purge():
@@ -13,11 +37,9 @@ def _purge():
     """
     with get_session() as session:
         session.begin()
-        session.query(ActorMovie).delete()
-        session.query(Actor).delete()
-        session.query(GenreMovie).delete()
-        session.query(Genre).delete()
-        session.query(Movie).delete()
+        _delete_data(session)
+        SearchRepo().rebuild_index(session)
+        VersionsRepo().increase_version(session)
         session.commit()
 
 
@@ -25,86 +47,137 @@ def purge(_):
     _purge()
 
 
-def _reload(file: typing.TextIO):
+def _print_progress(movies_number: int):
+    print(f"Loaded {movies_number} movies", file=sys.stderr)
+
+
+def _reload(file: typing.TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
     """
     Removing all data from the database
     and uploading movies data from the file to it.
+    The file is read and saved in chunks
+    so the whole file is never kept in memory.
+    All changes are made in a single transaction.
     """
-    # Removing all data
-    _purge()
-
-    raw_movies = json.loads(file.read())
-
-    # Collecting the data from the file.
-    # Object ids are set here instead of
-    # using autogenerated database values
-    # as it allows to create relations between
-    # objects before their insert.
-    # The database is empty so it doesn't make collisions.
-    actors = {}
-    genres = {}
-    actor_movies = []
-    genre_movies = []
-    movies = []
-
-    for raw_movie in raw_movies:
-
-        movie = Movie()
-        movie.id = len(movies) + 1
-        movie.title = raw_movie["title"]
-        movie.year = raw_movie["year"]
-        movies.append(movie)
-
-        for actor_name in raw_movie["cast"]:
-
-            actor = actors.get(actor_name)
-            if actor is None:
-                actor = Actor()
-                actor.id = len(actors) + 1
-                actor.name = actor_name
-                actors[actor_name] = actor
-
-            actor_movie = ActorMovie()
-            actor_movie.actor_id = actor.id
-            actor_movie.movie_id = movie.id
-            actor_movies.append(actor_movie)
-
-        for genre_name in raw_movie["genres"]:
-
-            genre = genres.get(genre_name)
-            if genre is None:
-                genre = Genre()
-                genre.id = len(genres) + 1
-                genre.name = genre_name
-                genres[genre_name] = genre
-
-            genre_movie = GenreMovie()
-            genre_movie.genre_id = genre.id
-            genre_movie.movie_id = movie.id
-            genre_movies.append(genre_movie)
-
-    # Saving collected objects to the database
     with get_session() as session:
 
         session.begin()
-        session.bulk_save_objects(actors.values())
-        session.bulk_save_objects(genres.values())
-        session.bulk_save_objects(movies)
-        session.bulk_save_objects(actor_movies)
-        session.bulk_save_objects(genre_movies)
+        # Removing all data
+        _delete_data(session)
+
+        loader = MoviesLoader(connection=session.connection(), chunk_size=chunk_size, progress=_print_progress)
+        loader.load(iter_raw_movies(file))
+
+        ActorsRepo().rebuild_actors_aggregated(session)
+        SearchRepo().rebuild_index(session)
+        VersionsRepo().increase_version(session)
         session.commit()
 
 
+def _reload_fast(file: typing.TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Uploading movies data from the file to a new SQLite database
+    which replaces the current one when it's ready.
+    """
+    reload_sqlite_fast(iter_raw_movies(file), chunk_size=chunk_size, progress=_print_progress)
+
+
 def reload(args: argparse.Namespace):
-    _reload(args.file)
+    if args.fast:
+        _reload_fast(args.file, chunk_size=args.chunk_size)
+    else:
+        _reload(args.file, chunk_size=args.chunk_size)
+
+
+def _sync(file: typing.TextIO):
+    """
+    Applying the difference between movies data
+    in the file and in the database to the database.
+    Ids of the unchanged objects are kept.
+    """
+    with get_session() as session:
+
+        session.begin()
+        synchronizer = MoviesSynchronizer(session)
+        result = synchronizer.sync(iter_raw_movies(file))
+        session.commit()
+
+    for field in dataclasses.fields(result):
+        print(f"{field.name.replace('_', ' ').capitalize()}: {getattr(result, field.name)}")
+
+
+def sync(args: argparse.Namespace):
+    _sync(args.file)
+
+
+def export(args: argparse.Namespace):
+    """
+    Writing all movies to the file as NDJSON
+    which may be loaded back by reload or sync.
+    """
+    number = write_raw_movies(args.file, services.movies_service.export_movies())
+    args.file.flush()
+    print(f"Exported {number} movies", file=sys.stderr)
+
+
+def _rebuild_aggregates():
+    """
+    Filling the summary tables and the search index from scratch.
+    """
+    with get_session() as session:
+        session.begin()
+        ActorsRepo().rebuild_actors_aggregated(session)
+        SearchRepo().rebuild_index(session)
+        # Movies are not changed
+        VersionsRepo().increase_version(session, movie_ids=[])
+        session.commit()
+
+
+def rebuild_aggregates(_):
+    _rebuild_aggregates()
 
 
-def run(_):
+def run(args: argparse.Namespace):
     """
     Running the main application.
     """
+    if args.preload_snapshots:
+        # Workers forked later share the memory of the analytics and the graph
+        services.snapshot_keeper.load()
+
+    if args.use_async:
+        import uvicorn
+
+        uvicorn.run("api.asgi:create_asgi_app", factory=True, host=args.host, port=args.port)
+        return
+
+    if args.prefork:
+        server = PreforkServer(
+            app_factory=create_app,
+            address=(args.host, args.port),
+            workers=args.workers or os.cpu_count(),
+            max_requests=args.max_requests,
+            graceful_timeout=settings.SERVER_GRACEFUL_TIMEOUT,
+        )
+        server.serve_forever()
+        return
+
     app = create_app()
-    app.run()
+    app.run(host=args.host, port=args.port)
+
+
+def cache_server(args: argparse.Namespace):
+    """
+    Running the server of the shared caches.
+    """
+    server = CacheServer(parse_address(args.address))
+    print(f"Cache server is listening on {args.address}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 
 def main():
@@ -122,11 +195,84 @@ def main():
         help="Remove all data and upload selected file to the database",
     )
     reload_parser.add_argument("file", type=argparse.FileType())
+    reload_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Number of movies saved to the database at once",
+    )
+    reload_parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Load the data to a new SQLite database file and replace the current one with it",
+    )
     reload_parser.set_defaults(func=reload)
 
+    sync_parser = subparsers.add_parser(
+        "sync",
+        help="Apply only the difference between selected file and the database",
+    )
+    sync_parser.add_argument("file", type=argparse.FileType())
+    sync_parser.set_defaults(func=sync)
+
+    export_parser = subparsers.add_parser(
+        "export",
+        help="Write all movies to selected file (stdout by default) as NDJSON",
+    )
+    export_parser.add_argument("file", type=argparse.FileType("w"), nargs="?", default=sys.stdout)
+    export_parser.set_defaults(func=export)
+
+    rebuild_aggregates_parser = subparsers.add_parser(
+        "rebuild-aggregates",
+        help="Fill the summary tables and the search index from scratch",
+    )
+    rebuild_aggregates_parser.set_defaults(func=rebuild_aggregates)
+
     run_parser = subparsers.add_parser("run", help="Run the application")
+    run_parser.add_argument("--host", default="127.0.0.1")
+    run_parser.add_argument("--port", type=int, default=5000)
+    run_mode_group = run_parser.add_mutually_exclusive_group()
+    run_mode_group.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run the ASGI application with uvicorn serving the read-only resources asynchronously",
+    )
+    run_mode_group.add_argument(
+        "--prefork",
+        action="store_true",
+        help="Run the application in several worker processes",
+    )
+    run_parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SERVER_WORKERS,
+        help="Number of worker processes of --prefork mode, the number of CPU cores by default",
+    )
+    run_parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=settings.SERVER_MAX_REQUESTS,
+        help="Number of requests after which a worker is replaced, 0 means never",
+    )
+    run_parser.add_argument(
+        "--preload-snapshots",
+        action="store_true",
+        help="Load the analytics and the actors graph before serving requests instead of on the first use",
+    )
     run_parser.set_defaults(func=run)
 
+    cache_server_parser = subparsers.add_parser(
+        "cache-server",
+        help="Run the server of the caches shared by the application processes",
+    )
+    cache_server_parser.add_argument(
+        "--address",
+        default=settings.CACHE_ADDRESS,
+        help="Unix socket (unix:path) or loopback address (host:port) to listen to",
+    )
+    cache_server_parser.set_defaults(func=cache_server)
+
     args = parser.parse_args()
     if hasattr(args, "func"):
         args.func(args)
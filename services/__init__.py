@@ -1,5 +1,24 @@
-from .actors import ActorsService
-from .movies import MoviesService
+from .actors import ActorsService, AsyncActorsService
+from .analytics import AnalyticsService
+from .genres import GenresService
+from .graph import GraphService
+from .movies import AsyncMoviesService, MoviesService
+from .search import SearchService
+from .snapshots import SnapshotKeeper
+from .system import SystemService
 
 actors_service = ActorsService()
+genres_service = GenresService()
 movies_service = MoviesService()
+search_service = SearchService()
+# The analytics and the actors graph share one load of all relations
+snapshot_keeper = SnapshotKeeper()
+analytics_service = AnalyticsService(snapshots=snapshot_keeper)
+graph_service = GraphService(snapshots=snapshot_keeper)
+system_service = SystemService(caches=[movies_service.cache, actors_service.total_cache])
+
+async_actors_service = AsyncActorsService(actors_service=actors_service)
+async_movies_service = AsyncMoviesService(
+    cache=movies_service.cache,
+    cache_invalidator=movies_service.cache_invalidator,
+)
@@ -1,10 +1,134 @@
-from database.repositories import ActorsRepo
-from entities import ActorsAggregatedPaginated
+import asyncio
+import functools
+import typing
+
+from database.repositories import ActorsRepo, AsyncVersionsRepo, VersionsRepo
+from entities import (
+    Actor,
+    ActorsAggregatedPaginated,
+    ActorsPage,
+    ActorsResolution,
+    TOTAL_CACHED,
+    TOTAL_EXACT,
+    TOTAL_NONE,
+)
+from services.cache import create_cache
+
+# The totals are cached for the versions of the data,
+# so they are never stale and only a few of them are kept
+_TOTAL_CACHE_SIZE = 16
+_TOTAL_CACHE_TTL = 24 * 60 * 60
 
 
 class ActorsService:
     def __init__(self):
         self.actors_repo = ActorsRepo()
+        self.versions_repo = VersionsRepo()
+        self.total_cache = create_cache(namespace="actors_total", max_size=_TOTAL_CACHE_SIZE, ttl=_TOTAL_CACHE_TTL)
+
+    def get_data_version(self) -> int:
+        """
+        Getting the version of the data which changes
+        on every change of the aggregated actors.
+        """
+        return self.versions_repo.get_version()
+
+    def get_actor(self, actor_id: int) -> typing.Optional[Actor]:
+        actors = self.actors_repo.get_actors([actor_id])
+        return actors[0] if actors else None
+
+    def get_actors_page(self, limit: int, cursor: typing.Optional[typing.Tuple[str, int]] = None) -> ActorsPage:
+        return self.actors_repo.get_actors_page(limit=limit, cursor=cursor)
+
+    def resolve_actors(self, names: typing.List[str]) -> ActorsResolution:
+        """
+        Finding the ids of the actors by their names,
+        e.g. to make the movies referencing them.
+        """
+        actors_by_names = {}
+        for actor in self.actors_repo.get_actors_by_names(names):
+            actors_by_names.setdefault(actor.name, []).append(actor)
+
+        names = list(dict.fromkeys(names))
+        return ActorsResolution(
+            actors=[actor for name in names for actor in actors_by_names.get(name, [])],
+            missing_names=[name for name in names if name not in actors_by_names],
+        )
+
+    def get_actors_aggregated(
+        self,
+        offset: int,
+        limit: int,
+        cursor: typing.Optional[typing.Tuple[str, int, int]] = None,
+        total_mode: str = TOTAL_EXACT,
+        stream: bool = False,
+    ) -> ActorsAggregatedPaginated:
+        """
+        Getting a page of aggregated actors.
+        If stream is set the actors are an iterator
+        and next_cursor is set when it's exhausted,
+        see ActorsRepo.iter_actors_aggregated.
+        """
+        get_page = self.actors_repo.iter_actors_aggregated if stream else self.actors_repo.get_actors_aggregated
+        if total_mode != TOTAL_CACHED:
+            return get_page(
+                offset=offset,
+                limit=limit,
+                cursor=cursor,
+                total_mode=total_mode,
+            )
+
+        # The version is read before counting,
+        # so the total of newer data may be cached for an old version but never vice versa
+        version = self.versions_repo.get_version()
+        total, token = self.total_cache.get_for_update(version)
+
+        actors = get_page(
+            offset=offset,
+            limit=limit,
+            cursor=cursor,
+            total_mode=TOTAL_EXACT if total is None else TOTAL_NONE,
+        )
+        if total is None:
+            self.total_cache.set(version, actors.total, token=token)
+        else:
+            actors.total = total
+
+        return actors
+
+
+class AsyncActorsService:
+    """
+    Asynchronous version of ActorsService for the ASGI application.
+    Pages of the aggregated actors may be very large,
+    so they are streamed by ActorsService in the threads of the executor:
+    neither the rows nor the cache of the totals are read on the event loop.
+    """
+    def __init__(self, actors_service: ActorsService):
+        self.actors_service = actors_service
+        self.versions_repo = AsyncVersionsRepo()
+
+    async def get_data_version(self) -> int:
+        return await self.versions_repo.get_version()
 
-    def get_actors_aggregated(self, offset: int, limit: int) -> ActorsAggregatedPaginated:
-        return self.actors_repo.get_actors_aggregated(offset=offset, limit=limit)
+    async def get_actors_aggregated(
+        self,
+        offset: int,
+        limit: int,
+        cursor: typing.Optional[typing.Tuple[str, int, int]] = None,
+        total_mode: str = TOTAL_EXACT,
+    ) -> ActorsAggregatedPaginated:
+        """
+        Getting a page of aggregated actors,
+        the actors are an iterator which must be consumed by the executor too
+        (see ActorsService.get_actors_aggregated).
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(
+            self.actors_service.get_actors_aggregated,
+            offset=offset,
+            limit=limit,
+            cursor=cursor,
+            total_mode=total_mode,
+            stream=True,
+        ))
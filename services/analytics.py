@@ -0,0 +1,216 @@
+"""
+In-memory analytics of movies, actors and genres.
+
+All movies and relations are loaded to NumPy arrays of 32-bit integers
+on the first request, so the statistics are counted by vectorized operations
+instead of SQL GROUP BY queries, and the aggregates are computed
+once per version of the data. The data version is checked at most once
+in ANALYTICS_CHECK_INTERVAL seconds, then only the changed movies
+are read from the database (see VersionsRepo.get_changes).
+
+NumPy is an optional dependency, without it the analytics is not available.
+"""
+import functools
+import typing
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from entities import ACTOR_STATS_ORDER_MOVIES, ActorStats, GenreYearCount, Relations
+from services.snapshots import SnapshotKeeper
+import settings
+
+# The name of the analytics copy of the data in the shared SnapshotKeeper
+_SNAPSHOT_NAME = "analytics"
+
+
+class AnalyticsService:
+    def __init__(self, snapshots: SnapshotKeeper):
+        self.snapshots = snapshots
+        self.check_interval = settings.ANALYTICS_CHECK_INTERVAL
+        if numpy is not None:
+            self.snapshots.add(_SNAPSHOT_NAME, _Snapshot)
+
+    def is_available(self) -> bool:
+        return numpy is not None
+
+    def get_genres_years(
+        self,
+        genre_ids: typing.Optional[typing.List[int]] = None,
+        year_from: typing.Optional[int] = None,
+        year_to: typing.Optional[int] = None,
+    ) -> typing.List[GenreYearCount]:
+        """
+        Getting the numbers of movies of every genre by years
+        ordered by genre id and year. Movies without a year are not counted.
+        """
+        counts = self._get_snapshot().genre_year_counts
+        genre_ids = set(genre_ids) if genre_ids else None
+        return [
+            count for count in counts
+            if (genre_ids is None or count.genre_id in genre_ids)
+            and (year_from is None or count.year >= year_from)
+            and (year_to is None or count.year <= year_to)
+        ]
+
+    def get_actor_stats(self, actor_id: int) -> typing.Optional[ActorStats]:
+        """
+        Getting the statistics of an actor playing in any movie.
+        """
+        return self._get_snapshot().get_actor_stats(actor_id)
+
+    def get_top_actors(self, order: str, limit: int) -> typing.List[ActorStats]:
+        """
+        Getting the actors with the most movies
+        or the longest careers (see entities.ACTOR_STATS_ORDERS).
+        """
+        snapshot = self._get_snapshot()
+        return [snapshot.get_actor_stats(actor_id) for actor_id in snapshot.get_top_actor_ids(order, limit)]
+
+    def _get_snapshot(self) -> "_Snapshot":
+        return self.snapshots.get(_SNAPSHOT_NAME, self.check_interval)
+
+
+class _Snapshot:
+    """
+    Immutable in-memory copy of the data of some version.
+    Movies and relations are ordered by movie id,
+    the aggregates are computed on the first use.
+    """
+    def __init__(self, relations: Relations):
+        self.version = relations.version
+        self.movie_ids = _to_array(relations.movie_ids)
+        self.movie_years = _to_array(relations.movie_years)
+        self.actor_movie_ids = _to_array(relations.actor_movie_ids)
+        self.actor_ids = _to_array(relations.actor_ids)
+        self.genre_movie_ids = _to_array(relations.genre_movie_ids)
+        self.genre_ids = _to_array(relations.genre_ids)
+
+    def update(self, changed_movie_ids: typing.List[int], relations: Relations) -> "_Snapshot":
+        """
+        Making the snapshot of a newer version: the changed movies
+        and their relations are replaced by the given ones.
+        New rows are inserted at their positions so the order is kept
+        without sorting.
+        """
+        changed_ids = numpy.array(changed_movie_ids, dtype=numpy.int32)
+        snapshot = _Snapshot.__new__(_Snapshot)
+        snapshot.version = relations.version
+        snapshot.movie_ids, snapshot.movie_years = _replace_rows(
+            self.movie_ids, self.movie_years, changed_ids, relations.movie_ids, relations.movie_years
+        )
+        snapshot.actor_movie_ids, snapshot.actor_ids = _replace_rows(
+            self.actor_movie_ids, self.actor_ids, changed_ids, relations.actor_movie_ids, relations.actor_ids
+        )
+        snapshot.genre_movie_ids, snapshot.genre_ids = _replace_rows(
+            self.genre_movie_ids, self.genre_ids, changed_ids, relations.genre_movie_ids, relations.genre_ids
+        )
+        return snapshot
+
+    @functools.cached_property
+    def genre_year_counts(self) -> typing.List[GenreYearCount]:
+        years = self._get_years(self.genre_movie_ids)
+        dated = years > 0
+        keys = (self.genre_ids[dated].astype(numpy.int64) << 32) | years[dated]
+        keys, numbers = numpy.unique(keys, return_counts=True)
+        return [
+            GenreYearCount(genre_id=int(key >> 32), year=int(key & 0xFFFFFFFF), number=int(number))
+            for key, number in zip(keys, numbers)
+        ]
+
+    @functools.cached_property
+    def _actors(self) -> tuple:
+        """
+        Relations ordered by actors (CSR): movies of unique_actor_ids[i]
+        are actor_movie_ids[order[offsets[i]:offsets[i + 1]]].
+        Return (unique_actor_ids, offsets, order, first years, last years).
+        """
+        order = numpy.argsort(self.actor_ids, kind="stable")
+        sorted_actor_ids = self.actor_ids[order]
+        starts = numpy.flatnonzero(numpy.diff(sorted_actor_ids, prepend=-1))
+        unique_actor_ids = sorted_actor_ids[starts]
+        offsets = numpy.append(starts, len(order))
+
+        # Relations of every actor are a continuous range, so the years are reduced by ranges
+        years = self._get_years(self.actor_movie_ids)[order]
+        first_years = numpy.zeros(0, dtype=numpy.int32)
+        last_years = numpy.zeros(0, dtype=numpy.int32)
+        if len(order):
+            first_years = numpy.minimum.reduceat(numpy.where(years > 0, years, numpy.iinfo(numpy.int32).max), starts)
+            last_years = numpy.maximum.reduceat(years, starts)
+
+        return unique_actor_ids, offsets, order, first_years, last_years
+
+    @functools.cached_property
+    def _actors_by_movies(self) -> "numpy.ndarray":
+        unique_actor_ids, offsets = self._actors[:2]
+        # Ids are the second key, so the actors with equal numbers are ordered by ids
+        return unique_actor_ids[numpy.lexsort((unique_actor_ids, -numpy.diff(offsets)))]
+
+    @functools.cached_property
+    def _actors_by_span(self) -> "numpy.ndarray":
+        unique_actor_ids, _, _, first_years, last_years = self._actors
+        spans = numpy.where(last_years > 0, last_years - first_years, -1)
+        return unique_actor_ids[numpy.lexsort((unique_actor_ids, -spans))]
+
+    def get_top_actor_ids(self, order: str, limit: int) -> typing.List[int]:
+        actor_ids = self._actors_by_movies if order == ACTOR_STATS_ORDER_MOVIES else self._actors_by_span
+        return actor_ids[:limit].tolist()
+
+    def get_actor_stats(self, actor_id: int) -> typing.Optional[ActorStats]:
+        unique_actor_ids, offsets, order, first_years, last_years = self._actors
+        # Values of the same type are searched without converting the whole array
+        index = numpy.searchsorted(unique_actor_ids, numpy.int32(actor_id))
+        if index == len(unique_actor_ids) or unique_actor_ids[index] != actor_id:
+            return None
+
+        movie_ids = self.actor_movie_ids[order[offsets[index]:offsets[index + 1]]]
+        # Relations of every movie are a continuous range of the relations ordered by movies
+        starts = numpy.searchsorted(self.actor_movie_ids, movie_ids, side="left")
+        ends = numpy.searchsorted(self.actor_movie_ids, movie_ids, side="right")
+        co_star_ids = numpy.unique(numpy.concatenate([self.actor_ids[start:end] for start, end in zip(starts, ends)]))
+
+        dated = last_years[index] > 0
+        return ActorStats(
+            actor_id=actor_id,
+            movies_number=len(movie_ids),
+            first_year=int(first_years[index]) if dated else None,
+            last_year=int(last_years[index]) if dated else None,
+            co_stars_number=len(co_star_ids) - 1,
+        )
+
+    def _get_years(self, movie_ids: "numpy.ndarray") -> "numpy.ndarray":
+        """
+        Getting the years of the movies, 0 for the missing movies.
+        """
+        if not len(self.movie_ids):
+            return numpy.zeros(len(movie_ids), dtype=numpy.int32)
+
+        indexes = numpy.minimum(numpy.searchsorted(self.movie_ids, movie_ids), len(self.movie_ids) - 1)
+        return numpy.where(self.movie_ids[indexes] == movie_ids, self.movie_years[indexes], 0)
+
+
+def _to_array(values) -> "numpy.ndarray":
+    return numpy.frombuffer(values, dtype=numpy.int32) if len(values) else numpy.zeros(0, dtype=numpy.int32)
+
+
+def _replace_rows(
+    movie_ids: "numpy.ndarray",
+    values: "numpy.ndarray",
+    changed_ids: "numpy.ndarray",
+    new_movie_ids,
+    new_values,
+) -> typing.Tuple["numpy.ndarray", "numpy.ndarray"]:
+    """
+    Removing the rows of the changed movies from the columns ordered by movie ids
+    and inserting the new rows of these movies.
+    """
+    kept = ~numpy.isin(movie_ids, changed_ids)
+    movie_ids = movie_ids[kept]
+    values = values[kept]
+
+    new_movie_ids = _to_array(new_movie_ids)
+    positions = numpy.searchsorted(movie_ids, new_movie_ids)
+    return numpy.insert(movie_ids, positions, new_movie_ids), numpy.insert(values, positions, _to_array(new_values))
@@ -0,0 +1,624 @@
+"""
+Caches of the services.
+
+Every cache has a namespace (e.g. "movies") and is kept by the backend
+selected in the settings:
+
+* "memory" - the items are kept in the process which uses the cache;
+* "socket" - the items are kept by the cache server (manage.py cache-server)
+  shared by all processes of the application. The workers keep no copies
+  of the items, so an item deleted by one worker is missing for all of them.
+"""
+import asyncio
+import collections
+import dataclasses
+import functools
+import ipaddress
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import threading
+import time
+import typing
+
+from marshmallow import Schema
+
+from entities import CacheStats, CacheUnavailableError, DataChanges
+import settings
+
+CACHE_MEMORY = "memory"
+CACHE_SOCKET = "socket"
+CACHE_BACKENDS = (CACHE_MEMORY, CACHE_SOCKET)
+
+
+class Cache:
+    """
+    Base class of the caches.
+    Keys are numbers or strings.
+    None is never cached, it means a missing item.
+
+    Values read from the database are set with the token
+    got together with the missing values before reading them
+    (see get_many_for_update). Such values are not set
+    if the items are changed or deleted after the token is got,
+    so a value read before a change is never cached after it.
+    Values of the changes themselves are set without a token.
+    """
+    def __init__(self, namespace: str, max_size: int, ttl: float):
+        self.namespace = namespace
+        self.max_size = max_size
+        self.ttl = ttl
+
+    def get(self, key: typing.Hashable) -> typing.Any:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: typing.List[typing.Hashable]) -> typing.Dict[typing.Hashable, typing.Any]:
+        """
+        Getting the cached values mapped by their keys.
+        The missing keys are not included.
+        """
+        return self.get_many_for_update(keys)[0]
+
+    def get_for_update(self, key: typing.Hashable) -> typing.Tuple[typing.Any, int]:
+        values, token = self.get_many_for_update([key])
+        return values.get(key), token
+
+    def get_many_for_update(
+        self,
+        keys: typing.List[typing.Hashable],
+    ) -> typing.Tuple[typing.Dict[typing.Hashable, typing.Any], int]:
+        """
+        Getting the cached values and the token
+        for setting the missing ones read from the database.
+        """
+        raise NotImplementedError()
+
+    def set(self, key: typing.Hashable, value: typing.Any, token: typing.Optional[int] = None):
+        self.set_many({key: value}, token=token)
+
+    def set_many(self, items: typing.Dict[typing.Hashable, typing.Any], token: typing.Optional[int] = None):
+        raise NotImplementedError()
+
+    def delete(self, key: typing.Hashable):
+        self.delete_many([key])
+
+    def delete_many(self, keys: typing.List[typing.Hashable]):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+    def get_stats(self) -> CacheStats:
+        raise NotImplementedError()
+
+
+class LRUCache(Cache):
+    """
+    Thread-safe in-process cache of a bounded size.
+    The least recently used items are evicted when the cache is full,
+    the items older than ttl seconds are never returned.
+
+    Every change of the cache gets the next sequence number
+    which is the token of the values got after it.
+    As many deleted keys as the items of the cache are remembered
+    with the numbers of their deletions, the tokens older than
+    the forgotten deletions are rejected.
+    """
+    def __init__(self, namespace: str, max_size: int, ttl: float):
+        super().__init__(namespace=namespace, max_size=max_size, ttl=ttl)
+        # key -> (expiration time, value, sequence number of the change),
+        # the most recently used items are at the end
+        self._items: typing.OrderedDict[
+            typing.Hashable,
+            typing.Tuple[float, typing.Any, int],
+        ] = collections.OrderedDict()
+        # key -> sequence number of the deletion, the oldest deletions are at the beginning
+        self._deletions: typing.OrderedDict[typing.Hashable, int] = collections.OrderedDict()
+        self._sequence = 0
+        self._oldest_token = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_many_for_update(
+        self,
+        keys: typing.List[typing.Hashable],
+    ) -> typing.Tuple[typing.Dict[typing.Hashable, typing.Any], int]:
+        now = time.monotonic()
+        values = {}
+        with self._lock:
+            for key in keys:
+                item = self._items.get(key)
+                if item is not None and item[0] < now:
+                    del self._items[key]
+                    item = None
+
+                if item is None:
+                    self._misses += 1
+                    continue
+
+                self._items.move_to_end(key)
+                self._hits += 1
+                values[key] = item[1]
+
+            return values, self._sequence
+
+    def set_many(self, items: typing.Dict[typing.Hashable, typing.Any], token: typing.Optional[int] = None):
+        if self.max_size <= 0:
+            return
+
+        expiration_time = time.monotonic() + self.ttl
+        with self._lock:
+            if token is not None and token < self._oldest_token:
+                return
+
+            self._sequence += 1
+            for key, value in items.items():
+                if token is not None and self._is_changed(key, token):
+                    continue
+
+                self._items[key] = (expiration_time, value, self._sequence)
+                self._items.move_to_end(key)
+                self._deletions.pop(key, None)
+
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self._evictions += 1
+
+    def delete_many(self, keys: typing.List[typing.Hashable]):
+        with self._lock:
+            self._sequence += 1
+            for key in keys:
+                self._items.pop(key, None)
+                self._deletions[key] = self._sequence
+                self._deletions.move_to_end(key)
+
+            while len(self._deletions) > self.max_size:
+                _, sequence = self._deletions.popitem(last=False)
+                self._oldest_token = max(self._oldest_token, sequence)
+
+    def clear(self):
+        with self._lock:
+            self._sequence += 1
+            self._items.clear()
+            self._deletions.clear()
+            self._oldest_token = self._sequence
+
+    def get_stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                name=self.namespace,
+                size=len(self._items),
+                max_size=self.max_size,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+            )
+
+    def _is_changed(self, key: typing.Hashable, token: int) -> bool:
+        item = self._items.get(key)
+        if item is not None and item[2] > token:
+            return True
+
+        return self._deletions.get(key, 0) > token
+
+
+class CacheInvalidator:
+    """
+    Removing the cached items of the movies changed by any process,
+    e.g. by another worker or by manage.py sync, reload and purge.
+    The service using the cache checks the data version
+    at most once in check_interval seconds, then the items
+    of the movies changed since the previous check are deleted
+    (see VersionsRepo.get_changes). If the changes are unknown
+    the whole cache is cleared. Items must be keyed by movie ids.
+    """
+    def __init__(self, cache: Cache, check_interval: float):
+        self.cache = cache
+        self.check_interval = check_interval
+        # The data version the cache was checked for, None before the first check
+        self.version: typing.Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def start_check(self) -> bool:
+        """
+        Return True if the check is due, then the caller
+        gets the changes since the checked version and passes them to finish_check.
+        Only one check is started in the interval, the others keep using the cache.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.check_interval:
+                return False
+
+            self._checked_at = now
+            return True
+
+    def finish_check(self, since_version: typing.Optional[int], changes: typing.Optional[DataChanges], version: int):
+        """
+        Invalidating the items changed after since_version up to the current version.
+        The first check only remembers the version: the cache of the process is empty
+        and the shared cache is checked by the processes started before.
+        """
+        try:
+            if since_version is not None and (changes is None or len(changes.movie_ids) > self.cache.max_size):
+                self.cache.clear()
+            elif since_version is not None and changes.movie_ids:
+                self.cache.delete_many(changes.movie_ids)
+        except CacheUnavailableError:
+            # The changes are invalidated again by the next request
+            with self._lock:
+                self._checked_at = 0.0
+            return
+
+        with self._lock:
+            if self.version is None or version > self.version:
+                self.version = version
+
+
+# Messages of the cache server protocol.
+# Every message is a JSON array [command, namespace, max size, ttl, *arguments]
+# prefixed by its length, the server answers every message by a JSON value.
+# Items are transferred as [key, value] pairs since the keys may be numbers.
+# "get" returns the found items and the token, "set" gets the items and the token or null.
+_HEADER = struct.Struct("!I")
+_MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+_GET = "get"
+_SET = "set"
+_DELETE = "delete"
+_CLEAR = "clear"
+_STATS = "stats"
+
+# Token of the values got while the server is not available, the server never accepts it
+_REJECTED_TOKEN = -1
+
+# Prefix of the addresses of Unix sockets
+_UNIX_PREFIX = "unix:"
+
+Address = typing.Union[str, typing.Tuple[str, int]]
+
+
+def _send_message(sock: socket.socket, message: typing.Any):
+    data = json.dumps(message, separators=(",", ":")).encode()
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _receive_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Connection is closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _receive_message(sock: socket.socket) -> typing.Any:
+    size, = _HEADER.unpack(_receive_exactly(sock, _HEADER.size))
+    if size > _MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message of {size} bytes is too large")
+    return json.loads(_receive_exactly(sock, size))
+
+
+def parse_address(address: str) -> Address:
+    """
+    Parsing the address of the cache server: either a path of Unix socket
+    prefixed by "unix:" (e.g. "unix:/run/filmography/cache.sock")
+    or "host:port" of a loopback interface (e.g. "127.0.0.1:7390").
+    """
+    if address.startswith(_UNIX_PREFIX):
+        path = address[len(_UNIX_PREFIX):]
+        if not path:
+            raise ValueError("Path of the cache server socket is empty")
+        return path
+
+    host, _, port = address.rpartition(":")
+    host = host.strip("[]")
+    _check_loopback(host)
+    return host, int(port)
+
+
+def _check_loopback(host: str):
+    """
+    The cache server has no authentication, so it's never reachable from other hosts.
+    """
+    if host == "localhost":
+        return
+
+    try:
+        is_loopback = ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        is_loopback = False
+
+    if not is_loopback:
+        raise ValueError(f"Cache server address must be a Unix socket or a loopback address, not {host!r}")
+
+
+def _get_address_family(address: Address) -> int:
+    if isinstance(address, str):
+        return socket.AF_UNIX
+    if ":" in address[0]:
+        return socket.AF_INET6
+    return socket.AF_INET
+
+
+class _CacheRequestHandler(socketserver.BaseRequestHandler):
+    server: "CacheServer"
+
+    def setup(self):
+        self.server.add_connection(self.request)
+
+    def finish(self):
+        self.server.remove_connection(self.request)
+
+    def handle(self):
+        while True:
+            try:
+                command, namespace, max_size, ttl, *arguments = _receive_message(self.request)
+                cache = self.server.get_cache(namespace, max_size=max_size, ttl=ttl)
+                _send_message(self.request, self.server.execute(cache, command, arguments))
+            except (OSError, ValueError, TypeError, LookupError):
+                # The connection is closed or the message is malformed
+                return
+
+
+class CacheServer(socketserver.ThreadingTCPServer):
+    """
+    Server keeping the items of the socket caches.
+    Values are kept as the JSON values received from the clients.
+
+    The server has no authentication, so it listens either to a Unix socket
+    accessible only by the user running it or to a loopback address.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Address):
+        if not isinstance(address, str):
+            _check_loopback(address[0])
+        self.address_family = _get_address_family(address)
+        super().__init__(address, _CacheRequestHandler)
+        self._caches: typing.Dict[str, LRUCache] = {}
+        self._caches_lock = threading.Lock()
+        self._connections: typing.Set[socket.socket] = set()
+        self._connections_lock = threading.Lock()
+
+    def server_bind(self):
+        if self.address_family != socket.AF_UNIX:
+            super().server_bind()
+            return
+
+        # The socket file left by a stopped server
+        if os.path.exists(self.server_address) and stat.S_ISSOCK(os.stat(self.server_address).st_mode):
+            os.unlink(self.server_address)
+
+        super().server_bind()
+        # Connections are accepted after listening is started, so nobody else connects before this
+        os.chmod(self.server_address, 0o600)
+
+    def add_connection(self, sock: socket.socket):
+        with self._connections_lock:
+            self._connections.add(sock)
+
+    def remove_connection(self, sock: socket.socket):
+        with self._connections_lock:
+            self._connections.discard(sock)
+
+    def server_close(self):
+        super().server_close()
+        # The clients see the stopped server at once
+        with self._connections_lock:
+            for sock in self._connections:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+        if self.address_family == socket.AF_UNIX and os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+    def execute(self, cache: LRUCache, command: str, arguments: list) -> typing.Any:
+        if command == _GET:
+            values, token = cache.get_many_for_update(arguments[0])
+            return list(values.items()), token
+        if command == _SET:
+            return cache.set_many(dict(arguments[0]), token=arguments[1])
+        if command == _DELETE:
+            return cache.delete_many(arguments[0])
+        if command == _CLEAR:
+            return cache.clear()
+        if command == _STATS:
+            return dataclasses.asdict(cache.get_stats())
+
+        raise ValueError(f"Unknown cache command {command}")
+
+    def get_cache(self, namespace: str, max_size: int, ttl: float) -> LRUCache:
+        """
+        Namespaces are created on the first request to them
+        with the size and TTL of the client's cache.
+        """
+        cache = self._caches.get(namespace)
+        if cache is None:
+            with self._caches_lock:
+                cache = self._caches.setdefault(namespace, LRUCache(namespace=namespace, max_size=max_size, ttl=ttl))
+
+        cache.max_size = max_size
+        cache.ttl = ttl
+        return cache
+
+    def start(self) -> threading.Thread:
+        """
+        Serving in a background thread, e.g. in tests.
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class SocketCache(Cache):
+    """
+    Client of the cache server.
+    Values are dumped to JSON by the schema if it's given,
+    otherwise they must be JSON values themselves (e.g. numbers).
+    If the server is not available the cache is skipped:
+    reading returns nothing and setting the values read from the database does nothing.
+    Changes (setting without a token, deleting and clearing) are retried once,
+    then CacheUnavailableError is raised since a missed change leaves a stale item.
+    """
+    def __init__(
+        self,
+        namespace: str,
+        max_size: int,
+        ttl: float,
+        address: Address,
+        schema: typing.Optional[Schema] = None,
+    ):
+        super().__init__(namespace=namespace, max_size=max_size, ttl=ttl)
+        self.address = address
+        self.schema = schema
+        # Each thread uses its own connection
+        self._local = threading.local()
+        # Forked processes open their own connections
+        os.register_at_fork(after_in_child=self._reset_connections)
+
+    def get_many_for_update(
+        self,
+        keys: typing.List[typing.Hashable],
+    ) -> typing.Tuple[typing.Dict[typing.Hashable, typing.Any], int]:
+        result = self._request(_GET, keys)
+        if result is None:
+            return {}, _REJECTED_TOKEN
+
+        items, token = result
+        if self.schema is None:
+            return dict(items), token
+        return {key: self.schema.load(value) for key, value in items}, token
+
+    def set_many(self, items: typing.Dict[typing.Hashable, typing.Any], token: typing.Optional[int] = None):
+        if self.max_size <= 0:
+            return
+
+        if self.schema is not None:
+            items = {key: self.schema.dump(value) for key, value in items.items()}
+        self._request(_SET, list(items.items()), token, required=token is None)
+
+    def delete_many(self, keys: typing.List[typing.Hashable]):
+        self._request(_DELETE, keys, required=True)
+
+    def clear(self):
+        self._request(_CLEAR, required=True)
+
+    def get_stats(self) -> CacheStats:
+        stats = self._request(_STATS)
+        if stats is None:
+            # The server is not available
+            return CacheStats(name=self.namespace, size=0, max_size=self.max_size, hits=0, misses=0, evictions=0)
+        return CacheStats(**stats)
+
+    def _request(self, command: str, *arguments, required: bool = False) -> typing.Any:
+        """
+        Sending the command to the server and returning its result.
+        If the server is not available None is returned,
+        or CacheUnavailableError is raised if the command is required.
+        """
+        for _ in range(2 if required else 1):
+            try:
+                sock = self._get_connection()
+                _send_message(sock, (command, self.namespace, self.max_size, self.ttl, *arguments))
+                return _receive_message(sock)
+            except (OSError, ValueError):
+                self._close_connection()
+
+        if required:
+            raise CacheUnavailableError(f"Cache server {self.address} is not available")
+        return None
+
+    def _get_connection(self) -> socket.socket:
+        sock = getattr(self._local, "socket", None)
+        if sock is None:
+            family = _get_address_family(self.address)
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            try:
+                sock.settimeout(settings.CACHE_TIMEOUT)
+                sock.connect(self.address)
+                if family != socket.AF_UNIX:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError:
+                sock.close()
+                raise
+            self._local.socket = sock
+        return sock
+
+    def _reset_connections(self):
+        self._local = threading.local()
+
+    def _close_connection(self):
+        sock = getattr(self._local, "socket", None)
+        if sock is not None:
+            self._local.socket = None
+            sock.close()
+
+
+class AsyncCache:
+    """
+    Cache used by the coroutines of the ASGI application.
+    The requests to the cache server are made by the threads
+    of the executor, so they never block the event loop.
+    The memory cache is used directly as it never waits for I/O.
+    """
+    def __init__(self, cache: Cache):
+        self.cache = cache
+
+    async def get_many(self, keys: typing.List[typing.Hashable]) -> typing.Dict[typing.Hashable, typing.Any]:
+        return await self.run(self.cache.get_many, keys)
+
+    async def get_for_update(self, key: typing.Hashable) -> typing.Tuple[typing.Any, int]:
+        return await self.run(self.cache.get_for_update, key)
+
+    async def get_many_for_update(
+        self,
+        keys: typing.List[typing.Hashable],
+    ) -> typing.Tuple[typing.Dict[typing.Hashable, typing.Any], int]:
+        return await self.run(self.cache.get_many_for_update, keys)
+
+    async def set(self, key: typing.Hashable, value: typing.Any, token: typing.Optional[int] = None):
+        await self.run(self.cache.set, key, value, token=token)
+
+    async def set_many(self, items: typing.Dict[typing.Hashable, typing.Any], token: typing.Optional[int] = None):
+        await self.run(self.cache.set_many, items, token=token)
+
+    async def run(self, function: typing.Callable, *args, **kwargs) -> typing.Any:
+        """
+        Calling a function using the cache, e.g. CacheInvalidator.finish_check.
+        """
+        if not isinstance(self.cache, SocketCache):
+            return function(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(function, *args, **kwargs))
+
+
+def create_cache(namespace: str, max_size: int, ttl: float, schema: typing.Optional[Schema] = None) -> Cache:
+    """
+    Creating the cache of the backend selected in the settings.
+    The schema dumps the values kept out of the process (see SocketCache).
+    """
+    if settings.CACHE_BACKEND == CACHE_SOCKET:
+        return SocketCache(
+            namespace=namespace,
+            max_size=max_size,
+            ttl=ttl,
+            address=parse_address(settings.CACHE_ADDRESS),
+            schema=schema,
+        )
+
+    if settings.CACHE_BACKEND == CACHE_MEMORY:
+        return LRUCache(namespace=namespace, max_size=max_size, ttl=ttl)
+
+    raise ValueError(f"Unknown cache backend {settings.CACHE_BACKEND}, expected one of {CACHE_BACKENDS}")
@@ -0,0 +1,32 @@
+import typing
+
+from database.repositories import GenresRepo
+from entities import Genre, GenresResolution
+
+
+class GenresService:
+    def __init__(self):
+        self.genres_repo = GenresRepo()
+
+    def get_genres(self) -> typing.List[Genre]:
+        return self.genres_repo.get_all_genres()
+
+    def get_genre(self, genre_id: int) -> typing.Optional[Genre]:
+        genres = self.genres_repo.get_genres([genre_id])
+        return genres[0] if genres else None
+
+    def resolve_genres(self, names: typing.List[str]) -> GenresResolution:
+        """
+        Finding the ids of the genres by their names.
+        There are few genres, so all of them are read
+        and the names are looked up in a dictionary.
+        """
+        genres_by_names = {}
+        for genre in self.genres_repo.get_all_genres():
+            genres_by_names.setdefault(genre.name, genre)
+
+        names = list(dict.fromkeys(names))
+        return GenresResolution(
+            genres=[genres_by_names[name] for name in names if name in genres_by_names],
+            missing_names=[name for name in names if name not in genres_by_names],
+        )
@@ -0,0 +1,376 @@
+"""
+In-memory graph of actors and movies.
+
+Relations are kept in two CSR (compressed sparse row) structures
+of 32-bit integer arrays indexed by ids: the actors of movie m are
+movie_actor_ids[movie_offsets[m]:movie_offsets[m + 1]] and the movies
+of actor a are actor_movie_ids[actor_offsets[a]:actor_offsets[a + 1]].
+So the graph of the whole catalogue takes a few bytes per relation
+and is traversed without any database queries.
+
+The graph is built on the first use from the same load of all relations
+as the analytics and the movies changed later are kept in small dictionaries
+on top of the arrays (see services.snapshots.SnapshotKeeper).
+
+The arrays are built by NumPy sorting and counting if it is installed,
+otherwise by Python loops, which take seconds for millions of relations.
+"""
+import array
+import collections
+import itertools
+import typing
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from entities import ActorsPath, CoStar, Relations
+from services.snapshots import SnapshotKeeper
+import settings
+
+# The graph is built again when so many movies are changed after it was built
+_MAX_CHANGED_MOVIES = 10000
+# The name of the graph in the shared SnapshotKeeper
+_SNAPSHOT_NAME = "graph"
+
+
+class GraphService:
+    def __init__(self, snapshots: SnapshotKeeper):
+        self.snapshots = snapshots
+        self.check_interval = settings.GRAPH_CHECK_INTERVAL
+        self.snapshots.add(_SNAPSHOT_NAME, _Graph.from_relations)
+
+    def has_actor(self, actor_id: int) -> bool:
+        return bool(self._get_graph().get_actor_movie_ids(actor_id))
+
+    def get_co_stars(self, actor_id: int, limit: int) -> typing.List[CoStar]:
+        """
+        Getting the actors playing with the actor
+        ordered by the number of their common movies.
+        """
+        graph = self._get_graph()
+        numbers = collections.Counter(
+            co_star_id
+            for movie_id in graph.get_actor_movie_ids(actor_id)
+            for co_star_id in graph.get_movie_actor_ids(movie_id)
+            if co_star_id != actor_id
+        )
+        co_stars = sorted(numbers.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [CoStar(actor_id=co_star_id, movies_number=number) for co_star_id, number in co_stars]
+
+    def get_path(self, from_actor_id: int, to_actor_id: int) -> typing.Optional[ActorsPath]:
+        """
+        Finding the shortest chain of actors playing together
+        which connects two actors by bidirectional breadth-first search:
+        the smaller of the two frontiers is expanded by one level at a time
+        until they meet. Return None if the actors are not connected
+        or no path is found within GRAPH_MAX_VISITED_ACTORS visited actors.
+        """
+        graph = self._get_graph()
+        if not graph.get_actor_movie_ids(from_actor_id) or not graph.get_actor_movie_ids(to_actor_id):
+            return None
+
+        if from_actor_id == to_actor_id:
+            return ActorsPath(actor_ids=[from_actor_id], movie_ids=[])
+
+        # The actor and the movie from which every visited actor is reached
+        forward_parents = {from_actor_id: None}
+        backward_parents = {to_actor_id: None}
+        forward_frontier = [from_actor_id]
+        backward_frontier = [to_actor_id]
+        # Movies already expanded by each search
+        forward_movies = set()
+        backward_movies = set()
+
+        while forward_frontier and backward_frontier:
+            if len(forward_parents) + len(backward_parents) > settings.GRAPH_MAX_VISITED_ACTORS:
+                return None
+
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting_id = _expand(
+                    graph, forward_frontier, forward_parents, forward_movies, backward_parents
+                )
+            else:
+                backward_frontier, meeting_id = _expand(
+                    graph, backward_frontier, backward_parents, backward_movies, forward_parents
+                )
+
+            if meeting_id is not None:
+                return _make_path(meeting_id, forward_parents, backward_parents)
+
+        return None
+
+    def _get_graph(self) -> "_Graph":
+        return self.snapshots.get(_SNAPSHOT_NAME, self.check_interval)
+
+
+def _expand(
+    graph: "_Graph",
+    frontier: typing.List[int],
+    parents: typing.Dict[int, typing.Optional[typing.Tuple[int, int]]],
+    visited_movies: typing.Set[int],
+    other_parents: typing.Dict[int, typing.Optional[typing.Tuple[int, int]]],
+) -> typing.Tuple[typing.List[int], typing.Optional[int]]:
+    """
+    Visiting the actors playing with the actors of the frontier.
+    Return the next frontier and the actor visited by the other search if it's found.
+    """
+    next_frontier = []
+    for actor_id in frontier:
+        for movie_id in graph.get_actor_movie_ids(actor_id):
+            if movie_id in visited_movies:
+                continue
+            visited_movies.add(movie_id)
+
+            for co_star_id in graph.get_movie_actor_ids(movie_id):
+                if co_star_id in parents:
+                    continue
+                parents[co_star_id] = (actor_id, movie_id)
+                if co_star_id in other_parents:
+                    return next_frontier, co_star_id
+                next_frontier.append(co_star_id)
+
+    return next_frontier, None
+
+
+def _make_path(
+    meeting_id: int,
+    forward_parents: typing.Dict[int, typing.Optional[typing.Tuple[int, int]]],
+    backward_parents: typing.Dict[int, typing.Optional[typing.Tuple[int, int]]],
+) -> ActorsPath:
+    actor_ids = [meeting_id]
+    movie_ids = []
+    parent = forward_parents[meeting_id]
+    while parent is not None:
+        actor_id, movie_id = parent
+        actor_ids.append(actor_id)
+        movie_ids.append(movie_id)
+        parent = forward_parents[actor_id]
+
+    actor_ids.reverse()
+    movie_ids.reverse()
+
+    parent = backward_parents[meeting_id]
+    while parent is not None:
+        actor_id, movie_id = parent
+        actor_ids.append(actor_id)
+        movie_ids.append(movie_id)
+        parent = backward_parents[actor_id]
+
+    return ActorsPath(actor_ids=actor_ids, movie_ids=movie_ids)
+
+
+class _Graph:
+    """
+    Immutable graph of some version of the data.
+    Movies changed after building the CSR arrays are kept in dictionaries:
+    the actors of the changed movies and the movies added to and removed from actors.
+    """
+    def __init__(
+        self,
+        version: int,
+        movie_offsets: array.array,
+        movie_actor_ids: array.array,
+        actor_offsets: array.array,
+        actor_movie_ids: array.array,
+    ):
+        self.version = version
+        self.movie_offsets = movie_offsets
+        self.movie_actor_ids = movie_actor_ids
+        self.actor_offsets = actor_offsets
+        self.actor_movie_ids = actor_movie_ids
+        self.changed_movies: typing.Dict[int, typing.Tuple[int, ...]] = {}
+        self.added_movies: typing.Dict[int, typing.FrozenSet[int]] = {}
+        self.removed_movies: typing.Dict[int, typing.FrozenSet[int]] = {}
+
+    @classmethod
+    def from_relations(cls, relations: Relations) -> "_Graph":
+        return cls.from_pairs(relations.version, relations.actor_movie_ids, relations.actor_ids)
+
+    @classmethod
+    def from_pairs(cls, version: int, movie_ids: typing.Sequence[int], actor_ids: typing.Sequence[int]) -> "_Graph":
+        """
+        Building the graph from (movie id, actor id) pairs ordered by movie ids.
+        """
+        if numpy is not None:
+            return cls._from_numpy_pairs(version, _to_numpy(movie_ids), _to_numpy(actor_ids))
+
+        movie_offsets = _make_offsets(movie_ids)
+        # Pairs are ordered by movies, so the actors of every movie are already continuous
+        movie_actor_ids = array.array("i", actor_ids)
+
+        # Counting sort of the movies by actors
+        actor_offsets = _make_offsets(actor_ids)
+        positions = array.array("i", actor_offsets)
+        actor_movie_ids = array.array("i", bytes(4 * len(movie_ids)))
+        for movie_id, actor_id in zip(movie_ids, actor_ids):
+            position = positions[actor_id]
+            actor_movie_ids[position] = movie_id
+            positions[actor_id] = position + 1
+
+        return cls(version, movie_offsets, movie_actor_ids, actor_offsets, actor_movie_ids)
+
+    @classmethod
+    def _from_numpy_pairs(cls, version: int, movie_ids: "numpy.ndarray", actor_ids: "numpy.ndarray") -> "_Graph":
+        # Sorting (actor id, movie id) pairs packed into 64-bit keys
+        # is faster than the stable sorting of the movies by actor ids,
+        # the low halves of the sorted keys are the movie ids
+        keys = (actor_ids.astype(numpy.int64) << 32) | movie_ids
+        keys.sort()
+        actor_movie_ids = keys.astype(numpy.int32)
+        return cls(
+            version,
+            _from_numpy(_make_numpy_offsets(movie_ids)),
+            _from_numpy(actor_ids),
+            _from_numpy(_make_numpy_offsets(actor_ids)),
+            _from_numpy(actor_movie_ids),
+        )
+
+    def get_movie_actor_ids(self, movie_id: int) -> typing.Sequence[int]:
+        actor_ids = self.changed_movies.get(movie_id)
+        if actor_ids is not None:
+            return actor_ids
+
+        if not 0 <= movie_id < len(self.movie_offsets) - 1:
+            return ()
+        return self.movie_actor_ids[self.movie_offsets[movie_id]:self.movie_offsets[movie_id + 1]]
+
+    def get_actor_movie_ids(self, actor_id: int) -> typing.Sequence[int]:
+        if not 0 <= actor_id < len(self.actor_offsets) - 1:
+            movie_ids = ()
+        else:
+            movie_ids = self.actor_movie_ids[self.actor_offsets[actor_id]:self.actor_offsets[actor_id + 1]]
+
+        removed = self.removed_movies.get(actor_id)
+        added = self.added_movies.get(actor_id)
+        if removed is None and added is None:
+            return movie_ids
+
+        return [movie_id for movie_id in movie_ids if not removed or movie_id not in removed] + sorted(added or ())
+
+    def update(self, changed_movie_ids: typing.List[int], relations: Relations) -> "_Graph":
+        new_actor_ids = collections.defaultdict(tuple)
+        for movie_id, group in itertools.groupby(
+            zip(relations.actor_movie_ids, relations.actor_ids), key=lambda pair: pair[0]
+        ):
+            new_actor_ids[movie_id] = tuple(actor_id for _, actor_id in group)
+
+        graph = _Graph(
+            relations.version,
+            self.movie_offsets,
+            self.movie_actor_ids,
+            self.actor_offsets,
+            self.actor_movie_ids,
+        )
+        graph.changed_movies = dict(self.changed_movies)
+        graph.changed_movies.update((movie_id, new_actor_ids[movie_id]) for movie_id in changed_movie_ids)
+        # The rebuilt arrays need only the actors of the changed movies
+        if len(graph.changed_movies) > _MAX_CHANGED_MOVIES:
+            return graph._rebuild()
+
+        graph.added_movies = dict(self.added_movies)
+        graph.removed_movies = dict(self.removed_movies)
+        for movie_id in changed_movie_ids:
+            old_actor_ids = set(self.get_movie_actor_ids(movie_id))
+            actor_ids = graph.changed_movies[movie_id]
+
+            for actor_id in old_actor_ids.difference(actor_ids):
+                graph._move_movie(actor_id, movie_id, graph.added_movies, graph.removed_movies)
+            for actor_id in set(actor_ids).difference(old_actor_ids):
+                graph._move_movie(actor_id, movie_id, graph.removed_movies, graph.added_movies)
+
+        return graph
+
+    def _move_movie(
+        self,
+        actor_id: int,
+        movie_id: int,
+        source: typing.Dict[int, typing.FrozenSet[int]],
+        target: typing.Dict[int, typing.FrozenSet[int]],
+    ):
+        """
+        Adding the movie to the actor (source is removed movies, target is added ones)
+        or removing it. The sets are replaced, so the previous graph is not changed.
+        """
+        movie_ids = source.get(actor_id, frozenset())
+        if movie_id in movie_ids:
+            source[actor_id] = movie_ids - {movie_id}
+        else:
+            target[actor_id] = target.get(actor_id, frozenset()) | {movie_id}
+
+    def _rebuild(self) -> "_Graph":
+        """
+        Building the arrays of the graph with all changes.
+        """
+        if numpy is not None:
+            return self._rebuild_numpy()
+
+        last_movie_id = max(len(self.movie_offsets) - 2, max(self.changed_movies, default=0))
+        movie_ids = array.array("i")
+        actor_ids = array.array("i")
+        for movie_id in range(last_movie_id + 1):
+            movie_actor_ids = self.get_movie_actor_ids(movie_id)
+            movie_ids.extend(itertools.repeat(movie_id, len(movie_actor_ids)))
+            actor_ids.extend(movie_actor_ids)
+
+        return _Graph.from_pairs(self.version, movie_ids, actor_ids)
+
+    def _rebuild_numpy(self) -> "_Graph":
+        """
+        The pairs of the unchanged movies are taken from the arrays,
+        the ones of the changed movies are appended and all of them
+        are ordered by movie ids again.
+        """
+        movie_offsets = _to_numpy(self.movie_offsets)
+        movie_ids = numpy.repeat(numpy.arange(len(movie_offsets) - 1, dtype=numpy.int32), numpy.diff(movie_offsets))
+        changed_ids = numpy.fromiter(self.changed_movies, dtype=numpy.int32, count=len(self.changed_movies))
+        kept = ~numpy.isin(movie_ids, changed_ids)
+
+        changed_movie_ids = array.array("i")
+        changed_actor_ids = array.array("i")
+        for movie_id, actor_ids in self.changed_movies.items():
+            changed_movie_ids.extend(itertools.repeat(movie_id, len(actor_ids)))
+            changed_actor_ids.extend(actor_ids)
+
+        movie_ids = numpy.concatenate([movie_ids[kept], _to_numpy(changed_movie_ids)])
+        actor_ids = numpy.concatenate([_to_numpy(self.movie_actor_ids)[kept], _to_numpy(changed_actor_ids)])
+        order = numpy.argsort(movie_ids, kind="stable")
+        return _Graph._from_numpy_pairs(self.version, movie_ids[order], actor_ids[order])
+
+
+def _make_offsets(ids: typing.Sequence[int]) -> array.array:
+    """
+    Making the offsets of CSR structure: the rows of id i
+    are in the range offsets[i]:offsets[i + 1] of the rows ordered by ids.
+    """
+    counts = array.array("i", bytes(4 * (max(ids, default=-1) + 2)))
+    for id_ in ids:
+        counts[id_ + 1] += 1
+
+    return array.array("i", itertools.accumulate(counts))
+
+
+def _make_numpy_offsets(ids: "numpy.ndarray") -> "numpy.ndarray":
+    """
+    The same as _make_offsets, counting the rows by numpy.bincount.
+    """
+    offsets = numpy.zeros(int(ids.max(initial=-1)) + 2, dtype=numpy.int64)
+    numpy.cumsum(numpy.bincount(ids, minlength=len(offsets) - 1), out=offsets[1:])
+    return offsets
+
+
+def _to_numpy(values: typing.Sequence[int]) -> "numpy.ndarray":
+    if isinstance(values, array.array):
+        return numpy.frombuffer(values, dtype=numpy.int32) if len(values) else numpy.zeros(0, dtype=numpy.int32)
+    return numpy.array(values, dtype=numpy.int32)
+
+
+def _from_numpy(values: "numpy.ndarray") -> array.array:
+    """
+    The arrays of the graph are kept as array.array,
+    their items are read by Python code faster than the ones of NumPy arrays.
+    """
+    result = array.array("i")
+    result.frombytes(values.astype(numpy.int32).tobytes())
+    return result
@@ -1,19 +1,221 @@
-from database.repositories import MoviesRepo
-from entities import Movie
+import typing
+
+from database.dumps import movie_to_raw_movie
+from database.repositories import AsyncMoviesRepo, AsyncVersionsRepo, MoviesRepo, VersionsRepo
+from entities import (
+    CacheStats,
+    Movie,
+    MovieOperation,
+    MovieOperationResult,
+    MoviesBatch,
+    MoviesFilter,
+    MoviesPage,
+    MovieVersion,
+)
+from services.cache import AsyncCache, Cache, CacheInvalidator, create_cache
+from services.schemas import MovieSchema
+import settings
 
 
 class MoviesService:
+    """
+    Movies are cached by their ids. The methods changing movies
+    remove them from the cache after the changes are saved,
+    if the cache is not available CacheUnavailableError is raised.
+    """
     def __init__(self):
         self.movies_repo = MoviesRepo()
+        self.versions_repo = VersionsRepo()
+        self.cache = create_cache(
+            namespace="movies",
+            max_size=settings.MOVIES_CACHE_SIZE,
+            ttl=settings.MOVIES_CACHE_TTL,
+            schema=MovieSchema(),
+        )
+        self.cache_invalidator = CacheInvalidator(self.cache, check_interval=settings.MOVIES_CACHE_CHECK_INTERVAL)
 
     def get_movie(self, movie_id: int) -> Movie:
-        return self.movies_repo.get_movie(movie_id)
+        self._check_cache()
+        movie, token = self.cache.get_for_update(movie_id)
+        if movie is None:
+            movie = self.movies_repo.get_movie(movie_id)
+            if movie is not None:
+                self.cache.set(movie_id, movie, token=token)
+
+        return movie
+
+    def get_movies(self, movie_ids: typing.List[int]) -> MoviesBatch:
+        movie_ids = list(dict.fromkeys(movie_ids))
+        self._check_cache()
+
+        # Only the movies missing in the cache are requested from the database
+        cached_movies, token = self.cache.get_many_for_update(movie_ids)
+        uncached_ids = [movie_id for movie_id in movie_ids if movie_id not in cached_movies]
+        if uncached_ids:
+            found_movies = {movie.id: movie for movie in self.movies_repo.get_movies(uncached_ids)}
+            self.cache.set_many(found_movies, token=token)
+            cached_movies.update(found_movies)
+
+        return MoviesBatch(
+            movies=[cached_movies[movie_id] for movie_id in movie_ids if movie_id in cached_movies],
+            missing_ids=[movie_id for movie_id in movie_ids if movie_id not in cached_movies],
+        )
+
+    def get_movies_page(
+        self,
+        movies_filter: MoviesFilter,
+        sort: str = "id",
+        limit: int = 20,
+        cursor: typing.Optional[tuple] = None,
+    ) -> MoviesPage:
+        """
+        Getting a page of the filtered movies list.
+        Pages are not cached, the movies are read with the page.
+        """
+        return self.movies_repo.get_movies_page(movies_filter=movies_filter, sort=sort, limit=limit, cursor=cursor)
+
+    def get_data_version(self) -> int:
+        """
+        Getting the version of the data which changes
+        on every change of the movies.
+        """
+        return self.versions_repo.get_version()
+
+    def export_movies(self) -> typing.Iterator[dict]:
+        """
+        Iterating over all movies in the format of the files
+        loaded by manage.py reload (see database.dumps).
+        The cache is not used.
+        """
+        return (movie_to_raw_movie(movie) for movie in self.movies_repo.iter_movies())
+
+    def get_movies_versions(self, movie_ids: typing.List[int]) -> typing.Dict[int, MovieVersion]:
+        """
+        Getting the versions of the movies mapped by their ids.
+        Versions of the cached movies are taken from the cache,
+        so they always correspond to the movies returned by the service.
+        """
+        self._check_cache()
+        versions = {
+            movie.id: MovieVersion(id=movie.id, version=movie.version, updated_at=movie.updated_at)
+            for movie in self.cache.get_many(movie_ids).values()
+        }
+        uncached_ids = [movie_id for movie_id in movie_ids if movie_id not in versions]
+        if uncached_ids:
+            versions.update((version.id, version) for version in self.movies_repo.get_movies_versions(uncached_ids))
+
+        return versions
 
     def create_movie(self, movie: Movie) -> Movie:
+        # The new movie is cached when it's read
         return self.movies_repo.create_movie(movie)
 
     def edit_movie(self, movie: Movie) -> Movie:
-        return self.movies_repo.edit_movie(movie)
+        edited_movie = self.movies_repo.edit_movie(movie)
+        # The edited movie isn't set to the cache since concurrent edits may set their movies in any order
+        self.cache.delete(movie.id)
+        return edited_movie
 
     def delete_movie(self, movie_id: int):
         self.movies_repo.delete_movie(movie_id)
+        self.cache.delete(movie_id)
+
+    def apply_operations(self, operations: typing.List[MovieOperation]) -> typing.List[MovieOperationResult]:
+        results = self.movies_repo.apply_operations(operations)
+        self.cache.delete_many([result.id for result in results if result.id is not None])
+
+        return results
+
+    def _check_cache(self):
+        """
+        Removing the cached movies changed by other processes.
+        """
+        if not self.cache_invalidator.start_check():
+            return
+
+        since_version = self.cache_invalidator.version
+        changes = None if since_version is None else self.versions_repo.get_changes(since_version)
+        version = self.versions_repo.get_version() if changes is None else changes.version
+        self.cache_invalidator.finish_check(since_version, changes, version)
+
+    def get_cache_stats(self) -> CacheStats:
+        return self.cache.get_stats()
+
+
+class AsyncMoviesService:
+    """
+    Asynchronous version of the reading methods of MoviesService
+    for the ASGI application. The cache is shared with MoviesService
+    so the movies changed by it are never returned stale,
+    it's used by the executor if it's kept by the cache server (see AsyncCache).
+    """
+    def __init__(self, cache: Cache, cache_invalidator: CacheInvalidator):
+        self.movies_repo = AsyncMoviesRepo()
+        self.versions_repo = AsyncVersionsRepo()
+        self.cache = AsyncCache(cache)
+        self.cache_invalidator = cache_invalidator
+
+    async def get_movie(self, movie_id: int) -> Movie:
+        await self._check_cache()
+        movie, token = await self.cache.get_for_update(movie_id)
+        if movie is None:
+            movie = await self.movies_repo.get_movie(movie_id)
+            if movie is not None:
+                await self.cache.set(movie_id, movie, token=token)
+
+        return movie
+
+    async def get_movies(self, movie_ids: typing.List[int]) -> MoviesBatch:
+        movie_ids = list(dict.fromkeys(movie_ids))
+        await self._check_cache()
+
+        cached_movies, token = await self.cache.get_many_for_update(movie_ids)
+        uncached_ids = [movie_id for movie_id in movie_ids if movie_id not in cached_movies]
+        if uncached_ids:
+            found_movies = {movie.id: movie for movie in await self.movies_repo.get_movies(uncached_ids)}
+            await self.cache.set_many(found_movies, token=token)
+            cached_movies.update(found_movies)
+
+        return MoviesBatch(
+            movies=[cached_movies[movie_id] for movie_id in movie_ids if movie_id in cached_movies],
+            missing_ids=[movie_id for movie_id in movie_ids if movie_id not in cached_movies],
+        )
+
+    async def get_movies_page(
+        self,
+        movies_filter: MoviesFilter,
+        sort: str = "id",
+        limit: int = 20,
+        cursor: typing.Optional[tuple] = None,
+    ) -> MoviesPage:
+        return await self.movies_repo.get_movies_page(
+            movies_filter=movies_filter,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+        )
+
+    async def get_data_version(self) -> int:
+        return await self.versions_repo.get_version()
+
+    async def get_movies_versions(self, movie_ids: typing.List[int]) -> typing.Dict[int, MovieVersion]:
+        await self._check_cache()
+        versions = {
+            movie.id: MovieVersion(id=movie.id, version=movie.version, updated_at=movie.updated_at)
+            for movie in (await self.cache.get_many(movie_ids)).values()
+        }
+        uncached_ids = [movie_id for movie_id in movie_ids if movie_id not in versions]
+        if uncached_ids:
+            found_versions = await self.movies_repo.get_movies_versions(uncached_ids)
+            versions.update((version.id, version) for version in found_versions)
+
+        return versions
+
+    async def _check_cache(self):
+        if not self.cache_invalidator.start_check():
+            return
+
+        since_version = self.cache_invalidator.version
+        changes = None if since_version is None else await self.versions_repo.get_changes(since_version)
+        version = await self.versions_repo.get_version() if changes is None else changes.version
+        await self.cache.run(self.cache_invalidator.finish_check, since_version, changes, version)
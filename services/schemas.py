@@ -0,0 +1,39 @@
+"""
+Schemas of the entities kept out of the process, e.g. by the cache server.
+Unlike the schemas of the API they keep all fields of the entities.
+"""
+from marshmallow import Schema, fields, post_load
+
+from entities import Actor, Genre, Movie
+
+
+class ActorSchema(Schema):
+    id = fields.Integer()
+    name = fields.String()
+
+    @post_load
+    def make_actor(self, data, **kwargs) -> Actor:
+        return Actor(**data)
+
+
+class GenreSchema(Schema):
+    id = fields.Integer()
+    name = fields.String()
+
+    @post_load
+    def make_genre(self, data, **kwargs) -> Genre:
+        return Genre(**data)
+
+
+class MovieSchema(Schema):
+    id = fields.Integer()
+    title = fields.String()
+    year = fields.Integer(allow_none=True)
+    actors = fields.Nested(ActorSchema, many=True)
+    genres = fields.Nested(GenreSchema, many=True)
+    version = fields.Integer(allow_none=True)
+    updated_at = fields.DateTime(allow_none=True)
+
+    @post_load
+    def make_movie(self, data, **kwargs) -> Movie:
+        return Movie(**data)
@@ -0,0 +1,10 @@
+from database.repositories import SearchRepo
+from entities import SearchResults
+
+
+class SearchService:
+    def __init__(self):
+        self.search_repo = SearchRepo()
+
+    def search(self, query: str, offset: int, limit: int) -> SearchResults:
+        return self.search_repo.search(query=query, offset=offset, limit=limit)
@@ -0,0 +1,92 @@
+import threading
+import time
+import typing
+
+from database.repositories import RelationsRepo, VersionsRepo
+from entities import Relations
+
+
+class Snapshot(typing.Protocol):
+    """
+    In-memory copy of the movies relations of some version of the data.
+    """
+    version: int
+
+    def update(self, changed_movie_ids: typing.List[int], relations: Relations) -> "Snapshot":
+        """
+        Making the copy of a newer version, where the relations
+        of the changed movies are replaced by the given ones.
+        """
+
+
+class SnapshotKeeper:
+    """
+    Keeping in-memory copies of the data up to date,
+    e.g. the arrays of the analytics and the actors graph.
+    All copies are created from one load of all relations on the first use
+    of any of them and the data version is checked at most once
+    in check_interval seconds of the used copy, then only the movies changed
+    since the copies version are read (see VersionsRepo.get_changes)
+    and all copies are updated by them. If the changes are unknown,
+    e.g. the data is reloaded, the copies are created again.
+    So the relations are read once however many copies are kept.
+
+    Copies are never changed, so they are read by any number
+    of threads while newer copies are made.
+    """
+    def __init__(self):
+        self.relations_repo = RelationsRepo()
+        self.versions_repo = VersionsRepo()
+        self._creates: typing.Dict[str, typing.Callable[[Relations], Snapshot]] = {}
+        self._snapshots: typing.Optional[typing.Dict[str, Snapshot]] = None
+        self._version: typing.Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, name: str, create: typing.Callable[[Relations], Snapshot]):
+        """
+        Keeping one more copy, which is created by the given function
+        from all relations. Copies are expected to be added before the first use,
+        otherwise all of them are created again.
+        """
+        with self._lock:
+            self._creates[name] = create
+            self._snapshots = None
+
+    def load(self):
+        """
+        Creating the copies in advance, e.g. before the workers are forked
+        so they share the memory of the copies.
+        """
+        with self._lock:
+            if self._snapshots is None:
+                self._refresh()
+
+    def get(self, name: str, check_interval: float) -> Snapshot:
+        snapshots = self._snapshots
+        if snapshots is not None and time.monotonic() - self._checked_at < check_interval:
+            return snapshots[name]
+
+        with self._lock:
+            # The copies may be refreshed by another thread while waiting for the lock
+            if self._snapshots is snapshots:
+                self._refresh()
+            return self._snapshots[name]
+
+    def _refresh(self):
+        snapshots = self._snapshots
+        changes = None if snapshots is None else self.versions_repo.get_changes(self._version)
+
+        if changes is None:
+            relations = self.relations_repo.get_relations()
+            self._snapshots = {name: create(relations) for name, create in self._creates.items()}
+            self._version = relations.version
+        elif changes.version != self._version:
+            relations = self.relations_repo.get_movies_relations(movie_ids=changes.movie_ids, version=changes.version)
+            self._snapshots = {
+                name: snapshot.update(changed_movie_ids=changes.movie_ids, relations=relations)
+                for name, snapshot in snapshots.items()
+            }
+            self._version = changes.version
+
+        self._checked_at = time.monotonic()
@@ -0,0 +1,16 @@
+import typing
+
+from database.connection import get_pool_metrics
+from entities import CacheStats, PoolMetrics
+from services.cache import Cache
+
+
+class SystemService:
+    def __init__(self, caches: typing.List[Cache]):
+        self.caches = caches
+
+    def get_pool_metrics(self) -> PoolMetrics:
+        return get_pool_metrics()
+
+    def get_cache_stats(self) -> typing.List[CacheStats]:
+        return [cache.get_stats() for cache in self.caches]
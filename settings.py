@@ -0,0 +1,93 @@
+"""
+Application settings.
+Every setting may be overridden by the environment variable
+with the same name prefixed by "FILMOGRAPHY_",
+e.g. FILMOGRAPHY_MOVIES_BATCH_MAX_SIZE=50.
+"""
+import os
+
+_PREFIX = "FILMOGRAPHY_"
+
+
+def _get_int(name: str, default: int) -> int:
+    return int(os.environ.get(_PREFIX + name, default))
+
+
+# The maximum number of movies requested at once by GET /movies?ids=...
+MOVIES_BATCH_MAX_SIZE = _get_int("MOVIES_BATCH_MAX_SIZE", 100)
+
+# The maximum page size of the filtered movies list GET /movies
+MOVIES_PAGE_MAX_LIMIT = _get_int("MOVIES_PAGE_MAX_LIMIT", 100)
+
+# The maximum number of operations in a single POST /movies/batch request
+MOVIES_BATCH_MAX_OPERATIONS = _get_int("MOVIES_BATCH_MAX_OPERATIONS", 10000)
+
+# The maximum number of names resolved to ids at once by POST /actors/resolve and POST /genres/resolve
+NAMES_RESOLVE_MAX_SIZE = _get_int("NAMES_RESOLVE_MAX_SIZE", 10000)
+
+# The maximum page size of GET /actors/aggregated, the pages are streamed
+ACTORS_AGGREGATED_MAX_LIMIT = _get_int("ACTORS_AGGREGATED_MAX_LIMIT", 100000)
+
+# The number of the most relevant matches of GET /search, offset + limit of its pages can't exceed it.
+# All matches are ranked, but only this number of the best ones is kept while sorting them
+SEARCH_MAX_RESULTS = _get_int("SEARCH_MAX_RESULTS", 2000)
+
+# Backend of the caches: "memory" keeps them in each process,
+# "socket" keeps them in the cache server (manage.py cache-server) shared by all processes
+CACHE_BACKEND = os.environ.get(_PREFIX + "CACHE_BACKEND", "memory")
+# Address of the cache server: a path of Unix socket prefixed by "unix:"
+# or "host:port" of a loopback interface, the server has no authentication
+CACHE_ADDRESS = os.environ.get(_PREFIX + "CACHE_ADDRESS", "unix:cache.sock")
+# Seconds to wait for the cache server
+CACHE_TIMEOUT = _get_int("CACHE_TIMEOUT", 1)
+
+# The maximum number of cached movies, 0 disables the cache
+MOVIES_CACHE_SIZE = _get_int("MOVIES_CACHE_SIZE", 10000)
+# Seconds during which a cached movie may be returned
+MOVIES_CACHE_TTL = _get_int("MOVIES_CACHE_TTL", 60)
+# Seconds between the checks of the data version by the movies cache,
+# movies changed by other processes (e.g. manage.py) may be returned stale during this time
+MOVIES_CACHE_CHECK_INTERVAL = _get_int("MOVIES_CACHE_CHECK_INTERVAL", 1)
+
+# The number of the last data versions which changed movies are kept in data_change log.
+# Data kept in memory which is older is loaded again completely.
+DATA_CHANGES_KEPT_VERSIONS = _get_int("DATA_CHANGES_KEPT_VERSIONS", 10000)
+
+# Seconds between the checks of the data version by the in-memory analytics (GET /stats/...),
+# changes made during this time are not visible in the statistics
+ANALYTICS_CHECK_INTERVAL = _get_int("ANALYTICS_CHECK_INTERVAL", 1)
+
+# Seconds between the checks of the data version by the in-memory actors graph
+GRAPH_CHECK_INTERVAL = _get_int("GRAPH_CHECK_INTERVAL", 1)
+# The maximum number of actors visited by a search of the path between two actors
+GRAPH_MAX_VISITED_ACTORS = _get_int("GRAPH_MAX_VISITED_ACTORS", 200000)
+
+# Database connection
+DATABASE_URL = os.environ.get(_PREFIX + "DATABASE_URL", "sqlite:///db")
+# The number of connections kept in the pool
+DATABASE_POOL_SIZE = _get_int("DATABASE_POOL_SIZE", 5)
+# The number of connections which may be opened above the pool size
+DATABASE_POOL_MAX_OVERFLOW = _get_int("DATABASE_POOL_MAX_OVERFLOW", 10)
+# Seconds to wait for a free connection of the pool
+DATABASE_POOL_TIMEOUT = _get_int("DATABASE_POOL_TIMEOUT", 30)
+# Seconds after which connections are reopened, -1 means never
+DATABASE_POOL_RECYCLE = _get_int("DATABASE_POOL_RECYCLE", -1)
+# Seconds to wait for SQLite database lock
+DATABASE_TIMEOUT = _get_int("DATABASE_TIMEOUT", 5)
+# Database URL with an asynchronous driver used by the ASGI application (manage.py run --async).
+# By default it's DATABASE_URL with aiosqlite driver for SQLite.
+DATABASE_ASYNC_URL = os.environ.get(_PREFIX + "DATABASE_ASYNC_URL")
+
+# Comma separated URLs of read-only replicas of the database.
+# Local copies of SQLite database file may be used as replicas for testing.
+DATABASE_REPLICA_URLS = [url for url in os.environ.get(_PREFIX + "DATABASE_REPLICA_URLS", "").split(",") if url]
+# The way of choosing a replica for a request: "round_robin" or "least_busy"
+DATABASE_REPLICA_SELECTION = os.environ.get(_PREFIX + "DATABASE_REPLICA_SELECTION", "round_robin")
+
+# Pre-forking server (manage.py run --prefork)
+# The number of worker processes, 0 means the number of CPU cores
+SERVER_WORKERS = _get_int("SERVER_WORKERS", 0)
+# The number of requests after which a worker is replaced by a new one, 0 means never
+SERVER_MAX_REQUESTS = _get_int("SERVER_MAX_REQUESTS", 10000)
+# Seconds given to the workers to finish their requests on shutdown
+SERVER_GRACEFUL_TIMEOUT = _get_int("SERVER_GRACEFUL_TIMEOUT", 30)
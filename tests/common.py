@@ -0,0 +1,79 @@
+"""
+Helpers of the tests using the database.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from alembic import command
+from alembic.config import Config
+
+from database import connection
+import settings
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The empty database migrated once for all tests, they get its copies
+_migrated_directory = None
+
+
+def _get_migrated_database() -> str:
+    global _migrated_directory
+    if _migrated_directory is None:
+        directory = tempfile.TemporaryDirectory(prefix="filmography-test-")
+        config = Config(os.path.join(_ROOT, "database", "alembic.ini"))
+        config.set_main_option("script_location", os.path.join(_ROOT, "database", "migrations"))
+        # The logging configuration of alembic.ini is not applied to the tests
+        with mock.patch.object(settings, "DATABASE_URL", f"sqlite:///{directory.name}/db"), \
+                mock.patch("logging.config.fileConfig"):
+            command.upgrade(config, "head")
+        _migrated_directory = directory
+
+    return os.path.join(_migrated_directory.name, "db")
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """
+    Every test gets its own database migrated to the latest revision,
+    the repositories use it through the settings.
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        path = os.path.join(self.directory.name, "db")
+        shutil.copyfile(_get_migrated_database(), path)
+
+        patcher = mock.patch.multiple(settings, DATABASE_URL=f"sqlite:///{path}", DATABASE_REPLICA_URLS=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._close_database)
+        connection._reset_engines()
+
+    def _close_database(self):
+        connection.get_engine().dispose()
+        connection._reset_engines()
+
+    def execute(self, sql: str, *parameters) -> list:
+        """
+        Executing the SQL statement in its own transaction
+        and returning all rows of its result.
+        """
+        with connection.get_engine().begin() as db_connection:
+            result = db_connection.exec_driver_sql(sql, *parameters)
+            return result.fetchall() if result.returns_rows else []
+
+    def assert_actors_aggregated(self):
+        """
+        Checking that actor_year summary table is the same
+        as the one counted from scratch by the movies.
+        """
+        self.assertEqual(
+            self.execute("SELECT actor_id, year, number FROM actor_year ORDER BY actor_id, year"),
+            self.execute(
+                "SELECT actor_movie.actor_id, movie.year, count(*) FROM actor_movie "
+                "JOIN movie ON movie.id = actor_movie.movie_id WHERE movie.year IS NOT NULL "
+                "GROUP BY actor_movie.actor_id, movie.year ORDER BY actor_movie.actor_id, movie.year"
+            ),
+        )
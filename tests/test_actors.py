@@ -0,0 +1,77 @@
+import json
+import unittest
+
+from api import create_app
+from database.repositories import ActorsRepo
+from tests.common import DatabaseTestCase
+
+
+class ActorsPaginationTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # Actors without names are created by the loader from null names in the cast
+        self.execute("INSERT INTO actor (id, name) VALUES (1, NULL), (2, NULL), (3, 'Alice'), (4, 'Bob')")
+        self.execute(
+            "INSERT INTO actor_year (actor_id, year, number) "
+            "VALUES (1, 2000, 1), (1, 2001, 2), (2, 1999, 1), (3, 2000, 1), (4, 2002, 3)"
+        )
+        self.client = create_app().test_client()
+
+    def get_pages(self, url: str, key: str) -> list:
+        """
+        Getting all items of the list following next_cursor of every page.
+        """
+        items = []
+        next_url = url
+        while True:
+            response = self.client.get(next_url)
+            self.assertEqual(response.status_code, 200, response.data)
+            data = json.loads(response.data)
+            items.append(data[key])
+            if data["next_cursor"] is None:
+                return items
+
+            next_url = f"{url}&cursor={data['next_cursor']}"
+
+    def test_actors_cursor_after_actor_without_name(self):
+        for limit in (1, 3):
+            with self.subTest(limit=limit):
+                pages = self.get_pages(f"/actors?limit={limit}", "actors")
+                self.assertEqual(
+                    [actor for page in pages for actor in page],
+                    [
+                        {"id": 1, "name": None},
+                        {"id": 2, "name": None},
+                        {"id": 3, "name": "Alice"},
+                        {"id": 4, "name": "Bob"},
+                    ],
+                )
+
+    def test_actors_aggregated_cursor_after_actor_without_name(self):
+        expected = [
+            {"name": None, "year": 2000, "number": 1},
+            {"name": None, "year": 2001, "number": 2},
+            {"name": None, "year": 1999, "number": 1},
+            {"name": "Alice", "year": 2000, "number": 1},
+            {"name": "Bob", "year": 2002, "number": 3},
+        ]
+        for limit in (1, 2):
+            with self.subTest(limit=limit):
+                pages = self.get_pages(f"/actors/aggregated?limit={limit}", "actors")
+                self.assertEqual([item for page in pages for item in page], expected)
+                self.assertTrue(all(len(page) == limit for page in pages[:-1]))
+
+    def test_actors_aggregated_page_after_actor_without_name(self):
+        repo = ActorsRepo()
+        for get_page in (repo.get_actors_aggregated, repo.iter_actors_aggregated):
+            with self.subTest(get_page=get_page.__name__):
+                page = get_page(offset=0, limit=1, cursor=(None, 1, 2001))
+                self.assertEqual([(actor.name, actor.year) for actor in page.actors], [(None, 1999)])
+                self.assertEqual(page.next_cursor, (None, 2, 1999))
+
+                page = get_page(offset=0, limit=1, cursor=(None, 2, 1999))
+                self.assertEqual([(actor.name, actor.year) for actor in page.actors], [("Alice", 2000)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+import asyncio
+import datetime
+import os
+import socket
+import stat
+import struct
+import tempfile
+import threading
+import time
+import unittest
+
+from entities import Actor, CacheUnavailableError, Genre, Movie
+from services.cache import AsyncCache, CacheServer, LRUCache, SocketCache, parse_address
+from services.schemas import MovieSchema
+
+
+def make_movie(movie_id: int) -> Movie:
+    return Movie(
+        id=movie_id,
+        title=f"Movie {movie_id}",
+        year=2000,
+        actors=[Actor(id=1, name="Actor")],
+        genres=[Genre(id=2, name="Drama")],
+        version=3,
+        updated_at=datetime.datetime(2020, 1, 2, 3, 4, 5, 6),
+    )
+
+
+class CacheServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.sock")
+        self.server = CacheServer(self.path)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def make_cache(self, namespace: str = "movies", ttl: float = 60, **kwargs) -> SocketCache:
+        return SocketCache(namespace=namespace, max_size=100, ttl=ttl, address=self.path, **kwargs)
+
+    def test_get_set(self):
+        cache = self.make_cache(schema=MovieSchema())
+        movies = {1: make_movie(1), 2: make_movie(2)}
+        cache.set_many(movies)
+
+        self.assertEqual(cache.get_many([1, 2, 3]), movies)
+        self.assertEqual(cache.get(1), movies[1])
+        self.assertIsNone(cache.get(3))
+
+    def test_values_without_schema(self):
+        cache = self.make_cache(namespace="totals")
+        cache.set(7, 100)
+
+        self.assertEqual(cache.get(7), 100)
+
+    def test_namespaces_are_shared_by_clients(self):
+        self.make_cache(namespace="a").set(1, 1)
+
+        self.assertEqual(self.make_cache(namespace="a").get(1), 1)
+        self.assertIsNone(self.make_cache(namespace="b").get(1))
+
+    def test_delete(self):
+        cache = self.make_cache()
+        cache.set_many({1: 1, 2: 2})
+        cache.delete(1)
+
+        self.assertEqual(cache.get_many([1, 2]), {2: 2})
+
+    def test_clear(self):
+        cache = self.make_cache()
+        cache.set_many({1: 1, 2: 2})
+        cache.clear()
+
+        self.assertEqual(cache.get_many([1, 2]), {})
+        self.assertEqual(cache.get_stats().size, 0)
+
+    def test_ttl(self):
+        cache = self.make_cache(ttl=0.05)
+        cache.set(1, 1)
+        time.sleep(0.1)
+
+        self.assertIsNone(cache.get(1))
+
+    def test_stats(self):
+        cache = self.make_cache()
+        cache.set(1, 1)
+        cache.get_many([1, 2])
+
+        stats = cache.get_stats()
+        self.assertEqual((stats.name, stats.size, stats.max_size, stats.hits, stats.misses), ("movies", 1, 100, 1, 1))
+
+    def test_socket_is_private(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+    def test_malformed_message(self):
+        with socket.socket(socket.AF_UNIX) as sock:
+            sock.connect(self.path)
+            data = b"\x80\x04not json"
+            sock.sendall(struct.pack("!I", len(data)) + data)
+            # The connection is closed without executing anything
+            self.assertEqual(sock.recv(1), b"")
+
+        cache = self.make_cache()
+        cache.set(1, 1)
+        self.assertEqual(cache.get(1), 1)
+
+    def test_stale_value_is_not_set(self):
+        cache = self.make_cache()
+        reader_cache = self.make_cache()
+        _, token = reader_cache.get_for_update(1)
+        # The movie is changed after it's read by another client
+        cache.delete(1)
+        reader_cache.set(1, "stale", token=token)
+
+        self.assertIsNone(cache.get(1))
+
+    def test_async_cache_uses_executor(self):
+        cache = self.make_cache(schema=MovieSchema())
+        threads = []
+
+        async def use_cache():
+            async_cache = AsyncCache(cache)
+            values, token = await async_cache.get_many_for_update([1])
+            await async_cache.set_many({1: make_movie(1)}, token=token)
+            await async_cache.run(lambda: threads.append(threading.get_ident()))
+            return values, await async_cache.get_many([1])
+
+        self.assertEqual(asyncio.run(use_cache()), ({}, {1: make_movie(1)}))
+        self.assertNotEqual(threads, [threading.get_ident()])
+
+    def test_server_is_down(self):
+        cache = self.make_cache()
+        cache.set(1, 1)
+        self.server.shutdown()
+        self.server.server_close()
+
+        value, token = cache.get_for_update(1)
+        self.assertIsNone(value)
+        cache.set(1, 1, token=token)
+        self.assertEqual(cache.get_stats().size, 0)
+
+        # Missed changes leave stale items
+        with self.assertRaises(CacheUnavailableError):
+            cache.delete(1)
+        with self.assertRaises(CacheUnavailableError):
+            cache.set(1, 1)
+        with self.assertRaises(CacheUnavailableError):
+            cache.clear()
+
+
+class LRUCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = LRUCache(namespace="movies", max_size=2, ttl=60)
+
+    def test_value_read_before_deletion(self):
+        _, token = self.cache.get_for_update(1)
+        self.cache.delete(1)
+        self.cache.set(1, "stale", token=token)
+
+        self.assertIsNone(self.cache.get(1))
+
+    def test_value_read_before_change(self):
+        _, token = self.cache.get_for_update(1)
+        self.cache.set(1, "changed")
+        self.cache.set(1, "stale", token=token)
+
+        self.assertEqual(self.cache.get(1), "changed")
+
+    def test_value_read_before_clear(self):
+        _, token = self.cache.get_for_update(1)
+        self.cache.clear()
+        self.cache.set(1, "stale", token=token)
+
+        self.assertIsNone(self.cache.get(1))
+
+    def test_value_read_after_deletion(self):
+        self.cache.delete(1)
+        _, token = self.cache.get_for_update(1)
+        self.cache.set(1, "fresh", token=token)
+
+        self.assertEqual(self.cache.get(1), "fresh")
+
+    def test_other_keys_are_set(self):
+        _, token = self.cache.get_many_for_update([1, 2])
+        self.cache.delete(1)
+        self.cache.set_many({1: "stale", 2: "fresh"}, token=token)
+
+        self.assertEqual(self.cache.get_many([1, 2]), {2: "fresh"})
+
+    def test_forgotten_deletions(self):
+        _, token = self.cache.get_for_update(1)
+        # Only as many deletions as the items are remembered
+        self.cache.delete_many([1, 2, 3])
+        self.cache.set(2, "stale", token=token)
+
+        self.assertIsNone(self.cache.get(2))
+
+    def test_eviction(self):
+        self.cache.set_many({1: 1, 2: 2})
+        self.cache.get(1)
+        self.cache.set(3, 3)
+
+        self.assertEqual(self.cache.get_many([1, 2, 3]), {1: 1, 3: 3})
+        self.assertEqual(self.cache.get_stats().evictions, 1)
+
+
+class ParseAddressTestCase(unittest.TestCase):
+    def test_unix_socket(self):
+        self.assertEqual(parse_address("unix:/tmp/cache.sock"), "/tmp/cache.sock")
+
+    def test_loopback(self):
+        self.assertEqual(parse_address("127.0.0.1:7390"), ("127.0.0.1", 7390))
+        self.assertEqual(parse_address("[::1]:7390"), ("::1", 7390))
+        self.assertEqual(parse_address("localhost:7390"), ("localhost", 7390))
+
+    def test_remote_address(self):
+        for address in ("0.0.0.0:7390", "10.0.0.1:7390", "example.com:7390", ":7390"):
+            with self.subTest(address=address), self.assertRaises(ValueError):
+                parse_address(address)
+
+    def test_server_refuses_remote_address(self):
+        with self.assertRaises(ValueError):
+            CacheServer(("0.0.0.0", 0))
+
+    def test_loopback_server(self):
+        server = CacheServer(("127.0.0.1", 0))
+        server.start()
+        try:
+            cache = SocketCache(namespace="movies", max_size=10, ttl=60, address=server.server_address)
+            cache.set(1, 1)
+            self.assertEqual(cache.get(1), 1)
+        finally:
+            server.shutdown()
+            server.server_close()
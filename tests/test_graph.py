@@ -0,0 +1,77 @@
+import array
+import random
+import unittest
+from unittest import mock
+
+from entities import Relations
+from services import graph
+
+
+def make_relations(version: int, pairs: set) -> Relations:
+    pairs = sorted(pairs)
+    return Relations(
+        version=version,
+        movie_ids=array.array("i"),
+        movie_years=array.array("i"),
+        actor_movie_ids=array.array("i", [movie_id for movie_id, _ in pairs]),
+        actor_ids=array.array("i", [actor_id for _, actor_id in pairs]),
+        genre_movie_ids=array.array("i"),
+        genre_ids=array.array("i"),
+    )
+
+
+def get_arrays(built_graph: "graph._Graph") -> tuple:
+    return tuple(list(values) for values in (
+        built_graph.movie_offsets, built_graph.movie_actor_ids, built_graph.actor_offsets, built_graph.actor_movie_ids,
+    ))
+
+
+@unittest.skipIf(graph.numpy is None, "NumPy is not installed")
+class GraphBuildingTestCase(unittest.TestCase):
+    """
+    The arrays built by NumPy must be the same as the ones built by Python loops.
+    """
+    def build(self, relations: Relations, use_numpy: bool) -> "graph._Graph":
+        with mock.patch.object(graph, "numpy", graph.numpy if use_numpy else None):
+            return graph._Graph.from_relations(relations)
+
+    def test_from_relations(self):
+        rand = random.Random(1)
+        for movies_number in (0, 1, 100):
+            with self.subTest(movies_number=movies_number):
+                pairs = {
+                    (rand.randint(1, movies_number), rand.randint(1, movies_number // 2 + 1))
+                    for _ in range(movies_number * 3)
+                }
+                relations = make_relations(1, pairs)
+                self.assertEqual(
+                    get_arrays(self.build(relations, use_numpy=True)),
+                    get_arrays(self.build(relations, use_numpy=False)),
+                )
+
+    def test_rebuild_after_changes(self):
+        rand = random.Random(2)
+        relations = make_relations(1, {(rand.randint(1, 100), rand.randint(1, 50)) for _ in range(300)})
+        # Changed, deleted and new movies
+        changed_movie_ids = [1, 2, 50, 100, 120]
+        changes = make_relations(2, {(movie_id, rand.randint(1, 60)) for movie_id in (1, 50, 120) for _ in range(3)})
+
+        graphs = []
+        for use_numpy in (True, False):
+            with mock.patch.object(graph, "numpy", graph.numpy if use_numpy else None), \
+                    mock.patch.object(graph, "_MAX_CHANGED_MOVIES", 2):
+                graphs.append(graph._Graph.from_relations(relations).update(changed_movie_ids, changes))
+
+        self.assertEqual(get_arrays(graphs[0]), get_arrays(graphs[1]))
+        self.assertEqual(graphs[0].changed_movies, {})
+        self.assertEqual(graphs[0].version, 2)
+        self.assertEqual(list(graphs[0].get_movie_actor_ids(2)), [])
+        new_pairs = zip(changes.actor_movie_ids, changes.actor_ids)
+        self.assertEqual(
+            list(graphs[0].get_movie_actor_ids(120)),
+            [actor_id for movie_id, actor_id in new_pairs if movie_id == 120],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+
+from database.repositories import MoviesRepo
+from entities import (
+    MOVIE_CREATE,
+    MOVIE_DELETE,
+    MOVIE_UPDATE,
+    OPERATION_CREATED,
+    OPERATION_DELETED,
+    OPERATION_INVALID,
+    OPERATION_NOT_FOUND,
+    OPERATION_UPDATED,
+    Actor,
+    Genre,
+    Movie,
+    MovieOperation,
+)
+from tests.common import DatabaseTestCase
+
+
+def make_movie(title: str, year: int, actor_ids: list, genre_ids: list = ()) -> Movie:
+    return Movie(
+        title=title,
+        year=year,
+        actors=[Actor(id=actor_id) for actor_id in actor_ids],
+        genres=[Genre(id=genre_id) for genre_id in genre_ids],
+    )
+
+
+class ApplyOperationsTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.execute("INSERT INTO actor (id, name) VALUES (1, 'Alice'), (2, 'Bob'), (3, 'Carol')")
+        self.execute("INSERT INTO genre (id, name) VALUES (1, 'Drama'), (2, 'Comedy')")
+        self.repo = MoviesRepo()
+        self.first_id = self.repo.create_movie(make_movie("First", 2000, [1, 2], [1])).id
+        self.second_id = self.repo.create_movie(make_movie("Second", 2001, [2], [2])).id
+        self.version = self.get_data_version()
+
+    def get_data_version(self) -> int:
+        return self.execute("SELECT version FROM data_version")[0][0]
+
+    def test_mixed_batch(self):
+        results = self.repo.apply_operations([
+            MovieOperation(MOVIE_UPDATE, movie_id=self.first_id, movie=make_movie("First", 2002, [1])),
+            MovieOperation(MOVIE_UPDATE, movie_id=self.first_id, movie=make_movie("First again", 2003, [1, 3], [2])),
+            MovieOperation(MOVIE_DELETE, movie_id=self.second_id),
+            MovieOperation(MOVIE_UPDATE, movie_id=self.second_id, movie=make_movie("Second", 2001, [2])),
+            MovieOperation(MOVIE_CREATE, movie=make_movie("Third", 2000, [2, 3], [1])),
+            MovieOperation(MOVIE_UPDATE, movie_id=3, movie=make_movie("Third", 2001, [3, 3])),
+            MovieOperation(MOVIE_CREATE, movie=make_movie("Invalid", 2000, [1, 99])),
+            MovieOperation(MOVIE_DELETE, movie_id=999),
+            MovieOperation(MOVIE_CREATE, movie=make_movie("Fourth", None, [1])),
+            MovieOperation(MOVIE_DELETE, movie_id=4),
+        ])
+
+        self.assertEqual(
+            [(result.action, result.status, result.id) for result in results],
+            [
+                (MOVIE_UPDATE, OPERATION_UPDATED, self.first_id),
+                (MOVIE_UPDATE, OPERATION_UPDATED, self.first_id),
+                (MOVIE_DELETE, OPERATION_DELETED, self.second_id),
+                (MOVIE_UPDATE, OPERATION_NOT_FOUND, self.second_id),
+                # The id of the deleted movie is not reused
+                (MOVIE_CREATE, OPERATION_CREATED, 3),
+                (MOVIE_UPDATE, OPERATION_UPDATED, 3),
+                (MOVIE_CREATE, OPERATION_INVALID, None),
+                (MOVIE_DELETE, OPERATION_NOT_FOUND, 999),
+                (MOVIE_CREATE, OPERATION_CREATED, 4),
+                (MOVIE_DELETE, OPERATION_DELETED, 4),
+            ],
+        )
+
+        # Every update of a saved movie increases its version, the created one is saved once
+        self.assertEqual(
+            self.execute("SELECT id, title, year, version FROM movie ORDER BY id"),
+            [(self.first_id, "First again", 2003, 3), (3, "Third", 2001, 1)],
+        )
+        self.assertEqual(
+            self.execute("SELECT movie_id, actor_id FROM actor_movie ORDER BY movie_id, actor_id"),
+            [(self.first_id, 1), (self.first_id, 3), (3, 3)],
+        )
+        self.assertEqual(
+            self.execute("SELECT movie_id, genre_id FROM genre_movie ORDER BY movie_id, genre_id"),
+            [(self.first_id, 2)],
+        )
+        self.assert_actors_aggregated()
+
+        # The whole batch is one version of the data
+        self.assertEqual(self.get_data_version(), self.version + 1)
+        self.assertEqual(
+            self.execute("SELECT movie_id FROM data_change WHERE version = ? ORDER BY movie_id", (self.version + 1,)),
+            [(self.first_id,), (self.second_id,), (3,), (4,)],
+        )
+        self.assertEqual(
+            self.execute("SELECT rowid, title FROM movie_fts ORDER BY rowid"),
+            [(self.first_id, "First again"), (3, "Third")],
+        )
+
+    def test_batch_without_changes(self):
+        results = self.repo.apply_operations([
+            MovieOperation(MOVIE_DELETE, movie_id=999),
+            MovieOperation(MOVIE_UPDATE, movie_id=self.first_id, movie=make_movie("First", 2000, [99])),
+        ])
+
+        self.assertEqual([result.status for result in results], [OPERATION_NOT_FOUND, OPERATION_INVALID])
+        self.assertEqual(
+            self.execute("SELECT id, title, year, version FROM movie ORDER BY id"),
+            [(self.first_id, "First", 2000, 1), (self.second_id, "Second", 2001, 1)],
+        )
+        self.assertEqual(
+            self.execute("SELECT count(*) FROM data_change WHERE version > ?", (self.version,)),
+            [(0,)],
+        )
+        self.assert_actors_aggregated()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+from unittest import mock
+
+from database.connection import get_session
+from database.repositories import SearchRepo
+from tests.common import DatabaseTestCase
+import settings
+
+
+class SearchRankingTestCase(DatabaseTestCase):
+    def test_all_matches_are_ranked(self):
+        # The most relevant title has the largest id, after more matches than SEARCH_MAX_RESULTS
+        titles = [f"Star of the long winding road number {number}" for number in range(1, 31)] + ["Star"]
+        self.execute(
+            "INSERT INTO movie (id, title, year, updated_at) VALUES "
+            + ", ".join(f"({movie_id}, '{title}', 2000, '2020-01-01')" for movie_id, title in enumerate(titles, 1))
+        )
+        with get_session() as session:
+
+            session.begin()
+            SearchRepo().index_movies(movie_ids=list(range(1, len(titles) + 1)), session=session)
+            session.commit()
+
+        with mock.patch.object(settings, "SEARCH_MAX_RESULTS", 10):
+            first_page = SearchRepo().search("star", offset=0, limit=5)
+            last_page = SearchRepo().search("star", offset=5, limit=10)
+
+        self.assertEqual(first_page.movies[0].id, len(titles))
+        self.assertEqual(len(first_page.movies), 5)
+        # The pages are parts of the same order, the one beyond SEARCH_MAX_RESULTS is cut
+        self.assertEqual(len(last_page.movies), 5)
+        self.assertFalse({movie.id for movie in first_page.movies} & {movie.id for movie in last_page.movies})
+
+
+if __name__ == "__main__":
+    unittest.main()
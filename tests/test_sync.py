@@ -0,0 +1,125 @@
+import unittest
+
+from database.connection import get_session
+from database.sync import MoviesSynchronizer, SyncResult
+from tests.common import DatabaseTestCase
+
+
+def make_raw_movie(title: str, year: int, cast: list, genres: list = ()) -> dict:
+    return {"title": title, "year": year, "cast": list(cast), "genres": list(genres)}
+
+
+class MoviesSynchronizerTestCase(DatabaseTestCase):
+    def sync(self, raw_movies: list) -> SyncResult:
+        with get_session() as session:
+
+            session.begin()
+            result = MoviesSynchronizer(session).sync(raw_movies)
+            session.commit()
+
+        return result
+
+    def get_movies(self) -> list:
+        return self.execute("SELECT id, title, year, version FROM movie ORDER BY id")
+
+    def get_casts(self) -> list:
+        return self.execute(
+            "SELECT actor_movie.movie_id, actor.name FROM actor_movie JOIN actor ON actor.id = actor_movie.actor_id "
+            "ORDER BY actor_movie.movie_id, actor.name"
+        )
+
+    def get_data_changes(self) -> list:
+        """
+        Getting the ids of the movies changed by the last version.
+        """
+        return [row[0] for row in self.execute(
+            "SELECT movie_id FROM data_change WHERE version = (SELECT version FROM data_version) ORDER BY movie_id"
+        )]
+
+    def assert_search_index(self):
+        """
+        Checking that the index contains exactly the titles of the movies and the names of the actors.
+        """
+        self.assertEqual(
+            self.execute("SELECT rowid, title FROM movie_fts ORDER BY rowid"),
+            self.execute("SELECT id, title FROM movie ORDER BY id"),
+        )
+        self.assertEqual(
+            self.execute("SELECT rowid, name FROM actor_fts ORDER BY rowid"),
+            self.execute("SELECT id, name FROM actor ORDER BY id"),
+        )
+
+    def test_duplicate_titles_in_one_year(self):
+        self.sync([
+            make_raw_movie("Twins", 2000, ["Alice"]),
+            make_raw_movie("Twins", 2000, ["Bob"], ["Drama"]),
+            make_raw_movie("Twins", 2000, ["Carol"]),
+        ])
+        first_id, second_id, third_id = [row.id for row in self.get_movies()]
+
+        # The movies are matched in the order of their ids, so the first one is kept,
+        # the second one gets the cast of the third one and the last one is removed
+        result = self.sync([
+            make_raw_movie("Twins", 2000, ["Alice"]),
+            make_raw_movie("Twins", 2000, ["Carol"]),
+        ])
+
+        self.assertEqual(result, SyncResult(movies_updated=1, movies_deleted=1, actors_deleted=1, genres_deleted=1))
+        self.assertEqual(self.get_movies(), [(first_id, "Twins", 2000, 1), (second_id, "Twins", 2000, 2)])
+        self.assertEqual(self.get_casts(), [(first_id, "Alice"), (second_id, "Carol")])
+        self.assertEqual(self.execute("SELECT name FROM actor ORDER BY name"), [("Alice",), ("Carol",)])
+        self.assertEqual(self.execute("SELECT count(*) FROM genre_movie"), [(0,)])
+        self.assertEqual(self.get_data_changes(), [second_id, third_id])
+        self.assert_actors_aggregated()
+        self.assert_search_index()
+
+    def test_removed_movie(self):
+        self.sync([
+            make_raw_movie("Removed", 1990, ["Alice", "Bob"], ["Drama"]),
+            make_raw_movie("Kept", 1995, ["Bob"], ["Comedy"]),
+        ])
+        removed_id, kept_id = [row.id for row in self.get_movies()]
+
+        result = self.sync([make_raw_movie("Kept", 1995, ["Bob"], ["Comedy"])])
+
+        self.assertEqual(result, SyncResult(movies_deleted=1, actors_deleted=1, genres_deleted=1))
+        self.assertEqual(self.get_movies(), [(kept_id, "Kept", 1995, 1)])
+        self.assertEqual(self.get_casts(), [(kept_id, "Bob")])
+        self.assertEqual(self.execute("SELECT name FROM genre"), [("Comedy",)])
+        self.assertEqual(self.get_data_changes(), [removed_id])
+        self.assert_actors_aggregated()
+        self.assert_search_index()
+
+        # The search finds only the kept movie
+        self.assertEqual(self.execute("SELECT rowid FROM movie_fts WHERE movie_fts MATCH 'removed'"), [])
+
+    def test_changed_cast(self):
+        self.sync([
+            make_raw_movie("Changed", 2010, ["Alice", "Bob"]),
+            make_raw_movie("Other", 2011, ["Alice"]),
+        ])
+        changed_id, other_id = [row.id for row in self.get_movies()]
+
+        result = self.sync([
+            make_raw_movie("Changed", 2010, ["Alice", "Carol"]),
+            make_raw_movie("Other", 2011, ["Alice"]),
+        ])
+
+        self.assertEqual(result, SyncResult(movies_updated=1, actors_inserted=1, actors_deleted=1))
+        self.assertEqual(self.get_movies(), [(changed_id, "Changed", 2010, 2), (other_id, "Other", 2011, 1)])
+        self.assertEqual(self.get_casts(), [(changed_id, "Alice"), (changed_id, "Carol"), (other_id, "Alice")])
+        self.assertEqual(self.get_data_changes(), [changed_id])
+        self.assertEqual(
+            self.execute(
+                "SELECT actor.name, actor_year.year, actor_year.number FROM actor_year "
+                "JOIN actor ON actor.id = actor_year.actor_id ORDER BY actor.name, actor_year.year"
+            ),
+            [("Alice", 2010, 1), ("Alice", 2011, 1), ("Carol", 2010, 1)],
+        )
+        self.assert_actors_aggregated()
+        self.assert_search_index()
+        self.assertEqual(len(self.execute("SELECT rowid FROM actor_fts WHERE actor_fts MATCH 'carol'")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()